@@ -0,0 +1,66 @@
+"""A Python wrapper for the Discuit API.
+
+    from DiscPy import DiscuitAPI
+
+Importing the package loads nothing else: each name below is imported from its module the
+first time it is used, so e.g. a script only using the cache never loads the HTTP stack.
+"""
+import importlib
+
+__version__ = '0.2.0'
+
+# public name -> module it lives in
+_EXPORTS = {
+    'DiscuitAPI' : 'disc_api',
+    'AsyncDiscuitAPI' : 'async_disc_api',
+    'RestAdapter' : 'rest_adapter',
+    'AsyncRestAdapter' : 'async_rest_adapter',
+    'DiscuitAPIException' : 'exceptions',
+    'DiscuitRateLimitException' : 'exceptions',
+    'Post' : 'models',
+    'Posts' : 'models',
+    'Comment' : 'models',
+    'Comments' : 'models',
+    'Community' : 'models',
+    'CommunityRule' : 'models',
+    'User' : 'models',
+    'Link' : 'models',
+    'Image' : 'models',
+    'Result' : 'models',
+    'RateLimiter' : 'rate_limiter',
+    'SharedRateLimiter' : 'rate_limiter',
+    'RetryPolicy' : 'retry',
+    'RequestsTransport' : 'transport',
+    'HTTPXTransport' : 'transport',
+    'RecordingTransport' : 'transport',
+    'ReplayTransport' : 'transport',
+    'MemoryCache' : 'cache',
+    'DiskCache' : 'cache',
+    'get_decoder' : 'decoders',
+    'MetricsCollector' : 'instrumentation',
+    'Instrumentation' : 'instrumentation',
+    'BatchAction' : 'batch',
+    'CommentTree' : 'comment_tree',
+    'SyncEngine' : 'sync',
+    'SyncStore' : 'sync',
+    'Crawler' : 'crawler',
+    'crawl' : 'crawler',
+    'ModelStore' : 'query',
+    'SearchIndex' : 'search',
+    'Interner' : 'interning',
+    'Watcher' : 'watcher',
+    'watch' : 'watcher',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value                     # later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
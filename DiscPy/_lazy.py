@@ -0,0 +1,23 @@
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Optional
+
+def lazy_import(name: str) -> Optional[ModuleType]:
+    """Returns module name without running it, or None if it isn't installed.
+
+    The module runs on its first attribute access, so importing a DiscPy module that needs
+    requests (or an optional decoder) costs nothing until it is actually used. Already
+    imported modules are returned as they are.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,378 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List
+from .async_rest_adapter import AsyncRestAdapter
+from .rate_limiter import RateLimiter
+from .retry import RetryPolicy
+from .decoders import JSONDecoder
+from .interning import Interner
+from .instrumentation import Instrumentation
+from .models import Comment, Comments, Community, CommunityRule, Link, Post, Posts, User
+
+class AsyncDiscuitAPI:
+    def __init__(self, hostname: str = 'discuit.net/api', ssl_verify: bool = True,
+                 logger: logging.Logger = None, max_connections: int = 100,
+                 max_connections_per_host: int = 20, rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, decoder: JSONDecoder = None,
+                 instrumentation: Instrumentation = None, single_flight: bool = True,
+                 session_file: str = None, interner: Interner = None):
+        """asyncio version of DiscuitAPI. Every method is a coroutine, and all of them
+        share the connection pool of a single AsyncRestAdapter, e.g.
+
+            async with AsyncDiscuitAPI() as api:
+                pages = await asyncio.gather(*(api.get_post_comments(id) for id in ids))
+
+        Args:
+            hostname (str): Defaults to, discuit.net/api
+            ssl_verify (bool, optional): Turn off SSL/TLS cert validation with False. Defaults to True.
+            logger (logging.Logger, optional): If app has a logger, pass it here. Defaults to None.
+            max_connections (int, optional): Total size of the connection pool. Defaults to 100.
+            max_connections_per_host (int, optional): Open connections allowed per host. Defaults to 20.
+            rate_limiter (RateLimiter, optional): Client side rate limits, shareable with a DiscuitAPI.
+                Defaults to a RateLimiter with default rates.
+            retry_policy (RetryPolicy, optional): How transient failures are retried. Defaults to RetryPolicy().
+            decoder (JSONDecoder, optional): JSON decoder, see decoders.get_decoder. Defaults to the best installed.
+            instrumentation (Instrumentation, optional): Request hooks, e.g. a MetricsCollector. Defaults to None.
+            single_flight (bool, optional): Share one request between identical concurrent GETs. Defaults to True.
+            session_file (str, optional): Saved login to load, and save new logins to. Defaults to None.
+            interner (Interner, optional): Identity map fetched models are passed through, see
+                interning.Interner. Defaults to None.
+        """
+        self._rest_adapter = AsyncRestAdapter(hostname, ssl_verify, logger, max_connections,
+                                              max_connections_per_host, rate_limiter=rate_limiter,
+                                              retry_policy=retry_policy, decoder=decoder,
+                                              instrumentation=instrumentation, single_flight=single_flight,
+                                              session_file=session_file)
+        self.interner = interner
+
+    async def close(self):
+        """Closes the underlying connection pool."""
+        await self._rest_adapter.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def authenticate(self, username:str, password:str, force: bool = False):
+        result = await self._rest_adapter.authenticate(username, password, force)
+        return result
+    
+    async def get_all_posts(self) -> Posts:
+        """Gets most recent posts, site-wide.
+
+        Returns:
+            Posts: A list of Post objects.
+        """
+        posts = await self._get_model('posts', Posts)
+        return posts
+    
+    async def get_community_posts(self, community_id: str) -> Posts:
+        """Gets most recent posts by Community ID
+
+        Args:
+            community_id (str): The ID of the community to get posts from.
+
+        Returns:
+            Posts: A list of Post objects.
+        """
+        params = {
+            "communityId" : community_id
+        }
+
+        posts = await self._get_model('posts', Posts, ep_params=params)
+        return posts
+    
+    async def get_post_by_id(self, post_id: str) -> Post:
+        """Get a Post object by Public ID
+        Currently returns list of posts, even though its one.
+
+        Args:
+            post_id (str): The Public ID of the post (discuit.com/postId)
+
+        Returns:
+            Posts: List of Post objects.
+        """
+        # post ID should be the public ID
+        # currently broken, as models are weird
+        post = await self._get_model(f'posts/{post_id}', Post)
+        return post
+    
+    async def get_post_comments(self, post_id:str) -> Comments: 
+        """Get comments on a post by Public ID
+
+        Args:
+            post_id (str): The Public ID of the post.
+
+        Returns:
+            Comments: A list of Comment objects
+        """
+        comments = await self._get_model(f'posts/{post_id}/comments', Comments)
+        return comments
+
+    def iter_posts(self, community_id: str = None, limit: int = None,
+                   sort: str = None) -> AsyncIterator[Post]:
+        """Async generator over every post, site-wide or in one community, following
+        the Posts.next cursor. The next page is requested while the current one is consumed.
+
+        Args:
+            community_id (str, optional): Only yield posts from this community. Defaults to None.
+            limit (int, optional): Posts requested per page. Defaults to None (server default).
+            sort (str, optional): Order, e.g. 'latest', 'hot', 'activity'. Defaults to None (server default).
+
+        Yields:
+            Post: Post objects, in the order asked for.
+        """
+        params = {
+            "communityId" : community_id,
+            "limit" : limit,
+            "sort" : sort
+        }
+        params = {key: value for key, value in params.items() if value is not None}
+        return self._iter_pages('posts', params, Posts)
+
+    def iter_comments(self, post_id: str) -> AsyncIterator[Comment]:
+        """Async generator over every comment on a post, following the Comments.next cursor.
+
+        Args:
+            post_id (str): The Public ID of the post.
+
+        Yields:
+            Comment: Comment objects.
+        """
+        return self._iter_pages(f'posts/{post_id}/comments', {}, Comments)
+
+    async def _iter_pages(self, endpoint: str, params: Dict, page_model: type) -> AsyncIterator:
+        """Async generator behind iter_posts/iter_comments, with one page prefetched as a task."""
+        def fetch(cursor):
+            page_params = dict(params, next=cursor) if cursor else params
+            return asyncio.ensure_future(self._get_model(endpoint, page_model, ep_params=page_params or None))
+
+        pending = fetch(None)
+        try:
+            while pending is not None:
+                page = await pending
+                items = page.posts if page_model is Posts else page.comments
+                cursor = page.next
+                # start on the next page before handing out this one
+                pending = fetch(cursor) if cursor and items else None
+                for item in items:
+                    yield item
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def _get_model(self, endpoint: str, model: type, ep_params: Dict = None):
+        """GETs endpoint and builds model from the response, decoding straight into the model
+        when the adapter's decoder supports it.
+        """
+        result = await self._rest_adapter.get(endpoint=endpoint, ep_params=ep_params, typed=model)
+        obj = result.data if isinstance(result.data, model) else model(**result.data)
+        return self._canonical(obj)
+
+    def _canonical(self, obj):
+        return obj if self.interner is None else self.interner.canonical(obj)
+
+    def _canonical_all(self, objects: List) -> List:
+        return objects if self.interner is None else self.interner.canonical_all(objects)
+
+    async def fetch_link_data(self, link: Link):
+        link.data = await self._rest_adapter.fetch_data(url=link.url)
+
+    async def get_communites(self) -> List[Community]:
+        """Returns a list of all communities, sitewide
+
+        Returns:
+            List[Community]: A list of community objects
+        """
+        results = await self._rest_adapter.get(endpoint='communities')
+        communities_list = self._canonical_all([Community(**datum) for datum in results.data])
+        return communities_list
+
+    async def get_community_by_id(self, community_id: str) -> Community:
+        """Returns a community object by ID.
+
+        Args:
+            community_id (str): The community ID.
+
+        Returns:
+            Community: A Community object
+        """
+        result = await self._rest_adapter.get(endpoint=f'communities/{community_id}')
+        community = self._canonical(Community(**result.data))
+        return community
+
+    async def get_community_rules(self, community_id: str) -> List[CommunityRule]:
+        """Returns a list of CommunityRule objects for the community ID
+
+        Args:
+            community_id (str): ID of community.
+
+        Returns:
+            List[CommunityRule]: A List of CommunityRule objects
+        """
+        result = await self._rest_adapter.get(endpoint=f"communities/{community_id}/rules")
+        rules_list = [CommunityRule(**datum) for datum in result.data]
+        return rules_list
+
+    async def get_community_mods(self, community_id: str) -> List[User]:
+        """Returns a list of User objects that moderate the community.
+
+        Args:
+            community_id (str): Community ID
+
+        Returns:
+            List[User]: A list of user objects.
+        """
+        result = await self._rest_adapter.get(endpoint=f"communities/{community_id}/mods")
+        mods_list = self._canonical_all([User(**datum) for datum in result.data])
+        return mods_list
+
+    async def get_user_by_username(self, username: str) -> User:
+        """Returns a User object by username
+
+        Args:
+            username (str): the username of the user
+
+        Returns:
+            User: A User object
+        """
+        result = await self._rest_adapter.get(endpoint=f"users/{username}")
+        user = self._canonical(User(**result.data))
+        return user
+
+    async def get_auth_user(self):
+        """Returns a User object for the currently authenticated user.
+
+        Returns:
+            _type_: _description_
+        """
+        result = await self._rest_adapter.get(endpoint="_user")
+        user = self._canonical(User(**result.data))
+        return user
+
+    async def create_post(self, type: str, title: str, community:str, 
+                    body:str = None, url:str = None) -> Post:
+        """Creates a post with the supplied args. Returns the Post object.
+
+        Args:
+            type (str): Type of post. One of "text", "image", "link".
+            title (str): Title of the post
+            community (str): Community to post in (common, i.e. "General")
+            body (str, optional): Body of the post. Required for text posts. Defaults to None.
+            url (str, optional): URL for the post. Required for image and link posts. Defaults to None.
+
+        Returns:
+            Post: A Post object of the created post.
+        """
+        data = {
+            "type" : type,
+            "title" : title,
+            "body" : body,
+            "community" : community,
+            "url" : url
+        }
+        result = await self._rest_adapter.post(endpoint="posts", data=data)
+
+        post = Post(**result.data)
+        return post
+    
+    async def update_post(self, post_id:str, title:str = None, body:str = None, should_lock:bool = False):
+
+        data = {
+            "title" : title,
+            "body" : body
+        }
+
+        result = await self._rest_adapter.put(endpoint=f"posts/{post_id}", data=data)
+    
+    async def delete_post(self, post_id:str, delete_as: str = "Normal", delete_content:bool = True) -> Post:
+        """Deletes the post by public post_id.
+
+        Args:
+            post_id (str): Public Post ID
+            delete_as (str, optional): One of 'normal', 'mods', 'admins'. Defaults to Normal.
+            delete_content (bool, optional): If True, the body will also be deleted. Defaults to True.
+
+        Returns:
+            Post: Post object of deleted post.
+        """
+        params = {
+            "deleteAs" : delete_as,
+            "deleteContent" : delete_content
+        }
+
+        result = await self._rest_adapter.delete(endpoint=f"posts/{post_id}", ep_params=params)
+
+        return Post(**result.data)
+    
+    async def vote_post(self, post_id:str, upvote:bool):
+        """Votes on a post by post ID.
+
+        Args:
+            post_id (str): ID of the post (not public ID)
+            upvote (bool): If True, up, if False, down
+
+        Returns:
+            Status Code: The status code of the request.
+        """
+        params = {
+            "postId" : post_id,
+            "up" : upvote
+        }
+
+        result = await self._rest_adapter.post(endpoint="_postVote", data=params)
+
+        return result.status_code
+
+    async def create_comment(self, post_id:str, body:str, parent_comment_id:str = None):
+        """Creates a comment on given Post ID. If Parent comment ID is supplied, it will be a reply
+
+        Args:
+            post_id (str): the ID of the Post
+            body (str): Body of the comment
+            parent_comment_id (str, optional): ID of the comment to reply to. Defaults to None.
+
+        Returns:
+            Comment: Comment object of created comment.
+        """
+        data = {
+            "parentCommentID" : parent_comment_id,
+            "body" : body
+        }
+
+        result = await self._rest_adapter.post(endpoint=f"posts/{post_id}/comments", data=data)
+
+        # Need to modify Comment model, as result.data apparently doesnt give all info
+        comment = Comment(**result.data)
+        return comment
+    
+    async def delete_comment(self, post_id:str, comment_id:str, delete_as:str = 'Normal'):
+
+        data = {
+            "deleteAs" : delete_as
+        }
+
+        result = await self._rest_adapter.delete(endpoint=f"posts/{post_id}/comments/{comment_id}", data=data)
+
+        return result.status_code
+    
+    async def vote_comment(self, comment_id:str, upvote:bool):
+        """Votes on a comment by comment ID.
+
+        Args:
+            comment_id (str): ID of the post (not public ID)
+            upvote (bool): If True, up, if False, down
+
+        Returns:
+            Status Code: The status code of the request.
+        """
+        data = {
+            "commentId" : comment_id,
+            "up" : upvote
+        }
+
+        result = await self._rest_adapter.post(endpoint="_commentVote", data=data)
+
+        return result.status_code
\ No newline at end of file
@@ -0,0 +1,382 @@
+import asyncio
+import logging
+import time
+from typing import Dict
+from .auth import REAUTH_INTERVAL, REAUTH_STATUSES, AuthState
+from .cache import cache_key
+from .decoders import JSONDecoder, get_decoder
+from .exceptions import DiscuitAPIException, DiscuitRateLimitException
+from .instrumentation import Instrumentation, RequestInfo
+from .models import Result
+from .rate_limiter import RateLimiter
+from .retry import RetryPolicy
+from .single_flight import AsyncSingleFlight
+from .transport import query_params
+
+try:
+    import aiohttp
+    # transport errors that are worth another attempt
+    RETRYABLE_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+except ImportError:
+    aiohttp = None
+
+class AsyncRestAdapter:
+    def __init__(self, hostname: str = 'discuit.net/api', ssl_verify: bool = True,
+                 logger: logging.Logger = None, max_connections: int = 100,
+                 max_connections_per_host: int = 20, timeout: float = 30,
+                 rate_limiter: RateLimiter = None, retry_policy: RetryPolicy = None,
+                 decoder: JSONDecoder = None, instrumentation: Instrumentation = None,
+                 single_flight: bool = True, session_file: str = None):
+        """Constructor for AsyncRestAdapter. The asyncio equivalent of RestAdapter.
+
+        A single aiohttp.ClientSession (and so a single connection pool) is shared
+        by every request made through the adapter, so many coroutines can be
+        awaited at once with asyncio.gather.
+
+        Args:
+            hostname (str): Defaults to, discuit.net/api
+            ssl_verify (bool, optional): if having SSL/TLS cert validation issues, can turn off with False. Defaults to True.
+            logger (logging.Logger, optional): If app has a logger, pass it here. Defaults to None.
+            max_connections (int, optional): Total size of the connection pool. 0 is unlimited. Defaults to 100.
+            max_connections_per_host (int, optional): Open connections allowed per host. 0 is unlimited. Defaults to 20.
+            timeout (float, optional): Total timeout for a single request, in seconds. Defaults to 30.
+            rate_limiter (RateLimiter, optional): Client side rate limits. Can be the same instance a
+                RestAdapter uses. Defaults to a RateLimiter with default rates.
+            retry_policy (RetryPolicy, optional): How transient failures are retried. Its metrics attribute
+                counts the retries. Defaults to a RetryPolicy with default settings.
+            decoder (JSONDecoder, optional): JSON decoder for response bodies, see decoders.get_decoder.
+                Defaults to the best installed (msgspec, orjson, then stdlib json).
+            instrumentation (Instrumentation, optional): Hooks called around every API request, e.g. a
+                MetricsCollector. Defaults to None.
+            single_flight (bool, optional): Identical GETs awaited while one is already in flight share its
+                Result instead of sending their own. Defaults to True.
+            session_file (str, optional): File the login state is saved to and loaded from, as for
+                RestAdapter. Defaults to None.
+        """
+        if aiohttp is None:
+            raise DiscuitAPIException("AsyncRestAdapter requires aiohttp (pip install DiscPy[async])")
+
+        self.url = "https://{}/".format(hostname)
+        # save to private member variables
+        self._ssl_verify = ssl_verify
+        self._logger = logger or logging.getLogger(__name__)
+        self._max_connections = max_connections
+        self._max_connections_per_host = max_connections_per_host
+        self._timeout = timeout
+        self._rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._decoder = decoder or get_decoder()
+        self.instrumentation = instrumentation
+        self.single_flight = AsyncSingleFlight() if single_flight else None
+
+        # created lazily, as aiohttp sessions have to be made inside a running event loop
+        self._session = None
+
+        self._auth = AuthState()
+        self._credentials = None                    # (username, password), kept to log in again on 401/403
+        # made in the running loop on first use: before Python 3.10 a lock binds to the loop current
+        # when it's created, which isn't the one asyncio.run() starts
+        self._reauth_lock = None
+        self._reauth_loop = None
+        self._session_file = session_file
+        if session_file and self._auth.load(session_file):
+            if self._auth.is_private(session_file) is False:
+                self._logger.warning("session file %s is readable by other users", session_file)
+            self._logger.debug("loaded session for %s from %s", self._auth.username, session_file)
+
+    def _get_reauth_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._reauth_lock is None or self._reauth_loop is not loop:
+            self._reauth_lock, self._reauth_loop = asyncio.Lock(), loop
+        return self._reauth_lock
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Returns the shared ClientSession, creating it (and its pool) on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._max_connections,
+                                             limit_per_host=self._max_connections_per_host,
+                                             ssl=None if self._ssl_verify else False)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self._timeout))
+        return self._session
+
+    async def close(self):
+        """Closes the shared session and every pooled connection."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _do(self, http_method: str, endpoint: str, ep_params: Dict = None, data: Dict = None,
+                  typed: type = None) -> Result:
+        """Helper func for POST/GET/DELETE methods for returning data from requests.
+
+        Args:
+            http_method (str): The method used
+            endpoint (str): The endpoint desired to hit
+            ep_params (Dict, optional): Any parameters required for the data. Defaults to None.
+            data (Dict, optional): Used for POST methods. Defaults to None.
+            typed (type, optional): Model class (Post, Posts, Comment, Comments) to decode a successful
+                body straight into, when the decoder supports it. Defaults to None.
+
+        Raises:
+            DiscuitAPIException: Request failed.
+            DiscuitRateLimitException: Server returned 429.
+            DiscuitAPIException: Bad JSON response.
+            DiscuitAPIException: Bad status code.
+
+        Returns:
+            Result: Instance of results model.
+        """
+        full_url = self.url + endpoint
+
+        # aiohttp only accepts str/int/float query values; encode bools as the sync transports do
+        ep_params = query_params(ep_params)
+
+        instrumentation = self.instrumentation
+        reauthenticated = False
+
+        # Log HTTP params and perform HTTP request, retrying transient failures per the retry policy
+        attempt = 0
+        while True:
+            attempt += 1
+            auth_version, auth_headers = self._auth.snapshot()
+            await self._rate_limiter.acquire_async(http_method, endpoint)
+            self.retry_policy.metrics.record_attempt()
+            if instrumentation is not None:
+                info = RequestInfo(http_method, endpoint, full_url, ep_params, attempt)
+                instrumentation.before_request(info)
+                started = time.perf_counter()
+            try:
+                self._logger.debug("method=%s, url=%s, params=%s", http_method, full_url, ep_params)
+                async with self._get_session().request(method=http_method, url=full_url, headers=auth_headers,
+                                                       params=ep_params, json=data) as response:
+                    status_code = response.status
+                    reason = response.reason
+                    headers = response.headers
+                    body = await response.read()
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if instrumentation is not None:
+                    info.elapsed, info.error = time.perf_counter() - started, e
+                    instrumentation.after_request(info)
+                delay = self.retry_policy.retry_delay(http_method, attempt, error=e) \
+                    if isinstance(e, RETRYABLE_ERRORS) else None
+                if delay is not None:
+                    if instrumentation is not None:
+                        instrumentation.on_retry(info, delay)
+                    await self._backoff(http_method, full_url, attempt, delay, e)
+                    continue
+                self.retry_policy.metrics.record_outcome(attempt, success=False)
+                self._logger.error(msg=(str(e)))
+                raise DiscuitAPIException("Request Failed") from e
+
+            if instrumentation is not None:
+                info.elapsed = time.perf_counter() - started
+                info.status_code = status_code
+                info.response_bytes = len(body)
+                instrumentation.after_request(info)
+
+            # the login has expired: log in again (or pick up another task's new login) and replay once
+            if status_code in REAUTH_STATUSES and not reauthenticated \
+                    and await self._reauthenticate(auth_version):
+                reauthenticated = True
+                attempt -= 1                        # the replay doesn't use up a retry
+                continue
+
+            # let the limiter adapt to the response before deciding whether to go again
+            retry_after = self._rate_limiter.update(http_method, endpoint, status_code, headers)
+            delay = self.retry_policy.retry_delay(http_method, attempt, status_code=status_code,
+                                                  retry_after=retry_after)
+            if delay is None:
+                break
+            if instrumentation is not None:
+                instrumentation.on_retry(info, delay)
+            await self._backoff(http_method, full_url, attempt, delay, status_code)
+
+        is_success = 299 >= status_code >= 200
+        self.retry_policy.metrics.record_outcome(attempt, is_success)
+
+        # bail out before decoding a 429 body
+        if status_code == 429:
+            self._logger.warning("method=%s, url=%s, success=False, status_code=429, message=%s",
+                                 http_method, full_url, reason)
+            raise DiscuitRateLimitException(f"{status_code} :  {reason}", retry_after)
+
+        # deserialise JSON output to python object, or return failed on exe
+        try:
+            data = None
+            if typed is not None and is_success and self._decoder.typed:
+                data = self._decoder.decode_typed(body, typed)
+            if data is None:
+                data = self._decoder.decode(body)
+
+        except ValueError as e:
+            self._logger.error("method=%s, url=%s, success=False, status_code=%s, message=%s",
+                               http_method, full_url, status_code, e)
+            raise DiscuitAPIException("Bad JSON response") from e
+
+        # if status_code in 200-299 range, return success Result with data, otherwise raise exception
+        if is_success:
+            return Result(status_code, message=reason, data=data)
+
+        raise DiscuitAPIException(f"{status_code} :  {reason}")
+
+    async def _backoff(self, http_method: str, url: str, attempt: int, delay: float, reason):
+        """Logs a retry and sleeps for its backoff."""
+        self._logger.warning("method=%s, url=%s, retry=%d/%d, reason=%s, backoff=%.2fs", http_method, url,
+                             attempt, self.retry_policy.max_attempts - 1, reason, delay)
+        await asyncio.sleep(delay)
+
+    async def get(self, endpoint: str, ep_params: Dict = None, typed: type = None) -> Result:
+        """Performs a GET request to the specified endpoint with given parameters.
+
+        Args:
+            endpoint (str): The endpoint to reach after /api. (e.g., posts, users)
+            ep_params (Dict, optional): Parameters for the request. Defaults to None.
+            typed (type, optional): Model class to decode straight into, see _do. Defaults to None.
+
+        Returns:
+            Result: Result object. Data from a shared in-flight request is shared, so treat it as read-only.
+        """
+        if self.single_flight is None:
+            return await self._do(http_method='GET', endpoint=endpoint, ep_params=ep_params, typed=typed)
+        key = (cache_key(endpoint, ep_params), typed)
+        return await self.single_flight.do(
+            key, lambda: self._do(http_method='GET', endpoint=endpoint, ep_params=ep_params, typed=typed))
+
+    async def post(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
+        """Performs a POST reqeuest to the given endpoint, with params and data.
+
+        Args:
+            endpoint (str): The endpoint to reach after /api. (e.g., posts, users)
+            ep_params (Dict, optional): Parameters for the request.. Defaults to None.
+            data (Dict, optional): Data to post. Defaults to None.
+
+        Returns:
+            Result: Result object.
+        """
+        return await self._do(http_method='POST', endpoint=endpoint, ep_params=ep_params, data=data)
+
+    async def delete(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
+        return await self._do(http_method='DELETE', endpoint=endpoint, ep_params=ep_params, data=data)
+
+    async def put(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
+        return await self._do(http_method='PUT', endpoint=endpoint, ep_params=ep_params, data=data)
+
+    async def fetch_data(self, url: str) -> bytes:
+        #GET URL
+        http_method = 'GET'
+        attempt = 0
+        while True:
+            attempt += 1
+            self.retry_policy.metrics.record_attempt()
+            try:
+                self._logger.debug("method=%s, url=%s", http_method, url)
+                async with self._get_session().request(method=http_method, url=url) as response:
+                    status_code = response.status
+                    reason = response.reason
+                    content = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                delay = self.retry_policy.retry_delay(http_method, attempt, error=e) \
+                    if isinstance(e, RETRYABLE_ERRORS) else None
+                if delay is not None:
+                    await self._backoff(http_method, url, attempt, delay, e)
+                    continue
+                self.retry_policy.metrics.record_outcome(attempt, success=False)
+                self._logger.error(msg=(str(e)))
+                raise DiscuitAPIException(str(e)) from e
+
+            delay = self.retry_policy.retry_delay(http_method, attempt, status_code=status_code)
+            if delay is None:
+                break
+            await self._backoff(http_method, url, attempt, delay, status_code)
+
+        # If status_code in 200-299 range, return byte stream, otherwise raise exception
+        is_success = 299 >= status_code >= 200
+        self.retry_policy.metrics.record_outcome(attempt, is_success)
+        self._logger.debug("success=%s, status_code=%s, message=%s", is_success, status_code, reason)
+        if not is_success:
+            raise DiscuitAPIException(reason)
+        return content
+
+    async def authenticate(self, username: str, password: str, force: bool = False):
+        """Logs in, or reuses a saved session for username (unless force). See RestAdapter.authenticate.
+
+        Returns:
+            int: Status code of the login response, or 200 when a saved session was reused.
+        """
+        self._credentials = (username, password)
+        if not force and self._auth.authenticated and self._auth.username == username:
+            self._logger.debug("reusing saved session for %s", username)
+            return 200
+        async with self._get_reauth_lock():
+            status_code = await self._login(username, password)
+        self._save_session()
+        return status_code
+
+    async def _reauthenticate(self, seen_version: int) -> bool:
+        """Renews the login after a 401/403 on a request sent with auth version seen_version.
+
+        Returns:
+            bool: Whether the request is worth replaying with the current login.
+        """
+        if self._credentials is None:
+            return False
+        async with self._get_reauth_lock():
+            if self._auth.version != seen_version:
+                return True                         # another task logged in meanwhile, use that
+            if time.time() - self._auth.refreshed_at < REAUTH_INTERVAL:
+                return False
+            username, password = self._credentials
+            self._logger.info("login rejected, logging in again as %s", username)
+            await self._login(username, password)
+        self._save_session()
+        return True
+
+    def _save_session(self):
+        if not self._session_file:
+            return
+        try:
+            self._auth.save(self._session_file)
+        except OSError as e:
+            self._logger.warning("couldn't save session to %s: %s", self._session_file, e)
+
+    async def _login(self, username: str, password: str) -> int:
+        """Runs the _initial and _login round trips and swaps in the new login, returning its status code."""
+        session = self._get_session()
+        try:
+            async with session.get(self.url + '_initial') as result:
+                headers = result.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise DiscuitAPIException("Request for login headers failed") from e
+
+        auth_headers = {
+            'Cookie' : ', '.join(headers.getall('Set-Cookie')),
+            'X-Csrf-Token' : headers['Csrf-Token'],
+            'Content-Type' : 'application/json'
+        }
+
+        data = {
+            'username' : username,
+            'password' : password
+        }
+
+        try:
+            async with session.post(self.url + '_login', headers=auth_headers, json=data) as response:
+                status_code = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise DiscuitAPIException("Request failed for login route") from e
+
+        is_success = 299 > status_code >= 200
+
+        if not is_success:
+            raise DiscuitAPIException("Autherisation failed (check user/pass)")
+        else:
+            self._auth.set(auth_headers, username, logged_in=True)
+            return status_code
@@ -0,0 +1,119 @@
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# responses that mean the saved login is no longer accepted
+REAUTH_STATUSES = (401, 403)
+# a 401/403 this soon after logging in is about the request, not the session, so isn't retried with a new login
+REAUTH_INTERVAL = 30.0
+
+class AuthState:
+    def __init__(self):
+        """The cookie/CSRF headers of a logged in client, shared by every thread using it.
+
+        The headers dict is never changed in place: a refresh swaps in a new (version, headers)
+        pair, so a request reading it mid-refresh sees either the old set or the new one.
+        """
+        self._lock = threading.Lock()
+        self._state = (0, {})                       # (version, headers), replaced as a whole
+        self.username = None                        # who the headers are logged in as, if known
+        self.refreshed_at = 0.0                     # time.time() of the last login
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Headers to send with each request. Treat as read-only."""
+        return self._state[1]
+
+    @property
+    def version(self) -> int:
+        """Bumped on every change, see refresh."""
+        return self._state[0]
+
+    def snapshot(self) -> Tuple[int, Dict[str, str]]:
+        """(version, headers) read together, for callers that may need to refresh them later."""
+        return self._state
+
+    @property
+    def authenticated(self) -> bool:
+        return bool(self._state[1])
+
+    def set(self, headers: Dict[str, str], username: str = None, logged_in: bool = False):
+        """Replaces the headers. logged_in marks them as fresh from a login, see refreshed_at."""
+        with self._lock:
+            self._state = (self._state[0] + 1, dict(headers))
+            self.username = username
+            if logged_in:
+                self.refreshed_at = time.time()
+
+    def clear(self):
+        self.set({})
+
+    def refresh(self, login: Callable[[], Dict[str, str]], seen_version: int = None, username: str = None) -> bool:
+        """Replaces the headers with what login returns, one thread at a time.
+
+        Threads that find the session expired pass the version they saw: the first one
+        through logs in, and the rest, finding the version moved on, return straight away
+        and use the new headers instead of logging in again.
+
+        Args:
+            login (Callable[[], Dict[str, str]]): Logs in and returns the new headers. Exceptions propagate
+                and leave the current headers in place.
+            seen_version (int, optional): version when the caller decided a refresh is needed. Defaults to
+                None (always log in).
+            username (str, optional): Who login logs in as. Defaults to None.
+
+        Returns:
+            bool: True if this call logged in, False if another thread already had.
+        """
+        with self._lock:
+            if seen_version is not None and seen_version != self._state[0]:
+                return False
+            headers = dict(login())
+            self._state = (self._state[0] + 1, headers)
+            self.username = username
+            self.refreshed_at = time.time()
+            return True
+
+    def save(self, path: str):
+        """Writes the headers to path, readable only by the current user (0600), replacing it atomically."""
+        path = os.path.expanduser(path)
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        payload = {'username': self.username, 'headers': self.headers, 'saved_at': time.time()}
+        # mkstemp creates the file 0600, so the headers are never readable by others, even briefly
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.session-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f)
+            os.chmod(temp_path, stat.S_IRUSR | stat.S_IWUSR)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def load(self, path: str) -> bool:
+        """Reads headers saved by save. Returns False (changing nothing) if there is no usable file."""
+        path = os.path.expanduser(path)
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            headers = payload['headers']
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if not isinstance(headers, dict) or not headers:
+            return False
+        with self._lock:
+            self._state = (self._state[0] + 1, headers)
+            self.username = payload.get('username')
+        return True
+
+    @staticmethod
+    def is_private(path: str) -> Optional[bool]:
+        """Whether only the owner can read path, or None where permissions can't say (e.g. Windows)."""
+        if os.name != 'posix':
+            return None
+        return not os.stat(os.path.expanduser(path)).st_mode & (stat.S_IRWXG | stat.S_IRWXO)
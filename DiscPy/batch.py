@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List
+
+# DiscuitAPI methods a batch can run
+ACTIONS = ('vote_post', 'vote_comment', 'create_comment', 'delete_comment', 'delete_post',
+           'create_post', 'update_post')
+
+class BatchAction:
+    def __init__(self, action: str, *args, **kwargs):
+        """One DiscuitAPI write call to run in a batch, e.g. BatchAction('vote_post', post_id, True).
+
+        Args:
+            action (str): Name of the DiscuitAPI method, one of ACTIONS.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+
+        Raises:
+            ValueError: action isn't one of ACTIONS.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown batch action '{action}', expected one of {ACTIONS}")
+        self.action = action
+        self.args = args
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        arguments = [repr(arg) for arg in self.args] + [f"{key}={value!r}" for key, value in self.kwargs.items()]
+        return f"{self.action}({', '.join(arguments)})"
+
+
+class BatchResult:
+    OK = 'ok'                                       # ran, value holds what the method returned
+    FAILED = 'failed'                               # ran and raised, error holds the exception
+    DRY_RUN = 'dry_run'                             # would have run
+    CANCELLED = 'cancelled'                         # not started before the batch was cancelled
+
+    def __init__(self, action: BatchAction, status: str, value: Any = None, error: Exception = None):
+        self.action = action
+        self.status = status
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (self.OK, self.DRY_RUN)
+
+    def __repr__(self):
+        return f"BatchResult({self.action!r}, status={self.status!r})"
+
+
+class BatchExecutor:
+    def __init__(self, api, max_workers: int = 8, dry_run: bool = False,
+                 on_result: Callable[[BatchResult], None] = None):
+        """Runs BatchActions against a DiscuitAPI on a pool of worker threads.
+
+        Requests still go through the API's rate limiter, which the workers share, so
+        max_workers only decides how many calls can be waiting on the network at once.
+
+        Args:
+            api (DiscuitAPI): The (authenticated) client to run the actions with.
+            max_workers (int, optional): Actions running at once. Defaults to 8.
+            dry_run (bool, optional): Don't call the API, just report what would run. Defaults to False.
+            on_result (Callable[[BatchResult], None], optional): Called from the workers as each action
+                finishes, e.g. to log progress or cancel after too many failures. Defaults to None.
+        """
+        self._api = api
+        self.max_workers = max_workers
+        self.dry_run = dry_run
+        self.on_result = on_result
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stops the batch. Actions already running finish, the rest are reported CANCELLED."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def run(self, actions: Iterable[BatchAction]) -> List[BatchResult]:
+        """Runs the actions and blocks until all of them have finished or been cancelled.
+
+        Args:
+            actions (Iterable[BatchAction]): What to run.
+
+        Returns:
+            List[BatchResult]: One result per action, in the order given.
+        """
+        self._cancelled.clear()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._run_one, action) for action in actions]
+        return [future.result() for future in futures]
+
+    def _run_one(self, action: BatchAction) -> BatchResult:
+        if self._cancelled.is_set():
+            result = BatchResult(action, BatchResult.CANCELLED)
+        elif self.dry_run:
+            result = BatchResult(action, BatchResult.DRY_RUN)
+        else:
+            try:
+                value = getattr(self._api, action.action)(*action.args, **action.kwargs)
+                result = BatchResult(action, BatchResult.OK, value=value)
+            except Exception as e:
+                # one bad action shouldn't take the batch down, it is reported instead
+                result = BatchResult(action, BatchResult.FAILED, error=e)
+
+        if self.on_result is not None and result.status != BatchResult.CANCELLED:
+            self.on_result(result)
+        return result
@@ -0,0 +1,156 @@
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from .exceptions import DiscuitAPIException
+from .models import Link
+
+class LinkDownloadResult:
+    DOWNLOADED = 'downloaded'                       # fetched and saved
+    EXISTS = 'exists'                               # already on disk with the same size/hash, not fetched
+    DUPLICATE = 'duplicate'                         # same URL as an earlier link in the batch
+    FAILED = 'failed'                               # error holds the reason
+
+    def __init__(self, url: str, path: str, status: str, size: int = 0, error: str = None):
+        """Outcome of one link in a bulk download.
+
+        Args:
+            url (str): URL of the link.
+            path (str): Where the file is (or would have been) saved.
+            status (str): One of DOWNLOADED, EXISTS, DUPLICATE, FAILED.
+            size (int, optional): Size of the file on disk in bytes. Defaults to 0.
+            error (str, optional): Why it failed, for FAILED. Defaults to None.
+        """
+        self.url = url
+        self.path = path
+        self.status = status
+        self.size = size
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status != self.FAILED
+
+    def __repr__(self):
+        return f"LinkDownloadResult(url={self.url!r}, status={self.status!r}, size={self.size})"
+
+
+class BulkDownloader:
+    def __init__(self, rest_adapter, concurrency: int = 8, per_host: int = 4, chunk_size: int = 64 * 1024):
+        """Downloads many links in parallel through a RestAdapter.
+
+        Args:
+            rest_adapter (RestAdapter): Adapter whose session and retry policy are used.
+            concurrency (int, optional): Downloads running at once. Defaults to 8.
+            per_host (int, optional): Downloads running at once against any single host. Defaults to 4.
+            chunk_size (int, optional): Bytes buffered per chunk per download. Defaults to 64 KiB.
+        """
+        self._rest_adapter = rest_adapter
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.chunk_size = chunk_size
+
+    def run(self, links: Iterable[Link], dest_dir: str = './',
+            checksums: Dict[str, str] = None) -> List[LinkDownloadResult]:
+        """Downloads every link into dest_dir. Failures are reported, never raised.
+
+        Each file is written to "<name>.part" and renamed into place once complete (and its
+        checksum, if given, matches), so dest_dir never holds a half-written file under its
+        final name. A leftover .part file from an interrupted run is resumed.
+
+        Args:
+            links (Iterable[Link]): Links to download. Repeated URLs are only downloaded once.
+            dest_dir (str, optional): Directory to save in. Defaults to './'.
+            checksums (Dict[str, str], optional): url -> "algorithm:hexdigest", checked after download
+                and used to recognise files already on disk. Defaults to None.
+
+        Returns:
+            List[LinkDownloadResult]: One result per link, in the order given.
+        """
+        checksums = checksums or {}
+        os.makedirs(dest_dir, exist_ok=True)
+
+        # work out every target path up front, so duplicates and name clashes are settled before any I/O
+        results = []
+        jobs = {}
+        taken = {}
+        for link in links:
+            if link.url in jobs:
+                results.append((link.url, None))
+                continue
+            path = link.save_path(dest_dir)
+            if taken.get(path, link.url) != link.url:
+                name = hashlib.sha1(link.url.encode()).hexdigest()[:8] + '_' + os.path.basename(path)
+                path = os.path.join(dest_dir, name)
+            taken[path] = link.url
+            jobs[link.url] = path
+            results.append((link.url, path))
+
+        queues = {}                                 # host -> (url, path) not started yet
+        for url, path in jobs.items():
+            queues.setdefault(urlparse(url).netloc, deque()).append((url, path))
+        active = dict.fromkeys(queues, 0)           # host -> downloads running
+        running = {}
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while queues or running:
+                # only hand a worker a link whose host has a free slot, so no worker sits blocked
+                # on a busy host while links for other hosts wait
+                for host in list(queues):
+                    queue = queues[host]
+                    while queue and active[host] < self.per_host and len(running) < self.concurrency:
+                        url, path = queue.popleft()
+                        running[executor.submit(self._fetch, url, path, checksums.get(url))] = (host, url)
+                        active[host] += 1
+                    if not queue:
+                        del queues[host]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, url = running.pop(future)
+                    active[host] -= 1
+                    outcomes[url] = future.result()
+
+        report = []
+        for url, path in results:
+            result = outcomes[url]
+            if path is None:
+                result = LinkDownloadResult(url, result.path, LinkDownloadResult.DUPLICATE, result.size)
+            report.append(result)
+        return report
+
+    def _fetch(self, url: str, path: str, checksum: Optional[str]) -> LinkDownloadResult:
+        try:
+            if os.path.exists(path) and self._matches(url, path, checksum):
+                return LinkDownloadResult(url, path, LinkDownloadResult.EXISTS, os.path.getsize(path))
+
+            part_path = path + '.part'
+            size = self._rest_adapter.download(url, part_path, chunk_size=self.chunk_size,
+                                               resume=True, checksum=checksum)
+            os.replace(part_path, path)
+            return LinkDownloadResult(url, path, LinkDownloadResult.DOWNLOADED, size)
+        except (DiscuitAPIException, OSError) as e:
+            return LinkDownloadResult(url, path, LinkDownloadResult.FAILED, error=str(e))
+
+    def _matches(self, url: str, path: str, checksum: Optional[str]) -> bool:
+        """Whether the file at path is already the one at url, by hash if known, else by size.
+
+        Raises:
+            DiscuitAPIException: The checksum's algorithm isn't known.
+        """
+        if checksum:
+            algorithm, _, expected = checksum.partition(':')
+            try:
+                hasher = hashlib.new(algorithm)
+            except ValueError as e:
+                raise DiscuitAPIException(f"Unknown checksum algorithm '{algorithm}'") from e
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    hasher.update(chunk)
+            return hasher.hexdigest() == expected.lower()
+        try:
+            return self._rest_adapter.content_length(url) == os.path.getsize(path)
+        except DiscuitAPIException:
+            # can't tell without the HEAD request, download it again
+            return False
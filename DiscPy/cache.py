@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+from .models import Result
+
+# endpoints that change data without naming the resource they change
+WRITE_RELATED = {
+    '_postVote' : 'posts',
+    '_commentVote' : 'posts'
+}
+
+# community and user data barely changes, so it is served from cache for a while
+DEFAULT_TTLS = {
+    'communities' : 300.0,
+    'users' : 60.0
+}
+
+def cache_key(endpoint: str, ep_params: Dict = None) -> str:
+    """Cache key of a GET request, i.e. its endpoint plus sorted query string."""
+    if not ep_params:
+        return endpoint
+    params = sorted((key, value) for key, value in ep_params.items() if value is not None)
+    return f"{endpoint}?{urlencode(params)}" if params else endpoint
+
+def _written(endpoint: str) -> Tuple[str, str]:
+    """(collection, resource) a write to endpoint changes, e.g. ('posts', 'posts/{id}')."""
+    endpoint = WRITE_RELATED.get(endpoint, endpoint)
+    segments = endpoint.strip('/').split('/')
+    return segments[0], '/'.join(segments[:2])
+
+
+class CacheEntry:
+    def __init__(self, status_code: int, message: str, data, etag: str = None,
+                 last_modified: str = None, expires_at: float = 0.0):
+        """A cached GET response, with the validators needed to revalidate it.
+
+        Args:
+            status_code (int): Status code of the cached response.
+            message (str): Reason phrase of the cached response.
+            data: The decoded JSON body.
+            etag (str, optional): ETag header of the response. Defaults to None.
+            last_modified (str, optional): Last-Modified header of the response. Defaults to None.
+            expires_at (float, optional): Wall clock time the entry goes stale. Defaults to 0 (already stale).
+        """
+        self.status_code = status_code
+        self.message = message
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def validators(self) -> Dict[str, str]:
+        """Headers for a conditional GET of this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_result(self) -> Result:
+        """A Result for the entry. The data is shared with the cache, so treat it as read-only."""
+        return Result(self.status_code, message=self.message, data=self.data)
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+class BaseCache:
+    def __init__(self, default_ttl: float = 0.0, ttls: Dict[str, float] = None):
+        """Shared TTL and invalidation logic of the cache backends.
+
+        Args:
+            default_ttl (float, optional): Seconds a response stays fresh when no entry in ttls
+                matches. With 0 responses are still kept, but revalidated on every use. Defaults to 0.
+            ttls (Dict[str, float], optional): Seconds fresh per endpoint prefix, longest prefix wins,
+                e.g. {'communities': 300, 'users': 60}. Defaults to DEFAULT_TTLS.
+        """
+        self.default_ttl = default_ttl
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.hits = 0                               # served without touching the network
+        self.revalidations = 0                      # served after a 304 Not Modified
+        self.misses = 0                             # had to download the response
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str):
+        """Counts a lookup: 'hit', 'revalidated' or 'miss'. Safe to call from several threads."""
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            elif outcome == 'revalidated':
+                self.revalidations += 1
+            else:
+                self.misses += 1
+
+    def ttl_for(self, endpoint: str) -> float:
+        best, best_len = self.default_ttl, -1
+        for prefix, ttl in self.ttls.items():
+            if len(prefix) > best_len and _is_under(endpoint, prefix):
+                best, best_len = ttl, len(prefix)
+        return best
+
+    def invalidate_related(self, endpoint: str) -> int:
+        """Drops cached GETs a write to endpoint may have changed.
+
+        That is every key under the written resource (the first two path segments, e.g.
+        posts/{id} for posts/{id}/comments/{comment_id}) and the collection listing it
+        belongs to (e.g. posts?communityId=...).
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        collection, resource = _written(endpoint)
+        stale = [key for key in self.keys()
+                 if _is_under(key.split('?', 1)[0], resource) or key.split('?', 1)[0] == collection]
+        for key in stale:
+            self.delete(key)
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'revalidations': self.revalidations, 'misses': self.misses}
+
+    # backend interface
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def keys(self) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        for key in self.keys():
+            self.delete(key)
+
+
+class MemoryCache(BaseCache):
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 0.0, ttls: Dict[str, float] = None):
+        """In-process cache, evicting the least recently used entry once max_entries is reached.
+
+        Args:
+            max_entries (int, optional): Most entries kept at once. Defaults to 1024.
+            default_ttl (float, optional): See BaseCache. Defaults to 0.
+            ttls (Dict[str, float], optional): See BaseCache. Defaults to DEFAULT_TTLS.
+        """
+        super().__init__(default_ttl, ttls)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+
+class DiskCache(BaseCache):
+    def __init__(self, directory: str, default_ttl: float = 0.0, ttls: Dict[str, float] = None):
+        """Cache kept as one JSON file per entry, so it survives restarts and can be shared
+        between processes. Files are replaced atomically.
+
+        Entries are filed in one subdirectory per resource (e.g. posts/{id}) and one for each
+        collection's listings, so a write only has to list and delete what it may have made
+        stale, however big the cache grows.
+
+        Args:
+            directory (str): Where to keep the entries. Created if missing.
+            default_ttl (float, optional): See BaseCache. Defaults to 0.
+            ttls (Dict[str, float], optional): See BaseCache. Defaults to DEFAULT_TTLS.
+        """
+        super().__init__(default_ttl, ttls)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _bucket(self, collection: str, item: str = None) -> str:
+        # item None is the collection's own listings (e.g. posts?communityId=...)
+        return os.path.join(self.directory, _digest(collection), '_' if item is None else _digest(item))
+
+    def _path(self, key: str) -> str:
+        segments = key.split('?', 1)[0].strip('/').split('/')
+        bucket = self._bucket(segments[0], segments[1] if len(segments) > 1 else None)
+        return os.path.join(bucket, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def _read(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        stored = self._read(self._path(key))
+        if not stored or stored.get('key') != key:
+            return None
+        return CacheEntry(**stored['entry'])
+
+    def set(self, key: str, entry: CacheEntry):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'entry': entry.to_dict()}, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def invalidate_related(self, endpoint: str) -> int:
+        """See BaseCache.invalidate_related. Only the written resource's and collection's
+        subdirectories are listed, and no entry is read.
+        """
+        collection, resource = _written(endpoint)
+        if resource == collection:
+            # a write to the collection itself, e.g. a vote, may change any entry under it
+            directories = [os.path.dirname(self._bucket(collection))]
+        else:
+            directories = [self._bucket(collection, resource.split('/')[1]), self._bucket(collection)]
+        dropped = 0
+        for directory in directories:
+            for path in self._files(directory):
+                try:
+                    os.remove(path)
+                    dropped += 1
+                except FileNotFoundError:
+                    pass
+        return dropped
+
+    def _files(self, directory: str = None) -> Iterator[str]:
+        for root, _, names in os.walk(directory or self.directory):
+            for name in names:
+                if name.endswith('.json'):
+                    yield os.path.join(root, name)
+
+    def keys(self) -> List[str]:
+        keys = []
+        for path in self._files():
+            stored = self._read(path)
+            if stored and 'key' in stored:
+                keys.append(stored['key'])
+        return keys
+
+
+def _digest(segment: str) -> str:
+    # endpoint path segments can hold anything, directory names can't
+    return hashlib.sha1(segment.encode()).hexdigest()[:16]
+
+def _is_under(endpoint: str, prefix: str) -> bool:
+    return endpoint == prefix or endpoint.startswith(prefix + '/')
@@ -0,0 +1,137 @@
+"""discpy, fetch and export Discuit data from the command line.
+
+    discpy posts --community COMMUNITY_ID --limit 100 > posts.jsonl
+    discpy comments POST_ID
+    discpy export posts posts.parquet --community COMMUNITY_ID
+    discpy --cache ~/.cache/discpy user USERNAME
+
+Listings are printed as JSON lines, with the fields the API sent. Only argparse and json are
+imported up front; the client, and the HTTP stack behind it, load once a command runs.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+from typing import Dict, List
+
+EXPORT_FORMATS = ('parquet', 'feather')
+
+
+def _api(args: argparse.Namespace):
+    from .disc_api import DiscuitAPI
+    cache = None
+    if args.cache:
+        from .cache import DiskCache
+        cache = DiskCache(args.cache)
+    return DiscuitAPI(hostname=args.host, ssl_verify=not args.no_verify, cache=cache,
+                      session_file=args.session_file)
+
+def _get(api, endpoint: str, params: Dict = None):
+    return api._rest_adapter.get(endpoint=endpoint, ep_params=params).data
+
+def _print(items) -> int:
+    count = 0
+    for item in items:
+        sys.stdout.write(json.dumps(item, separators=(',', ':')) + '\n')
+        count += 1
+    return count
+
+
+def cmd_post(api, args) -> int:
+    return _print([_get(api, f'posts/{args.post_id}')])
+
+def cmd_posts(api, args) -> int:
+    posts = api.iter_posts(community_id=args.community, sort=args.sort)
+    return _print(post.to_dict() for post in itertools.islice(posts, args.limit))
+
+def cmd_comments(api, args) -> int:
+    comments = api.iter_comments(args.post_id)
+    return _print(comment.to_dict() for comment in itertools.islice(comments, args.limit))
+
+def cmd_communities(api, args) -> int:
+    return _print(_get(api, 'communities'))
+
+def cmd_user(api, args) -> int:
+    return _print([_get(api, f'users/{args.username}')])
+
+def cmd_export(api, args) -> int:
+    from .export import write_feather, write_parquet
+    if args.kind == 'posts':
+        source = api.iter_posts(community_id=args.community)
+    elif args.post:
+        source = api.iter_comments(args.post)
+    else:
+        raise SystemExit("discpy export comments: --post is required")
+    # iter_posts' own limit is the page size, not a total
+    source = itertools.islice(source, args.limit)
+    file_format = args.format or ('feather' if args.output.endswith(('.feather', '.arrow')) else 'parquet')
+    write = write_parquet if file_format == 'parquet' else write_feather
+    rows = write(source, args.output)
+    print(f"wrote {rows} {args.kind} to {args.output}", file=sys.stderr)
+    return rows
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='discpy', description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='\n'.join(__doc__.splitlines()[1:]))
+    parser.add_argument('--host', default='discuit.net/api', help='API host and path (default: %(default)s)')
+    parser.add_argument('--cache', metavar='DIR', help='cache GET responses on disk here, shared between runs')
+    parser.add_argument('--session-file', help='saved login to send with requests, see DiscuitAPI(session_file=)')
+    parser.add_argument('--no-verify', action='store_true', help="don't verify TLS certificates")
+    parser.add_argument('-v', '--verbose', action='store_true', help='log requests to stderr')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+
+    command = commands.add_parser('post', help='one post, by public ID')
+    command.add_argument('post_id')
+    command.set_defaults(run=cmd_post)
+
+    command = commands.add_parser('posts', help='posts, site-wide or in one community')
+    command.add_argument('--community', metavar='ID', help='community ID')
+    command.add_argument('--sort', help='e.g. latest, hot, activity')
+    command.add_argument('--limit', type=int, help='stop after this many posts')
+    command.set_defaults(run=cmd_posts)
+
+    command = commands.add_parser('comments', help="a post's comments, by public ID")
+    command.add_argument('post_id')
+    command.add_argument('--limit', type=int, help='stop after this many comments')
+    command.set_defaults(run=cmd_comments)
+
+    command = commands.add_parser('communities', help='every community')
+    command.set_defaults(run=cmd_communities)
+
+    command = commands.add_parser('user', help='one user, by username')
+    command.add_argument('username')
+    command.set_defaults(run=cmd_user)
+
+    command = commands.add_parser('export', help='write posts or comments to Parquet/Feather (needs DiscPy[arrow])')
+    command.add_argument('kind', choices=('posts', 'comments'))
+    command.add_argument('output', help='file to write; .feather/.arrow default to Feather, anything else Parquet')
+    command.add_argument('--community', metavar='ID', help='posts: only this community')
+    command.add_argument('--post', metavar='ID', help='comments: public ID of the post')
+    command.add_argument('--limit', type=int, help='stop after this many posts or comments')
+    command.add_argument('--format', choices=EXPORT_FORMATS)
+    command.set_defaults(run=cmd_export)
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.verbose:
+        import logging
+        logging.basicConfig(level=logging.DEBUG, stream=sys.stderr)
+
+    from .exceptions import DiscuitAPIException
+    try:
+        args.run(_api(args), args)
+    except DiscuitAPIException as e:
+        print(f"discpy: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # piped into e.g. head: stop quietly, without a second error when stdout is flushed at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
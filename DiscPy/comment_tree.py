@@ -0,0 +1,130 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from .models import Comment, Comments
+
+class CommentNode:
+    __slots__ = ('comment', 'parent', 'children')
+
+    def __init__(self, comment: Comment, parent: 'CommentNode' = None):
+        self.comment = comment                      # the Comment at this node
+        self.parent = parent                        # parent node, None for top-level comments
+        self.children = []                          # direct replies, in the order they were added
+
+    @property
+    def id(self) -> str:
+        return self.comment.id
+
+
+class CommentTree:
+    def __init__(self, post_id: str):
+        """Comments of one post as a tree, indexed by comment id.
+
+        Looking up a node and reaching its children are O(1), and adding a comment is O(1)
+        whatever order comments arrive in: replies seen before their parent wait in a
+        per-parent list until it shows up.
+
+        Args:
+            post_id (str): The post the comments belong to.
+        """
+        self.post_id = post_id
+        self.roots = []                             # top-level comment nodes
+        self._nodes = {}                            # comment id -> CommentNode
+        self._waiting = {}                          # parent id -> replies added before that parent
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, comment_id: str) -> bool:
+        return comment_id in self._nodes
+
+    def get(self, comment_id: str) -> Optional[CommentNode]:
+        return self._nodes.get(comment_id)
+
+    def children(self, comment_id: str) -> List[CommentNode]:
+        node = self._nodes.get(comment_id)
+        return node.children if node is not None else []
+
+    def add(self, comment: Comment) -> bool:
+        """Adds a comment. Returns False if it was already in the tree."""
+        if comment.id in self._nodes:
+            return False
+        node = CommentNode(comment)
+        self._nodes[comment.id] = node
+
+        if comment.parent_id is None:
+            self.roots.append(node)
+        else:
+            parent = self._nodes.get(comment.parent_id)
+            if parent is not None:
+                node.parent = parent
+                parent.children.append(node)
+            else:
+                self._waiting.setdefault(comment.parent_id, []).append(node)
+
+        for child in self._waiting.pop(comment.id, ()):
+            child.parent = node
+            node.children.append(child)
+        return True
+
+    def add_all(self, comments: Iterable[Comment]) -> int:
+        """Adds comments, returning how many were new."""
+        return sum(self.add(comment) for comment in comments)
+
+    def incomplete(self) -> List[CommentNode]:
+        """Nodes with fewer children in the tree than the API says they have direct replies."""
+        return [node for node in self._nodes.values()
+                if (node.comment.no_replies_direct or 0) > len(node.children)]
+
+    def orphans(self) -> List[CommentNode]:
+        """Replies whose parent hasn't been added (e.g. it was deleted)."""
+        return [node for nodes in self._waiting.values() for node in nodes]
+
+    def walk(self) -> Iterator[CommentNode]:
+        """Yields every node depth-first, parents before their replies, without recursion."""
+        stack = list(reversed(self.roots))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+
+def build_comment_tree(fetch_page: Callable[[Dict], Comments], post_id: str,
+                       comments: Iterable[Comment], max_workers: int = 8) -> CommentTree:
+    """Builds a CommentTree from comments, then fetches the replies that are missing.
+
+    Missing sub-threads are fetched in waves: every incomplete node in a wave is requested
+    concurrently, and the replies that come back can make up the next wave. Each node is
+    only asked for once, so a reply count the server can't satisfy doesn't loop forever.
+
+    Args:
+        fetch_page (Callable[[Dict], Comments]): Fetches one page of a post's comments for the given params.
+        post_id (str): The post the comments belong to.
+        comments (Iterable[Comment]): The post's comments from the normal listing.
+        max_workers (int, optional): Sub-thread requests running at once. Defaults to 8.
+
+    Returns:
+        CommentTree: The tree.
+    """
+    tree = CommentTree(post_id)
+    tree.add_all(comments)
+
+    def fetch_replies(parent_id: str) -> List[Comment]:
+        replies = []
+        params = {'parentId': parent_id}
+        while True:
+            page = fetch_page(params)
+            replies.extend(page.comments)
+            if not page.next or not page.comments:
+                return replies
+            params = {'parentId': parent_id, 'next': page.next}
+
+    exhausted = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            wave = [node.id for node in tree.incomplete() if node.id not in exhausted]
+            if not wave:
+                break
+            exhausted.update(wave)
+            for replies in executor.map(fetch_replies, wave):
+                tree.add_all(replies)
+    return tree
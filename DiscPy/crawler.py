@@ -0,0 +1,261 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from .disc_api import DiscuitAPI
+from .models import Posts
+from .rate_limiter import SharedRateLimiter
+from .sync import (COMMENT_COLUMNS, POST_COLUMNS, STATE_COLUMNS, SyncStore, _ID, _PUBLIC_ID, _upsert_sql,
+                   comment_row, post_row)
+
+CRAWL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_queue (
+    post_id TEXT PRIMARY KEY,
+    public_id TEXT NOT NULL,
+    community_id TEXT
+);
+"""
+
+_COMMUNITY_ID = POST_COLUMNS.index('community_id')
+
+
+class CrawlStore(SyncStore):
+    def __init__(self, path: str = 'discuit.db'):
+        """SyncStore that also keeps the crawler's queue of posts whose comments are still to
+        be fetched. Each page of results is written in one transaction with the sync state and
+        queue changes it implies, so the file is always a consistent checkpoint.
+
+        Args:
+            path (str, optional): Database file. Defaults to 'discuit.db'.
+        """
+        super().__init__(path)
+        self._conn.executescript(CRAWL_SCHEMA)
+
+    def pending_comments(self) -> List[Tuple[str, str]]:
+        """(post id, public id) of every post whose comments are queued."""
+        return [(row['post_id'], row['public_id'])
+                for row in self._conn.execute("SELECT post_id, public_id FROM crawl_queue ORDER BY rowid")]
+
+    def save_posts_page(self, state: Dict, rows: List[tuple], next_cursor: Optional[str],
+                        queue_comments: bool = True) -> List[Tuple[str, str]]:
+        """Stores a page of post rows from a community's backfill and moves its cursor on.
+
+        The state moves on the same way as a SyncEngine's (see SyncStore.track_posts), and posts
+        with comments the store doesn't have yet (their comment count changed) are queued.
+
+        Args:
+            state (Dict): The community's sync state, see SyncStore.get_state. Updated in place.
+            rows (List[tuple]): Post rows, see sync.post_row.
+            next_cursor (Optional[str]): Posts.next of the page; None when it was the last.
+            queue_comments (bool, optional): Queue posts for comment fetching. Defaults to True.
+
+        Returns:
+            List[Tuple[str, str]]: (post id, public id) of the posts queued.
+        """
+        queued = [(row[_ID], row[_PUBLIC_ID], row[_COMMUNITY_ID])
+                  for row in self.track_posts(state, rows, queue_comments)]
+        state['backfill_cursor'] = next_cursor if rows else None
+        if not state['backfill_cursor']:
+            state['backfill_done'] = 1
+        state['synced_at'] = time.time()
+
+        with self._conn:
+            self._conn.executemany(_upsert_sql('posts', POST_COLUMNS, 'id'), rows)
+            self._conn.executemany("INSERT OR IGNORE INTO crawl_queue (post_id, public_id, community_id) "
+                                   "VALUES (?, ?, ?)", queued)
+            self._conn.execute(_upsert_sql('sync_state', STATE_COLUMNS, 'community_id'),
+                               tuple(state[column] for column in STATE_COLUMNS))
+        return [(post_id, public_id) for post_id, public_id, _ in queued]
+
+    def save_comments(self, post_id: str, rows: List[tuple]) -> int:
+        """Stores every comment row of a post and takes the post off the queue."""
+        with self._conn:
+            self._conn.executemany(_upsert_sql('comments', COMMENT_COLUMNS, 'id'), rows)
+            self._conn.execute("DELETE FROM crawl_queue WHERE post_id = ?", (post_id,))
+        return len(rows)
+
+
+# the worker process's client, made once by _start_worker
+_api = None
+
+def _start_worker(api_factory: Callable[..., DiscuitAPI], api_kwargs: Dict, rate_limiter: SharedRateLimiter):
+    global _api
+    _api = api_factory(rate_limiter=rate_limiter, **api_kwargs)
+
+def _fetch_posts(community_id: str, cursor: Optional[str],
+                 page_limit: Optional[int]) -> Tuple[List[tuple], Optional[str]]:
+    # decoding and model building happen here, in the worker; only plain rows go back
+    params = {
+        "communityId" : community_id,
+        "sort" : "latest",
+        "limit" : page_limit,
+        "next" : cursor
+    }
+    params = {key: value for key, value in params.items() if value is not None}
+    page = _api._get_model('posts', Posts, ep_params=params)
+    return [post_row(post) for post in page.posts], page.next
+
+def _fetch_comments(public_id: str) -> List[tuple]:
+    return [comment_row(comment) for comment in _api.iter_comments(public_id)]
+
+
+class CrawlReport:
+    def __init__(self):
+        self.communities = 0                        # communities whose backfill finished
+        self.posts = 0                              # posts written
+        self.comments = 0                           # comments written
+        self.pages = 0                              # post pages fetched
+        self.failed = []                            # (task, error message) of tasks that raised
+
+    def __repr__(self):
+        return (f"CrawlReport(communities={self.communities}, posts={self.posts}, comments={self.comments}, "
+                f"pages={self.pages}, failed={len(self.failed)})")
+
+
+class Crawler:
+    def __init__(self, store: Union[str, CrawlStore] = 'discuit.db', processes: int = None,
+                 read_rate: float = 20.0, rate_limiter: SharedRateLimiter = None, page_limit: int = None,
+                 comments: bool = True, api_factory: Callable[..., DiscuitAPI] = None, api_kwargs: Dict = None,
+                 start_method: str = 'spawn', logger: logging.Logger = None):
+        """Backfills whole communities (posts, then their comments) with a pool of processes, so
+        JSON decoding and model building aren't held to one core by the GIL.
+
+        Work is sharded by page: a community's next page of posts is one task, and fetching the
+        comments of one post is another, so many communities and posts are in flight at once.
+        Each process has its own client, and all of them draw from one SharedRateLimiter.
+        Workers send back plain rows, which the parent merges into a single CrawlStore, one
+        transaction per task with the cursor and comment queue it implies. A killed run picks
+        up from the last page written, and the file is a normal SyncStore, so a SyncEngine can
+        keep it up to date afterwards.
+
+        With the 'spawn' start method, the script running the crawler needs the usual
+        if __name__ == '__main__': guard.
+
+        Args:
+            store (Union[str, CrawlStore], optional): Database file, or a CrawlStore. Defaults to 'discuit.db'.
+            processes (int, optional): Worker processes. Defaults to os.cpu_count().
+            read_rate (float, optional): GET requests per second, across every process. Ignored if
+                rate_limiter is given. Defaults to 20.
+            rate_limiter (SharedRateLimiter, optional): Budget to share, made with the same start
+                method. Defaults to a SharedRateLimiter(read_rate).
+            page_limit (int, optional): Posts requested per page. Defaults to None (server default).
+            comments (bool, optional): Also fetch the comments of new/changed posts. Defaults to True.
+            api_factory (Callable[..., DiscuitAPI], optional): Makes each process's client; called with
+                rate_limiter= and api_kwargs. Must be picklable (a module-level function or class).
+                Defaults to DiscuitAPI.
+            api_kwargs (Dict, optional): More keyword arguments for api_factory, e.g. {'hostname': ...}.
+                Defaults to None.
+            start_method (str, optional): multiprocessing start method. Defaults to 'spawn'.
+            logger (logging.Logger, optional): Defaults to this module's logger.
+
+        Raises:
+            ValueError: processes is below 1.
+        """
+        processes = processes or os.cpu_count() or 1
+        if processes < 1:
+            raise ValueError("processes must be at least 1")
+        self.store = store if isinstance(store, CrawlStore) else CrawlStore(store)
+        self.processes = processes
+        self.page_limit = page_limit
+        self.comments = comments
+        self._context = multiprocessing.get_context(start_method)
+        self.rate_limiter = rate_limiter or SharedRateLimiter(read_rate=read_rate, context=self._context)
+        self._api_factory = api_factory or DiscuitAPI
+        self._api_kwargs = api_kwargs or {}
+        self._logger = logger or logging.getLogger(__name__)
+
+    def run(self, community_ids: Iterable[str] = None, max_pages: int = None) -> CrawlReport:
+        """Crawls communities until their backfills finish and the comment queue is empty.
+
+        Communities already backfilled are skipped; use a SyncEngine to catch them up. Comments
+        still queued from an earlier run are fetched whichever communities are given.
+
+        Args:
+            community_ids (Iterable[str], optional): Communities to crawl. Defaults to None (every
+                community, which are stored too).
+            max_pages (int, optional): Post pages per community in this run; the backfill carries on
+                from there next time. Defaults to None (no limit).
+
+        Returns:
+            CrawlReport: What was written, and which tasks failed.
+        """
+        if community_ids is None:
+            api = self._api_factory(rate_limiter=self.rate_limiter, **self._api_kwargs)
+            communities = api.get_communites()
+            self.store.upsert_communities(communities)
+            community_ids = [community.id for community in communities]
+
+        report = CrawlReport()
+        states = {community_id: self.store.get_state(community_id) for community_id in community_ids}
+        pages = dict.fromkeys(states, 0)
+        tasks = deque(('posts', community_id) for community_id, state in states.items()
+                      if not state['backfill_done'])
+        if self.comments:
+            tasks.extend(('comments', post_id, public_id) for post_id, public_id in self.store.pending_comments())
+
+        executor = ProcessPoolExecutor(self.processes, mp_context=self._context, initializer=_start_worker,
+                                       initargs=(self._api_factory, self._api_kwargs, self.rate_limiter))
+        running = {}
+        try:
+            while tasks or running:
+                # a couple of tasks per process, so none sits idle while the parent writes
+                while tasks and len(running) < self.processes * 2:
+                    task = tasks.popleft()
+                    running[self._submit(executor, task, states)] = task
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # the client already retried; leave the cursor/queue entry for the next run
+                        self._logger.warning("Crawl task %s failed: %s", task, e)
+                        report.failed.append((task, str(e)))
+                        continue
+                    self._save(task, result, states, pages, tasks, report, max_pages)
+        finally:
+            # shutdown(cancel_futures=True) needs Python 3.9
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=True)
+        self._logger.debug("%r", report)
+        return report
+
+    def _submit(self, executor: ProcessPoolExecutor, task: tuple, states: Dict[str, Dict]):
+        if task[0] == 'posts':
+            return executor.submit(_fetch_posts, task[1], states[task[1]]['backfill_cursor'], self.page_limit)
+        return executor.submit(_fetch_comments, task[2])
+
+    def _save(self, task: tuple, result: Any, states: Dict[str, Dict], pages: Dict[str, int], tasks: deque,
+              report: CrawlReport, max_pages: Optional[int]):
+        if task[0] == 'comments':
+            report.comments += self.store.save_comments(task[1], result)
+            return
+
+        community_id = task[1]
+        rows, next_cursor = result
+        state = states[community_id]
+        queued = self.store.save_posts_page(state, rows, next_cursor, self.comments)
+        report.pages += 1
+        report.posts += len(rows)
+        pages[community_id] += 1
+        # comments first, so the queue (and the work a killed run redoes) stays short
+        tasks.extendleft(('comments', post_id, public_id) for post_id, public_id in queued)
+        if state['backfill_done']:
+            report.communities += 1
+        elif max_pages is None or pages[community_id] < max_pages:
+            tasks.append(task)
+
+
+def crawl(store: Union[str, CrawlStore] = 'discuit.db', community_ids: Iterable[str] = None,
+          processes: int = None, read_rate: float = 20.0, **kwargs) -> CrawlReport:
+    """Shorthand for Crawler(store, processes, read_rate, **kwargs).run(community_ids)."""
+    crawler = Crawler(store, processes=processes, read_rate=read_rate, **kwargs)
+    try:
+        return crawler.run(community_ids)
+    finally:
+        if crawler.store is not store:
+            crawler.store.close()
@@ -0,0 +1,200 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from ._lazy import lazy_import
+from .models import Comment, Comments, Post, Posts
+
+# None when not installed; otherwise only loaded once a decoder is actually used
+orjson = lazy_import('orjson')
+msgspec = lazy_import('msgspec')
+
+class JSONDecoder:
+    name = 'json'
+    typed = False                                   # whether decode_typed can build models directly
+
+    def decode(self, content: bytes) -> Any:
+        """Decodes a JSON response body.
+
+        Raises:
+            ValueError: The body isn't valid JSON.
+        """
+        return json.loads(content)
+
+    def decode_typed(self, content: bytes, model: type) -> Optional[Any]:
+        """Decodes a response body straight into model (Post, Posts, Comment or Comments).
+
+        Returns:
+            Optional[Any]: The model object, or None if this decoder can't, and decode() should be used.
+        """
+        return None
+
+
+class OrjsonDecoder(JSONDecoder):
+    name = 'orjson'
+
+    def decode(self, content: bytes) -> Any:
+        # orjson.JSONDecodeError is a ValueError
+        return orjson.loads(content)
+
+
+class MsgspecDecoder(JSONDecoder):
+    name = 'msgspec'
+    typed = True
+
+    def __init__(self):
+        self._decoder = msgspec.json.Decoder()
+        self._typed_decoders = {}
+        self._extras = {}                           # model -> names of the extra fields seen so far
+
+    def decode(self, content: bytes) -> Any:
+        try:
+            return self._decoder.decode(content)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    def decode_typed(self, content: bytes, model: type) -> Optional[Any]:
+        """Decodes into msgspec Structs shaped like the model's constructor, then builds the
+        models from each Struct's values positionally, so no per-object dict is made.
+
+        The models come out the same as from decode(): timestamps stay strings until first
+        read, and fields the models don't name are kept. The first response with a new such
+        field is built from decode(), and the field is added to the Struct from then on; so
+        is anything else the Struct rejects (e.g. an unexpected null). None is returned when
+        the payload can't make a model, so the caller can fall back to decode().
+        """
+        decoder = self._typed_decoders.get(model)
+        if decoder is None:
+            decoder = self._typed_decoders[model] = msgspec.json.Decoder(_page_struct(model, self._extras))
+        try:
+            decoded = decoder.decode(content)
+        except msgspec.ValidationError:
+            return self._learn_extras(content, model)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+        if model is Posts:
+            return self._build(Posts, decoded, [self._build(Post, post) for post in decoded.posts or []])
+        if model is Comments:
+            return self._build(Comments, decoded,
+                               [self._build(Comment, comment) for comment in decoded.comments or []])
+        return self._build(model, decoded)
+
+    def _build(self, model: type, decoded: Any, items: List = None) -> Any:
+        values = msgspec.structs.astuple(decoded)
+        if items is not None:
+            values = (items,) + values[1:]
+        names = self._extras.get(model)
+        if not names:
+            return model(*values)
+        known = _arity(model)
+        extra = {name: value for name, value in zip(names, values[known:]) if value is not msgspec.UNSET}
+        return model(*values[:known], **extra)
+
+    def _learn_extras(self, content: bytes, model: type) -> Optional[Any]:
+        # the Struct rejected the payload: note any fields it doesn't have yet, and build this
+        # response the same way the dict path would
+        data = self.decode(content)
+        if data.__class__ is not dict:
+            return None
+        seen = {model: [data]}
+        if model is Posts:
+            seen[Post] = [post for post in data.get('posts') or [] if post.__class__ is dict]
+        elif model is Comments:
+            seen[Comment] = [comment for comment in data.get('comments') or [] if comment.__class__ is dict]
+
+        learned = False
+        for item_model, items in seen.items():
+            names = self._extras.get(item_model, ())
+            known = set(_parameter_names(item_model)) | set(names)
+            new = [key for item in items for key in item if key not in known]
+            if new:
+                self._extras[item_model] = names + tuple(dict.fromkeys(new))
+                learned = True
+        if learned:
+            self._typed_decoders.clear()
+        try:
+            return model(**data)
+        except TypeError:
+            return None
+
+
+# name -> decoder class, in the order get_decoder tries them
+DECODERS = {
+    'msgspec' : MsgspecDecoder,
+    'orjson' : OrjsonDecoder,
+    'json' : JSONDecoder
+}
+
+def available_decoders() -> List[str]:
+    """Names of the decoders whose library is installed."""
+    installed = {'msgspec': msgspec is not None, 'orjson': orjson is not None, 'json': True}
+    return [name for name in DECODERS if installed[name]]
+
+def get_decoder(name: str = None) -> JSONDecoder:
+    """Returns a decoder by name, or the best one installed: msgspec (which can also build
+    models straight from the bytes), then orjson, then stdlib json.
+
+    Args:
+        name (str, optional): One of 'msgspec', 'orjson', 'json'. Defaults to None (best available).
+
+    Raises:
+        ValueError: Unknown name, or its library isn't installed.
+    """
+    available = available_decoders()
+    if name is None:
+        return DECODERS[available[0]]()
+    if name not in DECODERS:
+        raise ValueError(f"Unknown decoder '{name}', expected one of {list(DECODERS)}")
+    if name not in available:
+        raise ValueError(f"Decoder '{name}' needs the {name} package installed")
+    return DECODERS[name]()
+
+
+# annotations the Structs keep as is (made nullable), anything else is decoded as Any; timestamps
+# stay strings, which the models parse on first access
+_SCALARS = (str, int, bool)
+_NULLABLE_SCALARS = {Optional[scalar]: Optional[scalar] for scalar in _SCALARS}
+_NULLABLE_SCALARS.update({scalar: Optional[scalar] for scalar in _SCALARS})
+_NULLABLE_SCALARS.update({datetime: Optional[str], Optional[datetime]: Optional[str]})
+_NULLABLE_SCALARS[Optional[List[str]]] = Optional[List[str]]
+
+def _parameters(model: type) -> list:
+    import inspect                                  # only msgspec's typed decoding needs it
+    return [parameter for parameter in list(inspect.signature(model.__init__).parameters.values())[1:]
+            if parameter.kind is not parameter.VAR_KEYWORD]
+
+def _parameter_names(model: type) -> List[str]:
+    return [parameter.name for parameter in _parameters(model)]
+
+def _arity(model: type) -> int:
+    arity = _ARITY.get(model)
+    if arity is None:
+        arity = _ARITY[model] = len(_parameters(model))
+    return arity
+
+_ARITY = {}
+
+def _model_struct(model: type, extras: Dict[type, tuple]) -> type:
+    """A Struct with one field per constructor parameter of model, in the same order, then one
+    per extra field seen so far. Any other field fails validation, so it can be learned.
+    """
+    fields = []
+    for parameter in _parameters(model):
+        field_type = _NULLABLE_SCALARS.get(parameter.annotation, Any)
+        if parameter.default is parameter.empty:
+            fields.append((parameter.name, field_type))
+        else:
+            fields.append((parameter.name, field_type, parameter.default))
+    fields.extend((name, Any, msgspec.UNSET) for name in extras.get(model, ()))
+    return msgspec.defstruct(model.__name__ + 'Struct', fields, forbid_unknown_fields=True)
+
+def _page_struct(model: type, extras: Dict[type, tuple]) -> type:
+    if model is Posts:
+        item, key = Post, 'posts'
+    elif model is Comments:
+        item, key = Comment, 'comments'
+    else:
+        return _model_struct(model, extras)
+    fields = [(key, Optional[List[_model_struct(item, extras)]]), ('next', Optional[str], None)]
+    fields.extend((name, Any, msgspec.UNSET) for name in extras.get(model, ()))
+    return msgspec.defstruct(model.__name__ + 'Struct', fields, forbid_unknown_fields=True)
@@ -1,15 +1,32 @@
 import logging
-from rest_adapter import RestAdapter
-from models import *
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List
+from .rest_adapter import RestAdapter
+from .rate_limiter import RateLimiter
+from .retry import RetryPolicy
+from .cache import BaseCache
+from .decoders import JSONDecoder
+from .interning import Interner
+from .instrumentation import Instrumentation
+from .transport import Transport
+from .bulk_download import BulkDownloader, LinkDownloadResult
+from .comment_tree import CommentTree, build_comment_tree
+from .batch import BatchExecutor, BatchResult
+from .models import Comment, Comments, Community, CommunityRule, Link, Post, Posts, User
 
 class DiscuitAPI:
     def __init__(self, hostname: str = 'discuit.net/api', ssl_verify: bool = True,
-                 logger: logging.Logger = None):
+                 logger: logging.Logger = None, rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, cache: BaseCache = None, decoder: JSONDecoder = None,
+                 instrumentation: Instrumentation = None, single_flight: bool = True, pool_size: int = 10,
+                 session_file: str = None, transport: Transport = None, interner: Interner = None):
         
-        self._rest_adapter = RestAdapter(hostname, ssl_verify, logger)
+        self._rest_adapter = RestAdapter(hostname, ssl_verify, logger, rate_limiter, retry_policy, cache, decoder,
+                                         instrumentation, single_flight, pool_size, session_file, transport)
+        self.interner = interner                    # maps fetched models to one object per entity, if set
 
-    def authenticate(self, username:str, password:str):
-        result = self._rest_adapter.authenticate(username,password)
+    def authenticate(self, username:str, password:str, force: bool = False):
+        result = self._rest_adapter.authenticate(username, password, force)
         return result
     
     def get_all_posts(self) -> Posts:
@@ -18,8 +35,7 @@ class DiscuitAPI:
         Returns:
             Posts: A list of Post objects.
         """
-        result = self._rest_adapter.get(endpoint='posts')
-        posts = Posts(**result.data)
+        posts = self._get_model('posts', Posts)
         return posts
     
     def get_community_posts(self, community_id: str) -> Posts:
@@ -35,8 +51,7 @@ class DiscuitAPI:
             "communityId" : community_id
         }
 
-        result = self._rest_adapter.get(endpoint=f'posts', ep_params=params)
-        posts = Posts(**result.data)
+        posts = self._get_model('posts', Posts, ep_params=params)
         return posts
     
     def get_post_by_id(self, post_id: str) -> Post:
@@ -51,8 +66,7 @@ class DiscuitAPI:
         """
         # post ID should be the public ID
         # currently broken, as models are weird
-        result = self._rest_adapter.get(endpoint=f'posts/{post_id}')
-        post = Post(**result.data)
+        post = self._get_model(f'posts/{post_id}', Post)
         return post
     
     def get_post_comments(self, post_id:str) -> Comments: 
@@ -64,13 +78,135 @@ class DiscuitAPI:
         Returns:
             Comments: A list of Comment objects
         """
-        result = self._rest_adapter.get(endpoint=f'posts/{post_id}/comments')
-        comments = Comments(**result.data)
+        comments = self._get_model(f'posts/{post_id}/comments', Comments)
         return comments
 
+    def iter_posts(self, community_id: str = None, limit: int = None,
+                   sort: str = None) -> Iterator[Post]:
+        """Yields every post, site-wide or in one community, following the Posts.next cursor.
+
+        Pages are requested lazily, and the next page is fetched in the background
+        while the current one is being consumed, so only two pages are held at once.
+
+        Args:
+            community_id (str, optional): Only yield posts from this community. Defaults to None.
+            limit (int, optional): Posts requested per page. Defaults to None (server default).
+            sort (str, optional): Order, e.g. 'latest', 'hot', 'activity'. Defaults to None (server default).
+
+        Yields:
+            Post: Post objects, in the order asked for.
+        """
+        params = {
+            "communityId" : community_id,
+            "limit" : limit,
+            "sort" : sort
+        }
+        params = {key: value for key, value in params.items() if value is not None}
+        return self._iter_pages('posts', params, Posts)
+
+    def iter_comments(self, post_id: str) -> Iterator[Comment]:
+        """Yields every comment on a post, following the Comments.next cursor.
+
+        Args:
+            post_id (str): The Public ID of the post.
+
+        Yields:
+            Comment: Comment objects.
+        """
+        return self._iter_pages(f'posts/{post_id}/comments', {}, Comments)
+
+    def get_comment_tree(self, post_id: str, max_workers: int = 8) -> CommentTree:
+        """Gets every comment on a post, including replies left out of the listing, as a tree.
+
+        Missing sub-threads (comments with more direct replies than were returned) are
+        fetched concurrently, by parent comment.
+
+        Args:
+            post_id (str): The Public ID of the post.
+            max_workers (int, optional): Sub-thread requests running at once. Defaults to 8.
+
+        Returns:
+            CommentTree: Tree indexed by comment id, see comment_tree.CommentTree.
+        """
+        endpoint = f'posts/{post_id}/comments'
+        fetch_page = lambda params: self._get_model(endpoint, Comments, ep_params=params)
+        return build_comment_tree(fetch_page, post_id, self.iter_comments(post_id), max_workers)
+
+    def _iter_pages(self, endpoint: str, params: Dict, page_model: type) -> Iterator:
+        """Generator behind iter_posts/iter_comments. Keeps one page request in flight
+        on a worker thread while the caller works through the current page.
+        """
+        def fetch(cursor):
+            page_params = dict(params, next=cursor) if cursor else params
+            return self._get_model(endpoint, page_model, ep_params=page_params or None)
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            pending = executor.submit(fetch, None)
+            while pending is not None:
+                page = pending.result()
+                items = page.posts if page_model is Posts else page.comments
+                cursor = page.next
+                # start on the next page before handing out this one
+                pending = executor.submit(fetch, cursor) if cursor and items else None
+                for item in items:
+                    yield item
+        finally:
+            executor.shutdown(wait=False)
+
+    def _get_model(self, endpoint: str, model: type, ep_params: Dict = None):
+        """GETs endpoint and builds model from the response, decoding straight into the model
+        when the adapter's decoder supports it.
+        """
+        result = self._rest_adapter.get(endpoint=endpoint, ep_params=ep_params, typed=model)
+        obj = result.data if isinstance(result.data, model) else model(**result.data)
+        return self._canonical(obj)
+
+    def _canonical(self, obj):
+        return obj if self.interner is None else self.interner.canonical(obj)
+
+    def _canonical_all(self, objects: List) -> List:
+        return objects if self.interner is None else self.interner.canonical_all(objects)
+
     def fetch_link_data(self, link: Link):
         link.data = self._rest_adapter.fetch_data(url=link.url)
 
+    def download_link(self, link: Link, path: str = './', file_name: str = '', resume: bool = True,
+                      checksum: str = None, progress: Callable[[int, int], None] = None) -> str:
+        """Streams a link's contents straight to disk, without filling link.data.
+
+        Args:
+            link (Link): The link to download, e.g. post.link.
+            path (str, optional): Directory to save in. Defaults to './'.
+            file_name (str, optional): Name to save as. Defaults to the last part of the URL.
+            resume (bool, optional): Continue a partial file from an earlier attempt. Defaults to True.
+            checksum (str, optional): Expected digest as "algorithm:hexdigest". Defaults to None.
+            progress (Callable[[int, int], None], optional): Called with (bytes done, total bytes). Defaults to None.
+
+        Returns:
+            str: Path of the saved file.
+        """
+        save_path = link.save_path(path, file_name)
+        self._rest_adapter.download(link.url, save_path, resume=resume, checksum=checksum, progress=progress)
+        return save_path
+
+    def fetch_links(self, links: List[Link], dest_dir: str = './', concurrency: int = 8, per_host: int = 4,
+                    checksums: Dict[str, str] = None) -> List[LinkDownloadResult]:
+        """Downloads many links to disk in parallel. See BulkDownloader.run.
+
+        Args:
+            links (List[Link]): Links to download, e.g. [post.link for post in posts if post.link].
+            dest_dir (str, optional): Directory to save in. Defaults to './'.
+            concurrency (int, optional): Downloads running at once. Defaults to 8.
+            per_host (int, optional): Downloads running at once against any single host. Defaults to 4.
+            checksums (Dict[str, str], optional): url -> "algorithm:hexdigest". Defaults to None.
+
+        Returns:
+            List[LinkDownloadResult]: One result per link, with status downloaded, exists, duplicate or failed.
+        """
+        downloader = BulkDownloader(self._rest_adapter, concurrency=concurrency, per_host=per_host)
+        return downloader.run(links, dest_dir, checksums)
+
     def get_communites(self) -> List[Community]:
         """Returns a list of all communities, sitewide
 
@@ -78,7 +214,7 @@ class DiscuitAPI:
             List[Community]: A list of community objects
         """
         results = self._rest_adapter.get(endpoint='communities')
-        communities_list = [Community(**datum) for datum in results.data]
+        communities_list = self._canonical_all([Community(**datum) for datum in results.data])
         return communities_list
 
     def get_community_by_id(self, community_id: str) -> Community:
@@ -91,7 +227,7 @@ class DiscuitAPI:
             Community: A Community object
         """
         result = self._rest_adapter.get(endpoint=f'communities/{community_id}')
-        community = Community(**result.data)
+        community = self._canonical(Community(**result.data))
         return community
 
     def get_community_rules(self, community_id: str) -> List[CommunityRule]:
@@ -117,7 +253,7 @@ class DiscuitAPI:
             List[User]: A list of user objects.
         """
         result = self._rest_adapter.get(endpoint=f"communities/{community_id}/mods")
-        mods_list = [User(**datum) for datum in result.data]
+        mods_list = self._canonical_all([User(**datum) for datum in result.data])
         return mods_list
 
     def get_user_by_username(self, username: str) -> User:
@@ -130,7 +266,7 @@ class DiscuitAPI:
             User: A User object
         """
         result = self._rest_adapter.get(endpoint=f"users/{username}")
-        user = User(**result.data)
+        user = self._canonical(User(**result.data))
         return user
 
     def get_auth_user(self):
@@ -140,7 +276,7 @@ class DiscuitAPI:
             _type_: _description_
         """
         result = self._rest_adapter.get(endpoint="_user")
-        user = User(**result.data)
+        user = self._canonical(User(**result.data))
         return user
 
     def create_post(self, type: str, title: str, community:str, 
@@ -249,6 +385,23 @@ class DiscuitAPI:
 
         return result.status_code
     
+    def batch_executor(self, max_workers: int = 8, dry_run: bool = False,
+                       on_result: Callable[[BatchResult], None] = None) -> BatchExecutor:
+        """Returns a BatchExecutor that runs many write calls on this client concurrently.
+
+            executor = api.batch_executor(max_workers=8)
+            results = executor.run([BatchAction('vote_post', post_id, True), ...])
+
+        Args:
+            max_workers (int, optional): Actions running at once. Defaults to 8.
+            dry_run (bool, optional): Only report what would run. Defaults to False.
+            on_result (Callable[[BatchResult], None], optional): Called as each action finishes. Defaults to None.
+
+        Returns:
+            BatchExecutor: Call run(actions), and cancel() to stop partway through.
+        """
+        return BatchExecutor(self, max_workers=max_workers, dry_run=dry_run, on_result=on_result)
+
     def vote_comment(self, comment_id:str, upvote:bool):
         """Votes on a comment by comment ID.
 
@@ -1,2 +1,13 @@
 class DiscuitAPIException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class DiscuitRateLimitException(DiscuitAPIException):
+    def __init__(self, message: str, retry_after: float = None):
+        """Raised when the server answers 429 Too Many Requests.
+
+        Args:
+            message (str): Error message.
+            retry_after (float, optional): Seconds the server asked us to wait, if it said. Defaults to None.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,212 @@
+import importlib
+from datetime import timezone
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from ._lazy import lazy_import
+from .exceptions import DiscuitAPIException
+from .models import Comment, Comments, Post, Posts, _to_datetime
+
+# None when not installed; otherwise only loaded once an export actually runs
+numpy = lazy_import('numpy')
+pyarrow = lazy_import('pyarrow')
+
+# column kinds
+STRING, INT, BOOL, TIMESTAMP = 'string', 'int', 'bool', 'timestamp'
+
+def _link_url(post: Post):
+    link = post._link                               # raw slot, so the Link isn't built just to read its url
+    return link.get('url') if link.__class__ is dict else getattr(link, 'url', None)
+
+def _columns(spec: Iterable[Tuple]) -> List[Tuple[str, Callable[[Any], Any], str]]:
+    # (column, attribute or getter, kind); timestamps read the raw slot, so they are parsed per column, not per object
+    return [(name, attrgetter(source) if isinstance(source, str) else source, kind) for name, source, kind in spec]
+
+POST_COLUMNS = _columns([
+    ('id', 'id', STRING), ('public_id', 'public_id', STRING), ('type', 'type', STRING),
+    ('community_id', 'community_id', STRING), ('community_name', 'community_name', STRING),
+    ('user_id', 'user_id', STRING), ('username', 'username', STRING), ('title', 'title', STRING),
+    ('body', 'body', STRING), ('link_url', _link_url, STRING), ('upvotes', 'upvotes', INT),
+    ('downvotes', 'downvotes', INT), ('hotness', 'hotness', INT), ('no_comments', 'no_comments', INT),
+    ('is_pinned', 'is_pinned', BOOL), ('locked', 'locked', BOOL), ('deleted', 'deleted', BOOL),
+    ('created_at', '_created_at', TIMESTAMP), ('edited_at', '_edited_at', TIMESTAMP),
+    ('last_activity_at', '_last_activity_at', TIMESTAMP)
+])
+
+COMMENT_COLUMNS = _columns([
+    ('id', 'id', STRING), ('post_id', 'post_id', STRING), ('post_public_id', 'post_public_id', STRING),
+    ('community_id', 'community_id', STRING), ('community_name', 'community_name', STRING),
+    ('user_id', 'user_id', STRING), ('username', 'username', STRING), ('parent_id', 'parent_id', STRING),
+    ('depth', 'depth', INT), ('no_replies', 'no_replies', INT), ('no_replies_direct', 'no_replies_direct', INT),
+    ('body', 'body', STRING), ('upvotes', 'upvotes', INT), ('downvotes', 'downvotes', INT),
+    ('post_deleted', 'post_deleted', BOOL), ('created_at', '_created_at', TIMESTAMP),
+    ('edited_at', '_edited_at', TIMESTAMP), ('deleted_at', '_deleted_at', TIMESTAMP)
+])
+
+MODEL_COLUMNS = {Post: POST_COLUMNS, Comment: COMMENT_COLUMNS}
+
+
+def _require(module, package: str):
+    if module is None:
+        raise DiscuitAPIException(f"{package} is required for this export, install it with: pip install DiscPy[arrow]")
+
+def _utc_text(value):
+    """A timestamp as naive UTC ISO text, the form both numpy and Arrow parse in bulk."""
+    if value is None:
+        return None
+    if value.__class__ is str:
+        if value.endswith('Z'):
+            return value[:-1]
+        value = _to_datetime(value)
+        if value.__class__ is str:
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+def _models(source: Iterable[Any]) -> Iterator[Any]:
+    """Flattens Posts/Comments pages (e.g. from get_community_posts) and plain models into one stream."""
+    for item in source:
+        if isinstance(item, Posts):
+            yield from item.posts or ()
+        elif isinstance(item, Comments):
+            yield from item.comments or ()
+        else:
+            yield item
+
+def _batches(source: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    batch = []
+    for obj in _models(source):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _spec_for(objects: List[Any]) -> List[Tuple[str, Callable[[Any], Any], str]]:
+    model = type(objects[0])
+    if model not in MODEL_COLUMNS:
+        raise ValueError(f"Can't export {model.__name__}, expected Post or Comment objects")
+    return MODEL_COLUMNS[model]
+
+def _raw_columns(objects: List[Any], spec) -> Dict[str, List[Any]]:
+    columns = {}
+    for name, getter, kind in spec:
+        values = [getter(obj) for obj in objects]
+        columns[name] = [_utc_text(value) for value in values] if kind == TIMESTAMP else values
+    return columns
+
+
+def to_arrow(objects: Iterable[Any]) -> 'pyarrow.RecordBatch':
+    """Converts posts or comments (or Posts/Comments pages) into an Arrow RecordBatch.
+
+    Numbers and flags get int64/bool columns, and timestamps are parsed as whole columns
+    into timestamp[us, UTC].
+
+    Raises:
+        DiscuitAPIException: pyarrow isn't installed.
+        ValueError: The objects aren't Posts or Comments.
+    """
+    _require(pyarrow, 'pyarrow')
+    objects = list(_models(objects))
+    if not objects:
+        return pyarrow.RecordBatch.from_pylist([])
+    spec = _spec_for(objects)
+    raw = _raw_columns(objects, spec)
+    arrays = []
+    for name, _, kind in spec:
+        if kind == TIMESTAMP:
+            # the API sends up to nanoseconds; parse at ns, then truncate to us
+            parsed = pyarrow.array(raw[name], pyarrow.string()).cast(pyarrow.timestamp('ns'))
+            arrays.append(parsed.cast(pyarrow.timestamp('us', tz='UTC'), safe=False))
+        else:
+            arrow_type = {STRING: pyarrow.string(), INT: pyarrow.int64(), BOOL: pyarrow.bool_()}[kind]
+            arrays.append(pyarrow.array(raw[name], arrow_type))
+    return pyarrow.RecordBatch.from_arrays(arrays, names=[name for name, _, _ in spec])
+
+def to_numpy(objects: Iterable[Any]) -> 'numpy.ndarray':
+    """Converts posts or comments (or Posts/Comments pages) into a NumPy structured array.
+
+    Strings are object fields, numbers int64 (missing values become 0), flags bool and
+    timestamps datetime64[us] in UTC (missing values are NaT).
+
+    Raises:
+        DiscuitAPIException: numpy isn't installed.
+        ValueError: The objects aren't Posts or Comments.
+    """
+    _require(numpy, 'numpy')
+    objects = list(_models(objects))
+    if not objects:
+        return numpy.zeros(0)
+    spec = _spec_for(objects)
+    raw = _raw_columns(objects, spec)
+    dtypes = {STRING: object, INT: numpy.int64, BOOL: numpy.bool_, TIMESTAMP: 'datetime64[us]'}
+    array = numpy.empty(len(objects), dtype=[(name, dtypes[kind]) for name, _, kind in spec])
+    for name, _, kind in spec:
+        values = raw[name]
+        if kind == TIMESTAMP:
+            values = numpy.array(['NaT' if value is None else value for value in values], dtype='datetime64[us]')
+        elif kind == INT:
+            values = [value or 0 for value in values]
+        elif kind == BOOL:
+            values = [bool(value) for value in values]
+        array[name] = values
+    return array
+
+
+def _write(source: Iterable[Any], open_writer: Callable, batch_size: int) -> int:
+    writer, rows = None, 0
+    try:
+        for batch in _batches(source, batch_size):
+            record_batch = to_arrow(batch)
+            if writer is None:
+                writer = open_writer(record_batch.schema)
+            writer.write_batch(record_batch)
+            rows += record_batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def write_parquet(source: Iterable[Any], path: str, row_group_size: int = 50_000, compression: str = 'zstd') -> int:
+    """Streams posts or comments into a Parquet file, one row group per row_group_size objects.
+
+    source can be a generator of pages or models (e.g. api.iter_posts()), so only one row
+    group is held in memory at a time. Nothing is written if source is empty.
+
+    Args:
+        source (Iterable[Any]): Post/Comment objects, or Posts/Comments pages.
+        path (str): File to write.
+        row_group_size (int, optional): Objects per row group. Defaults to 50,000.
+        compression (str, optional): Parquet codec. Defaults to 'zstd'.
+
+    Raises:
+        DiscuitAPIException: pyarrow isn't installed.
+
+    Returns:
+        int: Number of rows written.
+    """
+    _require(pyarrow, 'pyarrow')
+    parquet = importlib.import_module('pyarrow.parquet')
+    return _write(source, lambda schema: parquet.ParquetWriter(path, schema, compression=compression),
+                  row_group_size)
+
+def write_feather(source: Iterable[Any], path: str, batch_size: int = 50_000, compression: str = 'zstd') -> int:
+    """Streams posts or comments into a Feather (v2, Arrow IPC) file, one record batch per batch_size objects.
+
+    Args:
+        source (Iterable[Any]): Post/Comment objects, or Posts/Comments pages.
+        path (str): File to write.
+        batch_size (int, optional): Objects per record batch. Defaults to 50,000.
+        compression (str, optional): 'zstd', 'lz4' or None. Defaults to 'zstd'.
+
+    Raises:
+        DiscuitAPIException: pyarrow isn't installed.
+
+    Returns:
+        int: Number of rows written.
+    """
+    _require(pyarrow, 'pyarrow')
+    ipc = importlib.import_module('pyarrow.ipc')
+    options = ipc.IpcWriteOptions(compression=compression)
+    return _write(source, lambda schema: ipc.new_file(path, schema, options=options), batch_size)
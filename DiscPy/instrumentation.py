@@ -0,0 +1,234 @@
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# path segment after one of these is an identifier, replaced by the placeholder in templates
+ID_SEGMENTS = {
+    'posts' : '{id}',
+    'comments' : '{id}',
+    'communities' : '{id}',
+    'users' : '{username}'
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+@lru_cache(maxsize=4096)
+def endpoint_template(endpoint: str) -> str:
+    """Endpoint with its identifiers replaced, e.g. 'posts/abc123/comments' -> 'posts/{id}/comments',
+    so metrics are kept per kind of call rather than per URL.
+    """
+    segments = endpoint.strip('/').split('/')
+    for i in range(1, len(segments)):
+        placeholder = ID_SEGMENTS.get(segments[i - 1])
+        if placeholder is not None and segments[i] not in ID_SEGMENTS:
+            segments[i] = placeholder
+    return '/'.join(segments)
+
+
+class RequestInfo:
+    __slots__ = ('method', 'endpoint', 'template', 'url', 'params', 'attempt', 'status_code', 'elapsed',
+                 'request_bytes', 'response_bytes', 'error')
+
+    def __init__(self, method: str, endpoint: str, url: str, params: Dict = None, attempt: int = 1):
+        """One attempt at an API request, as passed to Instrumentation hooks."""
+        self.method = method                        # HTTP method
+        self.endpoint = endpoint                    # endpoint as called, e.g. posts/abc123
+        self.template = endpoint_template(endpoint) # endpoint with ids replaced, e.g. posts/{id}
+        self.url = url                              # full URL without params
+        self.params = params                        # query params
+        self.attempt = attempt                      # 1 for the first try, 2 for the first retry, ...
+        self.status_code = None                     # set after the response, None if it raised
+        self.elapsed = None                         # seconds from sending to the response
+        self.request_bytes = 0                      # request body size
+        self.response_bytes = 0                     # response body size
+        self.error = None                           # the exception, if the request raised
+
+    def __repr__(self):
+        return (f"RequestInfo(method={self.method!r}, template={self.template!r}, attempt={self.attempt}, "
+                f"status_code={self.status_code}, elapsed={self.elapsed})")
+
+
+class Instrumentation:
+    """Hooks a RestAdapter calls around each request. Subclass and override the ones needed.
+
+    Hooks run on the requesting thread, inline with the request, so they should be quick.
+    """
+
+    def before_request(self, info: RequestInfo):
+        """Called before each attempt is sent."""
+
+    def after_request(self, info: RequestInfo):
+        """Called after each attempt, with status_code, elapsed and sizes set, or error if it raised."""
+
+    def on_retry(self, info: RequestInfo, delay: float):
+        """Called when the attempt in info is going to be retried after delay seconds."""
+
+    def on_cache(self, method: str, endpoint: str, outcome: str):
+        """Called for each cached GET with outcome 'hit', 'revalidated' or 'miss'."""
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        """Counts of observations per bucket, Prometheus style (bucket i holds values <= bounds[i])."""
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates the q quantile (0-1) by interpolating inside its bucket. None if empty."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                if i == len(self.bounds):
+                    return lower                    # in +Inf, the best we can say is "above the last bound"
+                return lower + (self.bounds[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class MetricsCollector(Instrumentation):
+    def __init__(self, latency_buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                 size_buckets: Tuple[int, ...] = SIZE_BUCKETS, prefix: str = 'discpy'):
+        """Instrumentation that keeps latency and response size histograms and request, retry,
+        error and cache counters per endpoint template. Safe to share between threads and adapters.
+
+            metrics = MetricsCollector()
+            api = DiscuitAPI(instrumentation=metrics)
+            ...
+            print(metrics.to_prometheus())
+
+        Args:
+            latency_buckets (Tuple[float, ...], optional): Upper bounds in seconds. Defaults to LATENCY_BUCKETS.
+            size_buckets (Tuple[int, ...], optional): Upper bounds in bytes. Defaults to SIZE_BUCKETS.
+            prefix (str, optional): Metric name prefix. Defaults to 'discpy'.
+        """
+        self.latency_buckets = latency_buckets
+        self.size_buckets = size_buckets
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._latency = {}                          # (method, template) -> Histogram
+        self._sizes = {}                            # (method, template) -> Histogram
+        self._requests = {}                         # (method, template, status) -> count
+        self._retries = {}                          # (method, template, reason) -> count
+        self._errors = {}                           # (method, template, error type) -> count
+        self._cache = {}                            # (method, template, outcome) -> count
+
+    def after_request(self, info: RequestInfo):
+        key = (info.method, info.template)
+        with self._lock:
+            if info.error is not None:
+                error_key = key + (type(info.error).__name__,)
+                self._errors[error_key] = self._errors.get(error_key, 0) + 1
+                return
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = Histogram(self.latency_buckets)
+                self._sizes[key] = Histogram(self.size_buckets)
+            latency.observe(info.elapsed)
+            self._sizes[key].observe(info.response_bytes)
+            status_key = key + (str(info.status_code),)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+
+    def on_retry(self, info: RequestInfo, delay: float):
+        reason = str(info.status_code) if info.error is None else type(info.error).__name__
+        key = (info.method, info.template, reason)
+        with self._lock:
+            self._retries[key] = self._retries.get(key, 0) + 1
+
+    def on_cache(self, method: str, endpoint: str, outcome: str):
+        key = (method, endpoint_template(endpoint), outcome)
+        with self._lock:
+            self._cache[key] = self._cache.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            for counters in (self._latency, self._sizes, self._requests, self._retries, self._errors, self._cache):
+                counters.clear()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per "METHOD template": request count, p50/p95/p99 latency (estimated from the buckets),
+        mean response size, status codes, retries, errors and cache outcomes.
+        """
+        with self._lock:
+            report = {}
+            def entry(method, template):
+                return report.setdefault(f"{method} {template}", {
+                    'requests': 0, 'p50': None, 'p95': None, 'p99': None, 'mean_bytes': None,
+                    'status_codes': {}, 'retries': 0, 'errors': 0, 'cache': {}})
+
+            for (method, template), latency in self._latency.items():
+                item = entry(method, template)
+                item['requests'] = latency.count
+                item['p50'], item['p95'], item['p99'] = (latency.quantile(q) for q in (0.5, 0.95, 0.99))
+                sizes = self._sizes[(method, template)]
+                item['mean_bytes'] = sizes.sum / sizes.count
+            for (method, template, status), count in self._requests.items():
+                entry(method, template)['status_codes'][status] = count
+            for (method, template, _), count in self._retries.items():
+                entry(method, template)['retries'] += count
+            for (method, template, _), count in self._errors.items():
+                entry(method, template)['errors'] += count
+            for (method, template, outcome), count in self._cache.items():
+                entry(method, template)['cache'][outcome] = count
+            return report
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format, e.g. to serve on a /metrics endpoint."""
+        prefix = self.prefix
+        lines = []
+        with self._lock:
+            for name, help_text, histograms in (
+                    ('request_duration_seconds', 'Time from sending a request to its response, per attempt.',
+                     self._latency),
+                    ('response_size_bytes', 'Size of response bodies.', self._sizes)):
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} histogram")
+                for (method, template), histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.bounds + ('+Inf',), histogram.counts):
+                        cumulative += bucket_count
+                        labels = _labels(method=method, endpoint=template, le=bound)
+                        lines.append(f"{prefix}_{name}_bucket{labels} {cumulative}")
+                    labels = _labels(method=method, endpoint=template)
+                    lines.append(f"{prefix}_{name}_sum{labels} {histogram.sum}")
+                    lines.append(f"{prefix}_{name}_count{labels} {histogram.count}")
+
+            for name, help_text, label, counters in (
+                    ('requests_total', 'Responses received, by status code.', 'status', self._requests),
+                    ('retries_total', 'Attempts that were retried, by reason.', 'reason', self._retries),
+                    ('request_errors_total', 'Attempts that raised before a response, by error.', 'error',
+                     self._errors),
+                    ('cache_requests_total', 'Cached GETs, by outcome.', 'outcome', self._cache)):
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (method, template, value), count in sorted(counters.items()):
+                    lines.append(f"{prefix}_{name}{_labels(method=method, endpoint=template, **{label: value})} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def top_latency(self, count: int = 5, quantile: float = 0.99) -> List[Tuple[str, float]]:
+        """The count "METHOD template" with the highest estimated latency quantile, slowest first."""
+        with self._lock:
+            ranked = [(f"{method} {template}", histogram.quantile(quantile))
+                      for (method, template), histogram in self._latency.items()]
+        return sorted(ranked, key=lambda item: item[1], reverse=True)[:count]
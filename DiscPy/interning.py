@@ -0,0 +1,189 @@
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .models import Comment, Comments, Community, Post, Posts, User
+
+# per model, the string fields that repeat across objects (a handful of communities, users, types)
+INTERNED_FIELDS = {
+    Post : ('type', 'user_id', 'username', 'user_group', 'community_id', 'community_name', 'locked_by'),
+    Comment : ('post_id', 'post_public_id', 'community_id', 'community_name', 'user_id', 'username',
+               'user_group'),
+    Community : ('user_id',),
+    User : (),
+}
+
+def _all_slots(model: type) -> Tuple[str, ...]:
+    return tuple(slot for cls in reversed(model.__mro__) for slot in getattr(cls, '__slots__', ()))
+
+# model -> getter for every slot as one tuple, the signature compared between versions of an object
+_SIGNATURE = {model: attrgetter(*_all_slots(model)) for model in INTERNED_FIELDS}
+
+
+class Interner:
+    def __init__(self, max_entities: int = 100_000, max_strings: int = 50_000,
+                 on_evict: Callable[[Any], None] = None):
+        """Identity map and string table for models, so a long scrape keeps one object per
+        post, comment, community and user, and one copy of each repeated string
+        (community names, usernames, user groups, post types), however often the API sends them.
+
+        Pass one to DiscuitAPI(interner=...), or call canonical() on models yourself.
+        An object is only reused while the API keeps sending the same values for it;
+        once anything changes (votes, edits) the new object replaces it, so objects
+        already handed out are never modified behind the caller's back.
+
+        Both tables are bounded, so memory follows the number of distinct entities seen
+        recently rather than the number of references to them. The least recently seen
+        entity is evicted once max_entities is reached; the string table is emptied and
+        refilled once max_strings is reached.
+
+        Args:
+            max_entities (int, optional): Most objects kept in the identity map. Defaults to 100000.
+            max_strings (int, optional): Most distinct strings kept. Defaults to 50000.
+            on_evict (Callable[[Any], None], optional): Called with each object whose id leaves the
+                identity map (evicted, trimmed, discarded or cleared), not when a newer version of
+                the object takes its place. More can be added with add_eviction_hook. Defaults to None.
+
+        Raises:
+            ValueError: max_entities or max_strings is below 1.
+        """
+        if max_entities < 1 or max_strings < 1:
+            raise ValueError("max_entities and max_strings must be at least 1")
+        self.max_entities = max_entities
+        self.max_strings = max_strings
+        self._entities = OrderedDict()              # (model, id) -> (object, signature)
+        self._strings = {}
+        self._hooks = [on_evict] if on_evict else []
+        self._lock = threading.Lock()
+        self.hits = 0                               # an equal object was already mapped
+        self.misses = 0                             # first time the entity was seen
+        self.replaced = 0                           # entity seen before, with different values
+        self.evictions = 0                          # dropped to stay under max_entities
+
+    def add_eviction_hook(self, hook: Callable[[Any], None]):
+        """Calls hook with every object evicted from the identity map from now on,
+        e.g. to drop it from a ModelStore as well.
+        """
+        self._hooks.append(hook)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, obj: Any) -> bool:
+        return (type(obj), getattr(obj, 'id', None)) in self._entities
+
+    def get(self, model: type, object_id: str) -> Optional[Any]:
+        """The mapped object for an id, or None. Doesn't count as a use for eviction."""
+        entry = self._entities.get((model, object_id))
+        return entry[0] if entry is not None else None
+
+    def intern(self, value: Optional[str]) -> Optional[str]:
+        """The shared copy of a string. Anything that isn't a str is returned as is."""
+        if value.__class__ is not str:
+            return value
+        shared = self._strings.get(value)
+        if shared is not None:
+            return shared
+        if len(self._strings) >= self.max_strings:
+            # strings still referenced stay alive, later copies just share a new one
+            self._strings = {}
+        return self._strings.setdefault(value, value)
+
+    def canonical(self, obj: Any) -> Any:
+        """Returns the object to keep for obj: the mapped one if it holds the same values,
+        otherwise obj itself, with its repeated strings interned, now mapped in its place.
+
+        Posts and Comments pages are updated in place, each item replaced by its canonical
+        object. Objects of other types, and ones without an id, are returned unchanged.
+
+        Args:
+            obj (Any): A Post, Comment, Community or User, or a Posts or Comments page.
+
+        Returns:
+            Any: The canonical object.
+        """
+        model = type(obj)
+        if model is Posts:
+            obj.posts = [self.canonical(post) for post in obj.posts]
+            return obj
+        if model is Comments:
+            obj.comments = [self.canonical(comment) for comment in obj.comments]
+            return obj
+        fields = INTERNED_FIELDS.get(model)
+        if fields is None or getattr(obj, 'id', None) is None:
+            return obj
+
+        strings = self._strings
+        for field in fields:
+            value = getattr(obj, field)
+            if value.__class__ is str:
+                setattr(obj, field, strings.get(value) or self.intern(value))
+        signature = _SIGNATURE[model](obj)
+
+        key = (model, obj.id)
+        dropped = []
+        with self._lock:
+            entry = self._entities.get(key)
+            if entry is not None and entry[1] == signature:
+                self._entities.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is None:
+                self.misses += 1
+            else:
+                self.replaced += 1
+            self._entities[key] = (obj, signature)
+            self._entities.move_to_end(key)
+            while len(self._entities) > self.max_entities:
+                dropped.append(self._entities.popitem(last=False)[1][0])
+                self.evictions += 1
+        if model is Community:
+            self._share_mods(obj)
+        self._evicted(dropped)
+        return obj
+
+    def canonical_all(self, objects: List[Any]) -> List[Any]:
+        return [self.canonical(obj) for obj in objects]
+
+    def _share_mods(self, community: Community):
+        # mods arrive as raw dicts on every community they moderate, map them to one User each
+        mods = community._mods
+        if mods.__class__ is list and mods and mods[0].__class__ is dict:
+            users = Community.mods._convert(mods)
+            community._mods = [self.canonical(user) if user.__class__ is User else user for user in users]
+
+    def discard(self, model: type, object_id: str) -> bool:
+        """Drops one entity, e.g. after deleting it. Returns False if it wasn't mapped."""
+        with self._lock:
+            entry = self._entities.pop((model, object_id), None)
+        if entry is None:
+            return False
+        self._evicted([entry[0]])
+        return True
+
+    def trim(self, max_entities: int) -> int:
+        """Evicts the least recently seen entities until at most max_entities are left,
+        e.g. to give memory back between crawls. Returns how many were evicted.
+        """
+        dropped = []
+        with self._lock:
+            while len(self._entities) > max(max_entities, 0):
+                dropped.append(self._entities.popitem(last=False)[1][0])
+            self.evictions += len(dropped)
+        self._evicted(dropped)
+        return len(dropped)
+
+    def clear(self):
+        """Drops every entity (calling the eviction hooks) and every string."""
+        self.trim(0)
+        self._strings = {}
+
+    def _evicted(self, objects: List[Any]):
+        # outside the lock, so hooks may call back into the interner
+        for obj in objects:
+            for hook in self._hooks:
+                hook(obj)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entities': len(self._entities), 'strings': len(self._strings), 'hits': self.hits,
+                'misses': self.misses, 'replaced': self.replaced, 'evictions': self.evictions}
@@ -1,44 +1,203 @@
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime
-from exceptions import DiscuitAPIException
+from .exceptions import DiscuitAPIException
 import os
+import re
+
+class _Lazy:
+    """Attribute kept in a slot as the raw JSON value, converted on first access.
+
+    The converted value is written back to the slot, so the conversion runs once.
+    Converters return values that are already converted unchanged.
+    """
+    __slots__ = ('_name', '_convert', '_slot')
+
+    def __init__(self, convert: Callable[[Any], Any]):
+        self._convert = convert
+
+    def __set_name__(self, owner, name):
+        self._name = name
+        self._slot = owner.__dict__['_' + name]
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        raw = self._slot.__get__(obj, owner)
+        value = self._convert(raw)
+        if value is not raw:
+            self._slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self._slot.__set__(obj, value)
+
+
+# one tuple per distinct set of extra field names, shared by every model that has that set
+_EXTRA_KEYS = {}
+
+def _pack_extra(kwargs: Dict):
+    """Packs fields a model doesn't name into (field names, values), sharing the names tuple."""
+    if not kwargs:
+        return None
+    keys = tuple(kwargs)
+    return (_EXTRA_KEYS.setdefault(keys, keys), tuple(kwargs.values()))
+
+
+class _Model:
+    """Base of the API models. Models use __slots__ rather than a per-instance __dict__.
+
+    Any fields the API sends that a model doesn't name are kept in the one _extra slot
+    (None when there are none) and can still be read as normal attributes.
+    """
+    __slots__ = ('_extra',)
+    _LOCAL = ()                                     # constructor arguments the API never sends
+
+    def __getattr__(self, name):
+        # only reached when the slots/class don't have the attribute
+        if name == '_extra':
+            raise AttributeError(name)
+        extra = self._extra
+        if extra is not None and name in extra[0]:
+            return extra[1][extra[0].index(name)]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def extra_fields(self) -> Dict[str, Any]:
+        """Returns the fields the API sent that the model has no attribute for."""
+        if self._extra is None:
+            return {}
+        return dict(zip(*self._extra))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The model as the API sends it: each field under its API name (e.g. publicId), then
+        the extra fields. Timestamps and nested objects not read yet are passed on as they came.
+        """
+        data = {name: _to_json(getattr(self, slot)) for name, slot in _api_names(type(self))}
+        data.update(self.extra_fields())
+        return data
+
+
+# model -> (API name, slot) per constructor parameter
+_API_NAMES = {}
+
+def _api_names(model: type) -> List[tuple]:
+    names = _API_NAMES.get(model)
+    if names is None:
+        import inspect                              # only to_dict needs it
+        slots = {slot.lstrip('_').replace('_', '').lower(): slot
+                 for cls in model.__mro__ for slot in getattr(cls, '__slots__', ()) if slot != '_extra'}
+        names = _API_NAMES[model] = [(name, slots[name.lower()])
+                                     for name in list(inspect.signature(model.__init__).parameters)[1:]
+                                     if name.lower() in slots and name not in model._LOCAL]
+    return names
+
+def _to_json(value):
+    if isinstance(value, _Model):
+        return value.to_dict()
+    if value.__class__ is list:
+        return [_to_json(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat().replace('+00:00', 'Z')
+    return value
+
+
+_FRACTION = re.compile(r'\.(\d+)')
+
+def _to_datetime(value):
+    """Parses an RFC 3339 timestamp from the API. Anything else is returned as is."""
+    if value.__class__ is not str:
+        return value
+    text = value[:-1] + '+00:00' if value.endswith('Z') else value
+    # the API can send up to nanoseconds, older fromisoformat only takes exactly 3 or 6 digits
+    text = _FRACTION.sub(lambda match: '.' + match.group(1)[:6].ljust(6, '0'), text)
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return value
+
+def _to_model(model: type) -> Callable[[Any], Any]:
+    def convert(value):
+        if value.__class__ is not dict:
+            return value
+        try:
+            return model(**value)
+        except TypeError:
+            # the API left out a field the model needs, keep the raw dict
+            return value
+    return convert
+
+def _to_models(model: type) -> Callable[[Any], Any]:
+    convert_one = _to_model(model)
+    def convert(value):
+        if value.__class__ is not list or not value or value[0].__class__ is not dict:
+            return value
+        return [convert_one(datum) for datum in value]
+    return convert
+
+def _to_image(value):
+    if value.__class__ is not dict:
+        return value
+    if 'averageColor' in value:
+        value = dict(value)
+        value['average_color'] = value.pop('averageColor')
+    try:
+        return Image(**value)
+    except TypeError:
+        return value
 
 class Result:
-    def __init__(self, status_code: int, message: str = '', data: List[Dict] = None):
+    def __init__(self, status_code: int, message: str = '', data: List[Dict] = None, headers: Dict = None):
         """Results returned from the low-level adapter.
 
         Args:
             status_code (int): Standard HTTP status code
             message (str, optional): Human readable result. Defaults to ''.
             data (List[Dict], optional): Python list of dictionaries. Defaults to None.
+            headers (Dict, optional): Response headers. Defaults to None.
         """
         self.status_code = status_code
         self.message = str(message)
         self.data = data if data else []
+        self.headers = headers if headers is not None else {}
+
+class Link(_Model):
+    __slots__ = ('url', 'hostname', 'data')
+    _LOCAL = ('data',)
 
-class Link:
-    def __init__(self, url: str, hostname: str, data: bytes = bytes(), **kwargs):
+    def __init__(self, url: str, hostname: str, data: Optional[bytes] = None, **kwargs):
         self.url = url                              # URL of the link
         self.hostname = hostname                    # Hostname from the link
-        self.data = data
-        self.__dict__.update(kwargs)
+        self.data = data                            # Contents, only set by DiscuitAPI.fetch_link_data
+        self._extra = _pack_extra(kwargs)
+
+    def save_path(self, path: str = './', file_name: str = '') -> str:
+        '''
+        Where save_to/DiscuitAPI.download_link put the file. Defaults to the last part of the URL.
+        '''
+        save_file_name = file_name if file_name else self.url.split('/')[-1]
+        return os.path.join(path, save_file_name)
 
     def save_to(self, path:str = './', file_name: str = ''):
         '''
         This should save the link contents to file. 
+        Needs data from DiscuitAPI.fetch_link_data, use DiscuitAPI.download_link to stream
+        large files straight to disk instead.
         '''
         if not self.data:
             raise DiscuitAPIException("No data to save")
         try:
-            save_file_name = file_name if file_name else self.url.split('/')[-1]
-            save_path = os.path.join(path, save_file_name)
+            save_path = self.save_path(path, file_name)
             os.makedirs(os.path.dirname(save_path), exist_ok=True)
             with open(save_path, "wb") as f:
                 f.write(self.data)
         except Exception as e:
             raise DiscuitAPIException(str(e)) from e
 
-class Post:
+class Post(_Model):
+    __slots__ = ('id', 'type', 'public_id', 'user_id', 'username', 'user_group', 'user_deleted',
+                 'is_pinned', 'community_id', 'community_name', 'title', 'body', '_link', 'locked',
+                 'locked_by', '_locked_at', 'upvotes', 'downvotes', 'hotness', '_created_at', '_edited_at',
+                 '_last_activity_at', 'deleted', 'deleted_content', 'no_comments', 'comments', 'comments_next')
+
     def __init__(self, id: str, type: str, publicId: str, userId: str, username: str, 
                  userGroup: str, userDeleted: bool, isPinned: bool, communityId: str, 
                  communityName: str, title: str, body: Optional[str], 
@@ -59,30 +218,41 @@ class Post:
         self.community_name = communityName        # Name of community post is in
         self.title = title                          # Title of post
         self.body = body                            # Body of post. If post is a link, this will be null
-        self.link = link                            # Link submitted for post
+        self._link = link                           # Link submitted for post
         self.locked = locked                        # If the post is locked
         self.locked_by = lockedBy                  # User of who locked it
-        self.locked_at = lockedAt                  # Time/Date when it was locked
+        self._locked_at = lockedAt                 # Time/Date when it was locked
         self.upvotes = upvotes                      # Number of upvotes
         self.downvotes = downvotes                  # Number of downvotes
         self.hotness = hotness                      # Used to order by 'hot'
-        self.created_at = createdAt                # When the post was created
-        self.edited_at = editedAt                  # If it was edited, when
-        self.last_activity_at = lastActivityAt    # Time of last post activity 
+        self._created_at = createdAt               # When the post was created
+        self._edited_at = editedAt                 # If it was edited, when
+        self._last_activity_at = lastActivityAt   # Time of last post activity 
         self.deleted = deleted                      # If post has been deleted
         self.deleted_content = deletedContent      # If true, everything has been deleted
         self.no_comments = noComments              # Number of comments
         self.comments = comments                    # List of comments
         self.comments_next = commentsNext          # ID for next stack of comments
-        self.__dict__.update(kwargs)
+        self._extra = _pack_extra(kwargs)
+
+    link = _Lazy(_to_model(Link))
+    locked_at = _Lazy(_to_datetime)
+    created_at = _Lazy(_to_datetime)
+    edited_at = _Lazy(_to_datetime)
+    last_activity_at = _Lazy(_to_datetime)
+
+class Posts(_Model):
+    __slots__ = ('posts', 'next')
 
-class Posts:
     def __init__(self, posts: List[Post], next: str, **kwargs):
-        self.posts = posts                          # List of post objects
+        self.posts = [Post(**post) if post.__class__ is dict else post
+                      for post in posts or []]      # List of post objects
         self.next = next                            # ID for next set of posts
-        self.__dict__.update(kwargs)
+        self._extra = _pack_extra(kwargs)
+
+class Image(_Model):
+    __slots__ = ('mimetype', 'width', 'height', 'size', 'average_color', 'url')
 
-class Image:
     def __init__(self, mimetype: str, width: int, height: int, size: int, average_color: str, 
                  url: str, **kwargs):
         self.mimetype = mimetype                    # seems to be image/jpeg for most
@@ -91,9 +261,11 @@ class Image:
         self.size = size                            # overall image size
         self.average_color = average_color          # average colour in the image
         self.url = url                              # url of stored image
-        self.__dict__.update(kwargs)
+        self._extra = _pack_extra(kwargs)
+
+class CommunityRule(_Model):
+    __slots__ = ('id', 'rule', 'description', 'community_id', 'z_index', 'created_by', '_created_at')
 
-class CommunityRule:
     def __init__(self, id: int, rule: str, description: Optional[str], communityId: str, zIndex: int, 
                  createdBy: str, createdAt: datetime, **kwargs):
         self.id = id                                # ID of rule
@@ -102,10 +274,16 @@ class CommunityRule:
         self.community_id = communityId             # ID of community its a rule in
         self.z_index = zIndex                       # Determines rule ordering
         self.created_by = createdBy                 # User who created the rule
-        self.created_at = createdAt                 # When it was created
-        self.__dict__.update(kwargs)
+        self._created_at = createdAt                # When it was created
+        self._extra = _pack_extra(kwargs)
+
+    created_at = _Lazy(_to_datetime)
+
+class User(_Model):
+    __slots__ = ('id', 'username', 'email', '_email_confirmed_at', 'about_me', 'points', 'is_admin',
+                 'no_posts', 'no_comments', '_created_at', '_deleted_at', '_banned_at', 'is_banned',
+                 'notifications_new_count', 'modding_list')
 
-class User:
     def __init__(self, id: str, username: str, email: None, emailConfirmedAt: None, 
                  aboutMe: str, points: int, isAdmin: bool, noPosts: int, noComments: int, 
                  createdAt: datetime, deletedAt: None, bannedAt: None, isBanned: bool, 
@@ -113,44 +291,64 @@ class User:
         self.id = id                                            # User ID
         self.username = username                                # Username
         self.email = email                                      # Can be null
-        self.email_confirmed_at = emailConfirmedAt              # Can be null
+        self._email_confirmed_at = emailConfirmedAt             # Can be null
         self.about_me = aboutMe                                 # About me description
         self.points = points                                    # Points?
         self.is_admin = isAdmin                                 # If the User is a site admin
         self.no_posts = noPosts                                 # Number of posts made by user
         self.no_comments = noComments                           # Number of comments made by user
-        self.created_at = createdAt                             # Datetime when the account was created
-        self.deleted_at = deletedAt                             # Datetime when it was deleted
-        self.banned_at = bannedAt                               # Datetime when it was banned
+        self._created_at = createdAt                            # Datetime when the account was created
+        self._deleted_at = deletedAt                            # Datetime when it was deleted
+        self._banned_at = bannedAt                              # Datetime when it was banned
         self.is_banned = isBanned                               # If the user is banned
         self.notifications_new_count = notificationsNewCount    # Number of new notifications user has
         self.modding_list = moddingList                         # List of communities the user mods
-        self.__dict__.update(**kwargs)
+        self._extra = _pack_extra(kwargs)
 
+    email_confirmed_at = _Lazy(_to_datetime)
+    created_at = _Lazy(_to_datetime)
+    deleted_at = _Lazy(_to_datetime)
+    banned_at = _Lazy(_to_datetime)
+
+
+class Community(_Model):
+    __slots__ = ('id', 'user_id', 'name', 'nsfw', 'about', 'no_members', '_pro_pic', '_banner_image',
+                 '_created_at', '_deleted_at', 'user_joined', 'user_mod', '_mods', '_rules', 'reports_details')
 
-class Community:
     def __init__(self, id: str, userId: str, name: str, nsfw: bool, about: str, noMembers: int, 
                  proPic: Image, bannerImage: Dict, createdAt: datetime, deletedAt: Optional[datetime], 
                  userJoined: Optional[bool], userMod: Optional[bool], mods: Optional[List[User]], 
-                 rules: Optional[List[CommunityRule]], ReportsDetails: List[Dict], **kwargs):
+                 rules: Optional[List[CommunityRule]], ReportsDetails: List[Dict] = None, **kwargs):
         self.id = id                                # Community ID
         self.user_id = userId                       # ID of user who created community
         self.name = name                            # Community name (i.e., formula1, chess)
         self.nsfw = nsfw                            # If community is NSFW
         self.about = about                          # Description of communiity
         self.no_members = noMembers                 # How many users have joined
-        self.pro_pic = proPic                       # Image object of the photo
-        self.banner_image = bannerImage             # Image object
-        self.created_at = createdAt                 # Datetime the community was created
-        self.deleted_at = deletedAt                 # Datetime it was deleted
+        self._pro_pic = proPic                      # Image object of the photo
+        self._banner_image = bannerImage            # Image object
+        self._created_at = createdAt                # Datetime the community was created
+        self._deleted_at = deletedAt                # Datetime it was deleted
         self.user_joined = userJoined               # If the current AUTH user is subbed
         self.user_mod = userMod                     # If the current auth user is a mod
-        self.mods = mods                            # List of users who are mods
-        self.rules = rules                          # List of CommunityRules
+        self._mods = mods                           # List of users who are mods
+        self._rules = rules                         # List of CommunityRules
         self.reports_details = ReportsDetails       # List of reports to the community
-        self.__dict__.update(kwargs)
+        self._extra = _pack_extra(kwargs)
+
+    pro_pic = _Lazy(_to_image)
+    banner_image = _Lazy(_to_image)
+    created_at = _Lazy(_to_datetime)
+    deleted_at = _Lazy(_to_datetime)
+    mods = _Lazy(_to_models(User))
+    rules = _Lazy(_to_models(CommunityRule))
+
+class Comment(_Model):
+    __slots__ = ('id', 'post_id', 'post_public_id', 'community_id', 'community_name', 'user_id', 'username',
+                 'user_group', 'user_deleted', 'parent_id', 'depth', 'no_replies', 'no_replies_direct',
+                 'ancestors', 'body', 'upvotes', 'downvotes', '_created_at', '_edited_at', '_deleted_at',
+                 'user_voted', 'user_voted_up', 'post_deleted')
 
-class Comment:
     def __init__(self, id: str, postId: str, postPublicId: str, communityId: str, 
                  communityName: str, userId: str, username: str, userGroup: str, 
                  userDeleted: bool, parentId: Optional[str], depth: int, noReplies: int, 
@@ -175,19 +373,24 @@ class Comment:
         self.body = body                            # Comment body
         self.upvotes = upvotes                      # Number of up
         self.downvotes = downvotes                  # Number of down
-        self.created_at = createdAt                # Datetime it was created
-        self.edited_at = editedAt                  # Datetime edited, can be null
-        self.deleted_at = deletedAt                # Datetime deleted, can be null
+        self._created_at = createdAt               # Datetime it was created
+        self._edited_at = editedAt                 # Datetime edited, can be null
+        self._deleted_at = deletedAt               # Datetime deleted, can be null
         self.user_voted = userVoted                # If currently auth'd user voted 
         self.user_voted_up = userVotedUp          # If auth user voteed up
         self.post_deleted = postDeleted            # If the post the comment is on is delted
-        self.__dict__.update(kwargs)
+        self._extra = _pack_extra(kwargs)
+
+    created_at = _Lazy(_to_datetime)
+    edited_at = _Lazy(_to_datetime)
+    deleted_at = _Lazy(_to_datetime)
 
 
-class Comments:
-    comments: List[Comment]
-    next: None
+class Comments(_Model):
+    __slots__ = ('comments', 'next')
 
-    def __init__(self, comments: List[Comment], next: None) -> None:
-        self.comments = comments
+    def __init__(self, comments: List[Comment], next: None, **kwargs) -> None:
+        self.comments = [Comment(**comment) if comment.__class__ is dict else comment
+                         for comment in comments or []]
         self.next = next
+        self._extra = _pack_extra(kwargs)
@@ -0,0 +1,273 @@
+import heapq
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+def _timestamp(value) -> Optional[float]:
+    return value.timestamp() if isinstance(value, datetime) else value
+
+def _field(name: str) -> Callable[[Any], Any]:
+    return lambda obj: getattr(obj, name, None)
+
+def _score(obj) -> Optional[int]:
+    upvotes, downvotes = getattr(obj, 'upvotes', None), getattr(obj, 'downvotes', None)
+    return None if upvotes is None or downvotes is None else upvotes - downvotes
+
+# equality lookups, value -> ids
+HASH_INDEXES = ('community_id', 'community_name', 'user_id', 'username', 'post_id')
+
+# ordered lookups, name -> sort key of an object (None keeps it out of the index)
+SORTED_INDEXES = {
+    'created_at' : lambda obj: _timestamp(getattr(obj, 'created_at', None)),
+    'last_activity_at' : lambda obj: _timestamp(getattr(obj, 'last_activity_at', None)),
+    'hotness' : _field('hotness'),
+    'upvotes' : _field('upvotes'),
+    'downvotes' : _field('downvotes'),
+    'score' : _score
+}
+
+# pending additions merged into a built sorted index one by one; more than this and it is re-sorted
+_INSORT_LIMIT = 1024
+
+
+class _SortedIndex:
+    __slots__ = ('key', 'keys', 'ids', 'pending', 'stale')
+
+    def __init__(self, key: Callable[[Any], Any]):
+        self.key = key                              # object -> sort key
+        self.keys = []                              # sort keys, ascending
+        self.ids = []                               # object ids, parallel to keys
+        self.pending = []                           # (key, id) added since the last refresh
+        self.stale = True                           # needs a full rebuild (e.g. after a removal)
+
+    def bounds(self, low, high) -> Tuple[int, int]:
+        """Slice of keys with low <= key < high. Either bound can be None (open)."""
+        start = 0 if low is None else bisect_left(self.keys, low)
+        stop = len(self.keys) if high is None else bisect_left(self.keys, high)
+        return start, max(start, stop)
+
+
+class ModelStore:
+    def __init__(self, objects: Iterable[Any] = None):
+        """In-process store of models (Post, Comment, ...) with secondary indexes, queried with query().
+
+        Objects are kept by id. community_id, community_name, user_id, username and post_id get hash
+        indexes; created_at, last_activity_at, hotness, upvotes, downvotes and score (upvotes - downvotes)
+        get sorted indexes, so equality, range and top-k queries don't scan every object.
+        Sorted indexes are brought up to date on the next query after objects change, so adding
+        many objects then querying costs one sort per index rather than one insert each.
+
+        Args:
+            objects (Iterable[Any], optional): Objects to add. Defaults to None.
+        """
+        self._objects = {}                          # id -> object
+        self._hash = {field: {} for field in HASH_INDEXES}
+        self._sorted = {name: _SortedIndex(key) for name, key in SORTED_INDEXES.items()}
+        if objects is not None:
+            self.add_all(objects)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __contains__(self, object_id: str) -> bool:
+        return object_id in self._objects
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._objects.values())
+
+    def get(self, object_id: str) -> Optional[Any]:
+        return self._objects.get(object_id)
+
+    def add(self, obj: Any):
+        """Adds obj, replacing any object with the same id."""
+        if obj.id in self._objects:
+            self.remove(obj.id)
+        self._objects[obj.id] = obj
+        for field, index in self._hash.items():
+            value = getattr(obj, field, None)
+            if value is not None:
+                index.setdefault(value, set()).add(obj.id)
+        for index in self._sorted.values():
+            if not index.stale:
+                key = index.key(obj)
+                if key is not None:
+                    index.pending.append((key, obj.id))
+
+    def add_all(self, objects: Iterable[Any]) -> int:
+        """Adds objects, returning how many were added."""
+        count = 0
+        for obj in objects:
+            self.add(obj)
+            count += 1
+        return count
+
+    def remove(self, object_id: str) -> bool:
+        """Removes an object by id. Returns False if it wasn't in the store."""
+        obj = self._objects.pop(object_id, None)
+        if obj is None:
+            return False
+        for field, index in self._hash.items():
+            ids = index.get(getattr(obj, field, None))
+            if ids is not None:
+                ids.discard(object_id)
+                if not ids:
+                    del index[getattr(obj, field)]
+        for index in self._sorted.values():
+            index.stale = True
+        return True
+
+    def query(self, **equals) -> 'Query':
+        """Starts a query, optionally with equality filters, e.g. store.query(community_id=community_id)."""
+        return Query(self).where(**equals)
+
+    def _sorted_index(self, name: str) -> _SortedIndex:
+        index = self._sorted.get(name)
+        if index is None:
+            raise ValueError(f"'{name}' has no sorted index, expected one of {list(self._sorted)}")
+        if index.stale or len(index.pending) > _INSORT_LIMIT:
+            pairs = [(key, object_id) for object_id, key in
+                     ((object_id, index.key(obj)) for object_id, obj in self._objects.items()) if key is not None]
+            pairs.sort(key=lambda pair: pair[0])
+            index.keys = [key for key, _ in pairs]
+            index.ids = [object_id for _, object_id in pairs]
+            index.pending, index.stale = [], False
+        elif index.pending:
+            for key, object_id in index.pending:
+                position = bisect_left(index.keys, key)
+                index.keys.insert(position, key)
+                index.ids.insert(position, object_id)
+            index.pending = []
+        return index
+
+
+class Query:
+    def __init__(self, store: ModelStore):
+        """A query over a ModelStore, built up by chaining and run by all(), first(), count() or top().
+
+            store.query(community_id=community_id).since(week_ago).top(100, by='upvotes')
+
+        The most selective indexed filter picks the candidates and the other filters are checked
+        on those. With an order and a limit, walking the order's index from the top is used instead
+        when that is expected to touch fewer objects.
+        """
+        self._store = store
+        self._equals = {}                           # field -> value
+        self._ranges = {}                           # sorted index -> (low, high)
+        self._order = None                          # sorted index to order by
+        self._descending = True
+        self._limit = None
+
+    def where(self, **equals) -> 'Query':
+        """Keeps objects whose fields equal the given values. Fields without a hash index are checked one by one."""
+        self._equals.update(equals)
+        return self
+
+    def range(self, field: str, low=None, high=None) -> 'Query':
+        """Keeps objects with low <= field < high. datetimes are accepted for the time fields.
+
+        Raises:
+            ValueError: field has no sorted index.
+        """
+        if field not in SORTED_INDEXES:
+            raise ValueError(f"'{field}' has no sorted index, expected one of {list(SORTED_INDEXES)}")
+        self._ranges[field] = (_timestamp(low), _timestamp(high))
+        return self
+
+    def since(self, when: datetime) -> 'Query':
+        """Keeps objects created at or after when."""
+        return self.range('created_at', when)
+
+    def order_by(self, field: str, descending: bool = True) -> 'Query':
+        if field not in SORTED_INDEXES:
+            raise ValueError(f"'{field}' has no sorted index, expected one of {list(SORTED_INDEXES)}")
+        self._order = field
+        self._descending = descending
+        return self
+
+    def limit(self, count: int) -> 'Query':
+        self._limit = count
+        return self
+
+    def top(self, count: int, by: str = 'score') -> List[Any]:
+        """The count objects with the highest by, highest first."""
+        return self.order_by(by).limit(count).all()
+
+    def first(self) -> Optional[Any]:
+        results = self.limit(1).all()
+        return results[0] if results else None
+
+    def count(self) -> int:
+        return sum(1 for _ in self._candidates()[0])
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.all())
+
+    def all(self) -> List[Any]:
+        candidates, size, estimate = self._candidates()
+        if self._order is None:
+            return list(candidates) if self._limit is None else [obj for obj, _ in zip(candidates, range(self._limit))]
+
+        index = self._store._sorted_index(self._order)
+        total = len(self._store)
+        if self._limit is not None and estimate and self._limit * total / estimate < size:
+            # walking the order index from the top should find limit matches after about
+            # limit * total / estimate objects, cheaper than checking all size candidates
+            return self._walk(index)
+
+        key = index.key
+        keyed = [(key(obj), obj) for obj in candidates]
+        keyed = [pair for pair in keyed if pair[0] is not None]
+        if self._limit is not None:
+            pick = heapq.nlargest if self._descending else heapq.nsmallest
+            keyed = pick(self._limit, keyed, key=lambda pair: pair[0])
+        else:
+            keyed.sort(key=lambda pair: pair[0], reverse=self._descending)
+        return [obj for _, obj in keyed]
+
+    def _walk(self, index: _SortedIndex) -> List[Any]:
+        objects, matches = self._store._objects, self._matches
+        ids = reversed(index.ids) if self._descending else iter(index.ids)
+        results = []
+        for object_id in ids:
+            obj = objects[object_id]
+            if matches(obj):
+                results.append(obj)
+                if len(results) >= self._limit:
+                    break
+        return results
+
+    def _candidates(self) -> Tuple[Iterator[Any], int, float]:
+        """Objects passing every filter, drawn from the smallest indexed source, that source's size,
+        and an estimate of how many objects match (treating the indexed filters as independent).
+        """
+        store = self._store
+        total = len(store)
+        best_size, best_ids = total, None
+        estimate = float(total)
+        for field, value in self._equals.items():
+            index = store._hash.get(field)
+            if index is not None:
+                ids = index.get(value, ())
+                estimate *= len(ids) / total if total else 0
+                if len(ids) < best_size:
+                    best_size, best_ids = len(ids), ids
+        for field, (low, high) in self._ranges.items():
+            index = store._sorted_index(field)
+            start, stop = index.bounds(low, high)
+            estimate *= (stop - start) / total if total else 0
+            if stop - start < best_size:
+                best_size, best_ids = stop - start, index.ids[start:stop]
+
+        objects = store._objects
+        source = objects.values() if best_ids is None else (objects[object_id] for object_id in best_ids)
+        return filter(self._matches, source), best_size, estimate
+
+    def _matches(self, obj: Any) -> bool:
+        for field, value in self._equals.items():
+            if getattr(obj, field, None) != value:
+                return False
+        for field, (low, high) in self._ranges.items():
+            key = SORTED_INDEXES[field](obj)
+            if key is None or (low is not None and key < low) or (high is not None and key >= high):
+                return False
+        return True
@@ -0,0 +1,237 @@
+import threading
+import time
+from typing import Dict, Mapping, Optional
+from ._lazy import lazy_import
+
+asyncio = lazy_import('asyncio')                 # only acquire_async needs it
+multiprocessing = lazy_import('multiprocessing') # only SharedRateLimiter needs it
+
+WRITE_METHODS = ('POST', 'PUT', 'DELETE', 'PATCH')
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = 0.1):
+        """A thread-safe token bucket. Tokens are reserved under a lock and the caller
+        then sleeps for the returned wait, so the same bucket can be shared by
+        threads (acquire) and asyncio tasks (acquire_async).
+
+        Args:
+            rate (float): Tokens added per second. This is also the ceiling for adaptive increases.
+            capacity (float, optional): Max tokens held, i.e. the allowed burst. Defaults to max(1, rate).
+            min_rate (float, optional): Floor the rate can be throttled down to. Defaults to 0.1.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity or max(1.0, rate)
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()          # may be in the future while paused
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            return max(0.0, self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+    def acquire(self):
+        """Blocks the current thread until a token is available."""
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Suspends the current task until a token is available."""
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hands out no tokens for the next `seconds`, e.g. after a Retry-After header."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
+
+    def set_rate(self, rate: float):
+        """Changes the refill rate, clamped between min_rate and max_rate."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    def throttle(self):
+        """Multiplicative decrease, used when the server says we are going too fast."""
+        self.set_rate(self.rate / 2)
+
+    def recover(self):
+        """Additive increase back towards max_rate after a successful request."""
+        if self.rate < self.max_rate:
+            self.set_rate(self.rate + self.max_rate / 20)
+
+
+class SharedTokenBucket(TokenBucket):
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = 0.1, context=None):
+        """A TokenBucket whose tokens and rate live in shared memory, behind a process-shared lock,
+        so every process it is handed to draws from (and throttles) the same budget.
+
+        Hand it to other processes when they start (e.g. in a pool's initargs), not through a queue.
+
+        Args:
+            rate (float): See TokenBucket.
+            capacity (float, optional): See TokenBucket. Defaults to max(1, rate).
+            min_rate (float, optional): See TokenBucket. Defaults to 0.1.
+            context (optional): multiprocessing context the processes are started with. Defaults to
+                multiprocessing's default context.
+        """
+        context = context or multiprocessing.get_context()
+        self._state = context.RawArray('d', 3)      # tokens, updated (time.monotonic is system-wide), rate
+        super().__init__(rate, capacity, min_rate)
+        self._lock = context.Lock()
+
+    def _shared(index: int):
+        return property(lambda self: self._state[index],
+                        lambda self, value: self._state.__setitem__(index, value))
+
+    _tokens = _shared(0)
+    _updated = _shared(1)
+    rate = _shared(2)
+    del _shared
+
+
+class RateLimiter:
+    def __init__(self, read_rate: float = 20.0, write_rate: float = 5.0, burst: float = None,
+                 endpoint_rates: Dict[str, float] = None, min_rate: float = 0.1):
+        """Client side rate limiting for the adapters, with separate budgets for reads and writes.
+
+        Pass the same instance to several RestAdapter/AsyncRestAdapter objects to have
+        them share one budget.
+
+        Args:
+            read_rate (float, optional): GET requests per second. Defaults to 20.
+            write_rate (float, optional): POST/PUT/DELETE requests per second. Defaults to 5.
+            burst (float, optional): Bucket capacity. Defaults to each bucket's rate.
+            endpoint_rates (Dict[str, float], optional): Own budgets for single endpoints, keyed by
+                endpoint or its first path segment. Defaults to 1/s each for _postVote and _commentVote.
+            min_rate (float, optional): Lowest rate adaptive throttling will go to. Defaults to 0.1.
+        """
+        if endpoint_rates is None:
+            endpoint_rates = {'_postVote': 1.0, '_commentVote': 1.0}
+
+        self._read = self._new_bucket(read_rate, burst, min_rate)
+        self._write = self._new_bucket(write_rate, burst, min_rate)
+        self._endpoints = {endpoint: self._new_bucket(rate, burst, min_rate)
+                           for endpoint, rate in endpoint_rates.items()}
+
+    def _new_bucket(self, rate: float, capacity: Optional[float], min_rate: float) -> TokenBucket:
+        return TokenBucket(rate, capacity, min_rate)
+
+    def bucket_for(self, http_method: str, endpoint: str) -> TokenBucket:
+        """Returns the bucket that a request to endpoint draws from."""
+        if self._endpoints:
+            bucket = self._endpoints.get(endpoint) or self._endpoints.get(endpoint.split('/', 1)[0])
+            if bucket is not None:
+                return bucket
+        return self._write if http_method.upper() in WRITE_METHODS else self._read
+
+    def acquire(self, http_method: str, endpoint: str):
+        self.bucket_for(http_method, endpoint).acquire()
+
+    async def acquire_async(self, http_method: str, endpoint: str):
+        await self.bucket_for(http_method, endpoint).acquire_async()
+
+    def update(self, http_method: str, endpoint: str, status_code: int,
+               headers: Mapping[str, str]) -> Optional[float]:
+        """Adjusts the endpoint's bucket from a response.
+
+        A 429 halves the rate and pauses the bucket for Retry-After, a success creeps the
+        rate back up, and X-RateLimit-Remaining/X-RateLimit-Reset (or the unprefixed
+        RateLimit-* headers) cap the rate at what is left of the server's window.
+
+        Returns:
+            Optional[float]: Seconds from Retry-After, if the header was sent.
+        """
+        bucket = self.bucket_for(http_method, endpoint)
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+
+        if status_code == 429:
+            bucket.throttle()
+            bucket.pause(retry_after if retry_after is not None else 1.0 / bucket.rate)
+            return retry_after
+
+        if 200 <= status_code < 300:
+            bucket.recover()
+
+        remaining = _header_float(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+        reset = _header_float(headers, 'X-RateLimit-Reset', 'RateLimit-Reset')
+        if remaining is not None and reset is not None:
+            # some servers send an epoch timestamp rather than seconds left
+            if reset > 1e9:
+                reset = reset - time.time()
+            reset = max(reset, 0.0)
+            if remaining <= 0:
+                bucket.pause(reset)
+            elif reset:
+                bucket.set_rate(min(bucket.rate, remaining / reset))
+
+        if retry_after is not None:
+            bucket.pause(retry_after)
+        return retry_after
+
+
+class SharedRateLimiter(RateLimiter):
+    def __init__(self, read_rate: float = 20.0, write_rate: float = 5.0, burst: float = None,
+                 endpoint_rates: Dict[str, float] = None, min_rate: float = 0.1, context=None):
+        """A RateLimiter shared between processes: clients in every process it is handed to draw
+        from one global budget, and a 429 seen by any of them slows them all down.
+
+        Like SharedTokenBucket, hand it to other processes when they start, e.g.
+
+            limiter = SharedRateLimiter(read_rate=20, context=context)
+            ProcessPoolExecutor(mp_context=context, initializer=start_worker, initargs=(limiter,))
+
+        Args:
+            read_rate, write_rate, burst, endpoint_rates, min_rate: See RateLimiter.
+            context (optional): multiprocessing context the processes are started with. Defaults to
+                multiprocessing's default context.
+        """
+        self._context = context
+        super().__init__(read_rate, write_rate, burst, endpoint_rates, min_rate)
+        del self._context                           # only needed to make the buckets
+
+    def _new_bucket(self, rate: float, capacity: Optional[float], min_rate: float) -> TokenBucket:
+        return SharedTokenBucket(rate, capacity, min_rate, self._context)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header, given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime  # rarely needed, so imported here
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def _header_float(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
@@ -1,35 +1,95 @@
-import requests
-import requests.packages
+import hashlib
 import logging
-from typing import Dict
-from exceptions import DiscuitAPIException
-from json import JSONDecodeError
-from models import Result
+import os
+import time
+from typing import BinaryIO, Callable, Dict, Optional, Union
+from ._lazy import lazy_import
+from .auth import REAUTH_INTERVAL, REAUTH_STATUSES, AuthState
+from .cache import BaseCache, CacheEntry, cache_key
+from .decoders import JSONDecoder, get_decoder
+from .exceptions import DiscuitAPIException, DiscuitRateLimitException
+from .instrumentation import Instrumentation, RequestInfo
+from .models import Result
+from .rate_limiter import RateLimiter
+from .retry import RetryPolicy
+from .session_pool import SessionPool
+from .single_flight import SingleFlight
+from .transport import RequestsTransport, Transport, TransportError
+
+# loaded on the first request, so scripts that only touch the cache never pay for importing it
+requests = lazy_import('requests')
+
+def _content_length(headers) -> Optional[int]:
+    """Content-Length of a response, or None if it's missing or malformed."""
+    try:
+        return int(headers['Content-Length'])
+    except (KeyError, ValueError):
+        return None
+
 
 class RestAdapter:
     def __init__(self, hostname: str = 'discuit.net/api', ssl_verify: bool = True,
-                 logger: logging.Logger = None):
+                 logger: logging.Logger = None, rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None, cache: BaseCache = None, decoder: JSONDecoder = None,
+                 instrumentation: Instrumentation = None, single_flight: bool = True, pool_size: int = 10,
+                 session_file: str = None, transport: Transport = None):
         """Constructor for RestAdapater
 
+        The adapter is thread-safe, so one (authenticated) instance can serve a whole thread pool:
+        each request borrows a session from a bounded pool, and all of them send the same shared
+        login state, which is swapped atomically when it is refreshed.
+
         Args:
             hostname (str): Defaults to, discuit.net/api
             api_key (str, optional): string used for auth. current unused. Defaults to ''.
             ssl_verify (bool, optional): if having SSL/TLS cert validation issues, can turn off with False. Defaults to True.
             logger (logging.Logger, optional): If app has a logger, pass itr here. Defaults to None.
+            rate_limiter (RateLimiter, optional): Client side rate limits. Share one instance between adapters
+                to share the budget. Defaults to a RateLimiter with default rates.
+            retry_policy (RetryPolicy, optional): How transient failures are retried. Its metrics attribute
+                counts the retries. Defaults to a RetryPolicy with default settings.
+            cache (BaseCache, optional): A MemoryCache or DiskCache for GET responses. Defaults to None (no caching).
+            decoder (JSONDecoder, optional): JSON decoder for response bodies, see decoders.get_decoder.
+                Defaults to the best installed (msgspec, orjson, then stdlib json).
+            instrumentation (Instrumentation, optional): Hooks called around every API request, e.g. a
+                MetricsCollector. Defaults to None.
+            single_flight (bool, optional): Identical GETs made while one is already in flight (e.g. from
+                other threads) wait for it and share its Result instead of sending their own. Defaults to True.
+            pool_size (int, optional): Sessions kept for concurrent requests, i.e. how many threads can have
+                a request in flight at once. Size it to the worker count. Defaults to 10.
+            session_file (str, optional): File the login cookie/CSRF state is saved to (readable only by the
+                current user) and loaded from on startup, so a new process can skip logging in. Defaults to None.
+            transport (Transport, optional): What API requests and fetch_data are sent through, e.g. an
+                HTTPXTransport for HTTP/2 or a ReplayTransport for recorded traffic. Downloads always use the
+                session pool. Defaults to a RequestsTransport over the session pool.
         """
         self.url = "https://{}/".format(hostname)
         # save to private member variables
         self._ssl_verify = ssl_verify
         self._logger = logger or logging.getLogger(__name__)
+        self._rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self._decoder = decoder or get_decoder()
+        self.instrumentation = instrumentation
+        self.single_flight = SingleFlight() if single_flight else None
 
-        self._session = requests.session()
+        self._sessions = SessionPool(pool_size)
+        self.transport = transport or RequestsTransport(self._sessions, ssl_verify)
 
-        self._auth_headers = {}
+        self._auth = AuthState()
+        self._credentials = None                    # (username, password), kept to log in again on 401/403
+        self._session_file = session_file
+        if session_file and self._auth.load(session_file):
+            if self._auth.is_private(session_file) is False:
+                self._logger.warning("session file %s is readable by other users", session_file)
+            self._logger.debug("loaded session for %s from %s", self._auth.username, session_file)
 
         if not ssl_verify:
             requests.packages.urllib3.disable_warnings()
 
-    def _do(self, http_method: str, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
+    def _do(self, http_method: str, endpoint: str, ep_params: Dict = None, data: Dict = None,
+            headers: Dict = None, typed: type = None) -> Result:
         """Helper func for POST/GET/DELETE methods for returning data from requests.
 
         Args:
@@ -37,9 +97,15 @@ class RestAdapter:
             endpoint (str): The endpoint desired to hit
             ep_params (Dict, optional): Any parameters required for the data. Defaults to None.
             data (Dict, optional): Used for POST methods. Defaults to None.
+            headers (Dict, optional): Extra request headers, e.g. If-None-Match. When given, a 304 is
+                returned as a Result rather than raised. Defaults to None.
+            typed (type, optional): Model class (Post, Posts, Comment, Comments) to decode a successful
+                body straight into, when the decoder supports it. Result.data is then that model object.
+                Defaults to None.
 
         Raises:
             DiscuitAPIException: Request failed.
+            DiscuitRateLimitException: Server returned 429.
             DiscuitAPIException: Bad JSON response.
             DiscuitAPIException: Bad status code.
 
@@ -48,51 +114,161 @@ class RestAdapter:
         """
 
         full_url = self.url + endpoint
-        
+        instrumentation = self.instrumentation
+        reauthenticated = False
 
-        log_line_pre = f"method={http_method}, url={full_url}. params={ep_params}"
-        log_line_post = ', '.join((log_line_pre, "success={}, status_code={}, messaage={}"))
+        # Log HTTP params and perform HTTP request, retrying transient failures per the retry policy
+        attempt = 0
+        while True:
+            attempt += 1
+            auth_version, auth_headers = self._auth.snapshot()
+            request_headers = dict(auth_headers, **headers) if headers else auth_headers
+            self._rate_limiter.acquire(http_method, endpoint)
+            self.retry_policy.metrics.record_attempt()
+            if instrumentation is not None:
+                info = RequestInfo(http_method, endpoint, full_url, ep_params, attempt)
+                instrumentation.before_request(info)
+                started = time.perf_counter()
+            try:
+                self._logger.debug("method=%s, url=%s, params=%s", http_method, full_url, ep_params)
+                response = self.transport.request(http_method, full_url, params=ep_params, json=data,
+                                                  headers=request_headers)
+            
+            except TransportError as e:
+                if instrumentation is not None:
+                    info.elapsed, info.error = time.perf_counter() - started, e
+                    instrumentation.after_request(info)
+                delay = self.retry_policy.retry_delay(http_method, attempt, error=e) if e.retryable else None
+                if delay is not None:
+                    if instrumentation is not None:
+                        instrumentation.on_retry(info, delay)
+                    self._backoff(http_method, full_url, attempt, delay, e)
+                    continue
+                self.retry_policy.metrics.record_outcome(attempt, success=False)
+                self._logger.error(msg=(str(e)))
+                raise DiscuitAPIException("Request Failed") from e
 
-        # Log HTTP params and perform HTTP request, catching and re-raising execeptions.
-        try:
-            self._logger.debug(msg=log_line_pre)
-            response = self._session.request(method=http_method, url=full_url, verify=self._ssl_verify, 
-                                        headers=self._auth_headers, params=ep_params, json=data)
-        
-        except requests.exceptions.RequestException as e:
-            self._logger.error(msg=(str(e)))
-            raise DiscuitAPIException("Request Failed") from e
+            if instrumentation is not None:
+                info.elapsed = time.perf_counter() - started
+                info.status_code = response.status_code
+                info.request_bytes = response.request_bytes
+                info.response_bytes = len(response.content)
+                instrumentation.after_request(info)
+
+            # the login has expired: log in again (or pick up another thread's new login) and replay once
+            if response.status_code in REAUTH_STATUSES and not reauthenticated \
+                    and self._reauthenticate(auth_version):
+                reauthenticated = True
+                attempt -= 1                        # the replay doesn't use up a retry
+                continue
+
+            # let the limiter adapt to the response before deciding whether to go again
+            retry_after = self._rate_limiter.update(http_method, endpoint, response.status_code, response.headers)
+            delay = self.retry_policy.retry_delay(http_method, attempt, status_code=response.status_code,
+                                                  retry_after=retry_after)
+            if delay is None:
+                break
+            if instrumentation is not None:
+                instrumentation.on_retry(info, delay)
+            self._backoff(http_method, full_url, attempt, delay, response.status_code)
+
+        is_success = 299 >= response.status_code >= 200
+        self.retry_policy.metrics.record_outcome(attempt, is_success)
+
+        # bail out before decoding a 429 body
+        if response.status_code == 429:
+            self._logger.warning("method=%s, url=%s, success=False, status_code=429, message=%s",
+                                 http_method, full_url, response.reason)
+            raise DiscuitRateLimitException(f"{response.status_code} :  {response.reason}", retry_after)
+
+        # a conditional request came back Not Modified, there is no body to decode
+        if response.status_code == 304 and headers:
+            return Result(response.status_code, message=response.reason, headers=response.headers)
 
         # deserialise JSON output to pytho nobject, or return failed on exe
         try:
-            data = response.json()
+            data = None
+            if typed is not None and is_success and self._decoder.typed:
+                data = self._decoder.decode_typed(response.content, typed)
+            if data is None:
+                data = self._decoder.decode(response.content)
 
-        except (ValueError, JSONDecodeError) as e:
-            self._logger.error(msg=log_line_post.format(False, None, e))
+        except ValueError as e:
+            self._logger.error("method=%s, url=%s, success=False, status_code=%s, message=%s",
+                               http_method, full_url, response.status_code, e)
             raise DiscuitAPIException("Bad JSON response") from e
 
         # if status_code in 200-299 range, return success Result with data, otherwise raise exception
-        is_success = 299 >= response.status_code >= 200
-
         if is_success: # okay 
             # return a result object
             
-            return Result(response.status_code, message=response.reason, data=data)
+            return Result(response.status_code, message=response.reason, data=data, headers=response.headers)
     
         raise DiscuitAPIException(f"{response.status_code} :  {response.reason}")
 
 
-    def get(self, endpoint: str, ep_params: Dict = None) -> Result:
+    def _backoff(self, http_method: str, url: str, attempt: int, delay: float, reason):
+        """Logs a retry and sleeps for its backoff."""
+        self._logger.warning("method=%s, url=%s, retry=%d/%d, reason=%s, backoff=%.2fs", http_method, url,
+                             attempt, self.retry_policy.max_attempts - 1, reason, delay)
+        time.sleep(delay)
+
+    def get(self, endpoint: str, ep_params: Dict = None, typed: type = None) -> Result:
         """Performs a GET request to the specified endpoint with given parameters.
 
+        With a cache, fresh entries are returned without a request, and stale ones that have
+        an ETag/Last-Modified are revalidated with a conditional GET.
+
         Args:
             endpoint (str): The endpoint to reach after /api. (e.g., posts, users)
             ep_params (Dict, optional): Parameters for the request. Defaults to None.
+            typed (type, optional): Model class to decode straight into, see _do. Ignored with a cache,
+                which keeps plain JSON data. Defaults to None.
 
         Returns:
-            Result: Result object.
+            Result: Result object. Data served from the cache or a shared in-flight request is shared
+                with other callers, so treat it as read-only.
         """
-        return self._do(http_method='GET', endpoint=endpoint, ep_params=ep_params)
+        if self.single_flight is None:
+            return self._get(endpoint, ep_params, typed)
+        key = (cache_key(endpoint, ep_params), typed)
+        return self.single_flight.do(key, lambda: self._get(endpoint, ep_params, typed))
+
+    def _get(self, endpoint: str, ep_params: Dict = None, typed: type = None) -> Result:
+        if self.cache is None:
+            return self._do(http_method='GET', endpoint=endpoint, ep_params=ep_params, typed=typed)
+
+        key = cache_key(endpoint, ep_params)
+        entry = self.cache.get(key)
+        if entry is not None and entry.is_fresh():
+            self.cache.record('hit')
+            if self.instrumentation is not None:
+                self.instrumentation.on_cache('GET', endpoint, 'hit')
+            return entry.to_result()
+
+        validators = entry.validators() if entry is not None else None
+        result = self._do(http_method='GET', endpoint=endpoint, ep_params=ep_params, headers=validators)
+        ttl = self.cache.ttl_for(endpoint)
+
+        if result.status_code == 304:
+            self.cache.record('revalidated')
+            if self.instrumentation is not None:
+                self.instrumentation.on_cache('GET', endpoint, 'revalidated')
+            entry.expires_at = time.time() + ttl
+            self.cache.set(key, entry)
+            return entry.to_result()
+
+        self.cache.record('miss')
+        if self.instrumentation is not None:
+            self.instrumentation.on_cache('GET', endpoint, 'miss')
+        if 'no-store' not in result.headers.get('Cache-Control', ''):
+            entry = CacheEntry(result.status_code, result.message, result.data,
+                               etag=result.headers.get('ETag'),
+                               last_modified=result.headers.get('Last-Modified'),
+                               expires_at=time.time() + ttl)
+            if ttl > 0 or entry.can_revalidate():
+                self.cache.set(key, entry)
+        return result
     
     def post(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
         """Performs a POST reqeuest to the given endpoint, with params and data.
@@ -105,40 +281,251 @@ class RestAdapter:
         Returns:
             Result: Result object.
         """
-        return self._do(http_method='POST', endpoint=endpoint, ep_params=ep_params, data=data)
+        result = self._do(http_method='POST', endpoint=endpoint, ep_params=ep_params, data=data)
+        self._invalidate(endpoint)
+        return result
     
     def delete(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
-        return self._do(http_method='DELETE', endpoint=endpoint, ep_params=ep_params, data=data)
+        result = self._do(http_method='DELETE', endpoint=endpoint, ep_params=ep_params, data=data)
+        self._invalidate(endpoint)
+        return result
     
     def put(self, endpoint: str, ep_params: Dict = None, data: Dict = None) -> Result:
-        return self._do(http_method='PUT', endpoint=endpoint, ep_params=ep_params, data=data)
+        result = self._do(http_method='PUT', endpoint=endpoint, ep_params=ep_params, data=data)
+        self._invalidate(endpoint)
+        return result
+
+    def _invalidate(self, endpoint: str):
+        """Drops cached responses a write to endpoint may have made stale."""
+        if self.cache is not None:
+            self.cache.invalidate_related(endpoint)
     
     def fetch_data(self, url:str) -> bytes:
         #GET URL 
         http_method = 'GET'
-        try:
-            log_line = f"method={http_method}, url={url}"
-            self._logger.debug(msg=log_line)
-            response = self._session.request(method=http_method, url=url, verify=self._ssl_verify)
-        except requests.exceptions.RequestException as e:
-            self._logger.error(msg=(str(e)))
-            raise DiscuitAPIException(str(e)) from e
+        attempt = 0
+        while True:
+            attempt += 1
+            self.retry_policy.metrics.record_attempt()
+            try:
+                self._logger.debug("method=%s, url=%s", http_method, url)
+                response = self.transport.request(http_method, url)
+            except TransportError as e:
+                delay = self.retry_policy.retry_delay(http_method, attempt, error=e) if e.retryable else None
+                if delay is not None:
+                    self._backoff(http_method, url, attempt, delay, e)
+                    continue
+                self.retry_policy.metrics.record_outcome(attempt, success=False)
+                self._logger.error(msg=(str(e)))
+                raise DiscuitAPIException(str(e)) from e
+
+            delay = self.retry_policy.retry_delay(http_method, attempt, status_code=response.status_code)
+            if delay is None:
+                break
+            self._backoff(http_method, url, attempt, delay, response.status_code)
         
         # If status_code in 200-299 range, return byte stream, otherwise raise exception
         is_success = 299 >= response.status_code >= 200
-        log_line = f"success={is_success}, status_code={response.status_code}, message={response.reason}"
-        self._logger.debug(msg=log_line)
+        self.retry_policy.metrics.record_outcome(attempt, is_success)
+        self._logger.debug("success=%s, status_code=%s, message=%s", is_success, response.status_code, response.reason)
         if not is_success:
             raise DiscuitAPIException(response.reason)
         return response.content
 
-    def authenticate(self, username:str, password:str):
+    def content_length(self, url: str) -> Optional[int]:
+        """Size of the file at url from a HEAD request, or None if the server doesn't say."""
         try:
-            result = self._session.get('https://discuit.net/api/_initial')
+            self._logger.debug("method=HEAD, url=%s", url)
+            with self._sessions.session() as session:
+                response = session.head(url, verify=self._ssl_verify, allow_redirects=True)
         except requests.exceptions.RequestException as e:
+            raise DiscuitAPIException(str(e)) from e
+        if not 299 >= response.status_code >= 200:
+            return None
+        return _content_length(response.headers)
+
+    def download(self, url: str, dest: Union[str, BinaryIO], chunk_size: int = 64 * 1024,
+                 resume: bool = True, checksum: str = None,
+                 progress: Callable[[int, int], None] = None) -> int:
+        """Streams url into dest a chunk at a time, so at most chunk_size bytes are held in memory.
+
+        When dest is a path, a partial file left by an earlier run (or by a dropped connection,
+        which is retried per the retry policy) is resumed with a Range request, if the server
+        supports it.
+
+        Args:
+            url (str): Full URL to download.
+            dest (Union[str, BinaryIO]): File path, or any object with a write(bytes) method.
+            chunk_size (int, optional): Bytes read per chunk. Defaults to 64 KiB.
+            resume (bool, optional): Continue an existing file at dest rather than starting over. Defaults to True.
+            checksum (str, optional): Expected digest as "algorithm:hexdigest", e.g. "sha256:ab12...".
+                Defaults to None.
+            progress (Callable[[int, int], None], optional): Called with (bytes done, total bytes) after each
+                chunk. Total is 0 when the server doesn't send a length. Defaults to None.
+
+        Raises:
+            DiscuitAPIException: Request failed, bad status code, or checksum mismatch.
+
+        Returns:
+            int: Size of the downloaded file in bytes.
+        """
+        http_method = 'GET'
+        is_path = isinstance(dest, (str, os.PathLike))
+
+        hasher = None
+        if checksum:
+            algorithm, _, expected = checksum.partition(':')
+            try:
+                hasher = hashlib.new(algorithm)
+            except ValueError as e:
+                raise DiscuitAPIException(f"Unknown checksum algorithm '{algorithm}'") from e
+
+        if is_path:
+            directory = os.path.dirname(dest)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if not resume and os.path.exists(dest):
+                os.remove(dest)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.retry_policy.metrics.record_attempt()
+            done = os.path.getsize(dest) if is_path and os.path.exists(dest) else 0
+            headers = {'Range': f"bytes={done}-"} if done else None
+            try:
+                self._logger.debug("method=%s, url=%s, download=True", http_method, url)
+                with self._sessions.session() as session, \
+                        session.request(method=http_method, url=url, verify=self._ssl_verify,
+                                        headers=headers, stream=True) as response:
+                    # 416 means there is nothing past what we already have
+                    if response.status_code == 416 and done:
+                        break
+
+                    delay = self.retry_policy.retry_delay(http_method, attempt, status_code=response.status_code)
+                    if delay is not None:
+                        self._backoff(http_method, url, attempt, delay, response.status_code)
+                        continue
+                    if not 299 >= response.status_code >= 200:
+                        self.retry_policy.metrics.record_outcome(attempt, success=False)
+                        raise DiscuitAPIException(response.reason)
+
+                    # a 200 to a Range request means the server sent the whole file again
+                    if response.status_code != 206:
+                        done = 0
+                    total = (_content_length(response.headers) or 0) + done
+
+                    file = open(dest, 'ab' if done else 'wb') if is_path else dest
+                    try:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            file.write(chunk)
+                            # files on disk are hashed once complete, as they may have been resumed
+                            if hasher is not None and not is_path:
+                                hasher.update(chunk)
+                            done += len(chunk)
+                            if progress is not None:
+                                progress(done, total)
+                    finally:
+                        if is_path:
+                            file.close()
+                break
+
+            except requests.exceptions.RequestException as e:
+                # only a file on disk can be picked up where the dropped connection left it
+                retryable = RequestsTransport.transport_error(e).retryable
+                delay = self.retry_policy.retry_delay(http_method, attempt, error=e) \
+                    if retryable and (is_path or not done) else None
+                if delay is not None:
+                    self._backoff(http_method, url, attempt, delay, e)
+                    continue
+                self.retry_policy.metrics.record_outcome(attempt, success=False)
+                self._logger.error(msg=(str(e)))
+                raise DiscuitAPIException(str(e)) from e
+
+        self.retry_policy.metrics.record_outcome(attempt, success=True)
+        if is_path:
+            done = os.path.getsize(dest)
+            if hasher is not None:
+                with open(dest, 'rb') as f:
+                    for chunk in iter(lambda: f.read(chunk_size), b''):
+                        hasher.update(chunk)
+
+        if hasher is not None:
+            if hasher.hexdigest() != expected.lower():
+                if is_path:
+                    os.remove(dest)
+                raise DiscuitAPIException(f"Checksum mismatch for {url}")
+
+        self._logger.debug("success=True, url=%s, bytes=%d", url, done)
+        return done
+
+    def authenticate(self, username:str, password:str, force: bool = False):
+        """Logs in, replacing the login state every thread using this adapter sends.
+
+        With a session_file holding a login for username, that is reused without any requests
+        (unless force). The credentials are kept in memory so an expired login can be renewed
+        automatically when the API answers 401/403.
+
+        Args:
+            username (str): Discuit username.
+            password (str): Its password.
+            force (bool, optional): Log in even if a saved session for username was loaded. Defaults to False.
+
+        Raises:
+            DiscuitAPIException: A request failed, or the login was refused.
+
+        Returns:
+            int: Status code of the login response, or 200 when a saved session was reused.
+        """
+        self._credentials = (username, password)
+        if not force and self._auth.authenticated and self._auth.username == username:
+            self._logger.debug("reusing saved session for %s", username)
+            return 200
+
+        statuses = []
+        def login() -> Dict[str, str]:
+            headers, status_code = self._login(username, password)
+            statuses.append(status_code)
+            return headers
+
+        self._auth.refresh(login, username=username)
+        self._save_session()
+        return statuses[0]
+
+    def _reauthenticate(self, seen_version: int) -> bool:
+        """Renews the login after a 401/403 on a request sent with auth version seen_version.
+
+        Returns:
+            bool: Whether the request is worth replaying with the current login.
+        """
+        if self._credentials is None:
+            return False
+        if self._auth.version != seen_version:
+            return True                             # another thread logged in since, use that
+        if time.time() - self._auth.refreshed_at < REAUTH_INTERVAL:
+            return False
+        username, password = self._credentials
+        self._logger.info("login rejected, logging in again as %s", username)
+        if self._auth.refresh(lambda: self._login(username, password)[0], seen_version, username):
+            self._save_session()
+        return True
+
+    def _save_session(self):
+        if not self._session_file:
+            return
+        try:
+            self._auth.save(self._session_file)
+        except OSError as e:
+            self._logger.warning("couldn't save session to %s: %s", self._session_file, e)
+
+    def _login(self, username: str, password: str):
+        """Runs the _initial and _login round trips, returning (auth headers, login status code)."""
+        try:
+            result = self.transport.request('GET', self.url + '_initial')
+        except TransportError as e:
             raise DiscuitAPIException("Request for login headers failed") from e
 
-        self._auth_headers = {
+        auth_headers = {
             'Cookie' : result.headers['Set-Cookie'],
             'X-Csrf-Token' : result.headers['Csrf-Token'],
             'Content-Type' : 'application/json'
@@ -150,10 +537,8 @@ class RestAdapter:
         }
 
         try:
-            response = self._session.post('https://discuit.net/api/_login', 
-                                     headers=self._auth_headers, json=data)
-            print('Auth successful')
-        except requests.exceptions.RequestException as e:
+            response = self.transport.request('POST', self.url + '_login', headers=auth_headers, json=data)
+        except TransportError as e:
             raise DiscuitAPIException("Request failed for login route") from e
         
         is_success = 299 > response.status_code >= 200
@@ -161,4 +546,5 @@ class RestAdapter:
         if not is_success:
             raise DiscuitAPIException("Autherisation failed (check user/pass)")
         else:
-            return response.status_code
\ No newline at end of file
+            self._logger.info("Auth successful, username=%s", username)
+            return auth_headers, response.status_code
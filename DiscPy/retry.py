@@ -0,0 +1,103 @@
+import random
+import threading
+from typing import Dict, Iterable, Optional
+
+class RetryMetrics:
+    def __init__(self):
+        """Thread-safe counters describing what a RetryPolicy has done, for tuning it."""
+        self._lock = threading.Lock()
+        self.attempts = 0                           # every request attempt, first tries included
+        self.retries = 0                            # attempts that were a retry
+        self.exhausted = 0                          # requests that failed after using every attempt
+        self.recovered = 0                          # requests that succeeded after at least one retry
+        self.backoff_seconds = 0.0                  # total time spent sleeping between attempts
+        self.retries_by_reason = {}                 # status code or exception name -> retries
+
+    def record_attempt(self):
+        with self._lock:
+            self.attempts += 1
+
+    def record_retry(self, reason: str, delay: float):
+        with self._lock:
+            self.retries += 1
+            self.backoff_seconds += delay
+            self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+
+    def record_outcome(self, attempt: int, success: bool):
+        with self._lock:
+            if not success:
+                self.exhausted += 1
+            elif attempt > 1:
+                self.recovered += 1
+
+    def snapshot(self) -> Dict:
+        """Returns a copy of the counters as a plain dict."""
+        with self._lock:
+            return {
+                'attempts' : self.attempts,
+                'retries' : self.retries,
+                'exhausted' : self.exhausted,
+                'recovered' : self.recovered,
+                'backoff_seconds' : self.backoff_seconds,
+                'retries_by_reason' : dict(self.retries_by_reason)
+            }
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.5, backoff_cap: float = 30.0,
+                 jitter: bool = True, retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 retry_methods: Iterable[str] = ('GET', 'PUT', 'DELETE')):
+        """When and how long RestAdapter waits before trying a failed request again.
+
+        Delays grow as backoff_base * 2 ** (attempt - 1), capped at backoff_cap. With jitter
+        the delay is picked uniformly from [0, that value] ("full jitter"), so many clients
+        failing at once don't all come back at the same moment. A Retry-After sent by the
+        server is used as the lower bound.
+
+        Args:
+            max_attempts (int, optional): Attempts per request, including the first. Defaults to 3.
+            backoff_base (float, optional): Delay before the first retry, in seconds. Defaults to 0.5.
+            backoff_cap (float, optional): Longest delay between attempts, in seconds. Defaults to 30.
+            jitter (bool, optional): Use full jitter. Defaults to True.
+            retry_statuses (Iterable[int], optional): Status codes worth retrying. Defaults to 429 and 5xx gateway errors.
+            retry_methods (Iterable[str], optional): Methods that may be retried. Defaults to the idempotent GET/PUT/DELETE.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(method.upper() for method in retry_methods)
+        self.metrics = RetryMetrics()
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Seconds to wait after the given (1-based) attempt failed."""
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        return delay
+
+    def retry_delay(self, http_method: str, attempt: int, status_code: int = None,
+                    error: Exception = None, retry_after: float = None) -> Optional[float]:
+        """Decides whether a failed attempt should be retried, and records it if so.
+
+        Args:
+            http_method (str): Method of the request.
+            attempt (int): The attempt that just failed, starting at 1.
+            status_code (int, optional): Status of the response, if one came back. Defaults to None.
+            error (Exception, optional): The transport error, if no response came back. Defaults to None.
+            retry_after (float, optional): Seconds from a Retry-After header. Defaults to None.
+
+        Returns:
+            Optional[float]: Seconds to wait before the next attempt, or None to give up.
+        """
+        if http_method.upper() not in self.retry_methods or attempt >= self.max_attempts:
+            return None
+        if error is None and status_code not in self.retry_statuses:
+            return None
+
+        delay = self.backoff(attempt, retry_after)
+        self.metrics.record_retry(type(error).__name__ if error is not None else str(status_code), delay)
+        return delay
@@ -0,0 +1,361 @@
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .exceptions import DiscuitAPIException
+from .models import Comment, Comments, Post, Posts, _to_datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    public_id TEXT,
+    post_id TEXT,
+    community_name TEXT,
+    username TEXT,
+    created_at REAL,
+    title TEXT,
+    body TEXT,
+    -- one token per filter value, so FTS5 can narrow a search to a community/user before ranking it
+    facets TEXT GENERATED ALWAYS AS ('k' || kind || ' c' || hex(community_name) || ' u' || hex(username)) VIRTUAL,
+    UNIQUE (kind, id)
+);
+CREATE INDEX IF NOT EXISTS documents_community ON documents (community_name, created_at);
+CREATE INDEX IF NOT EXISTS documents_username ON documents (username, created_at);
+CREATE INDEX IF NOT EXISTS documents_created ON documents (created_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, facets, content='documents', content_rowid='doc_id',
+    tokenize='porter unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, title, body, facets) VALUES (new.doc_id, new.title, new.body, new.facets);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, body, facets)
+        VALUES ('delete', old.doc_id, old.title, old.body, old.facets);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, body, facets)
+        VALUES ('delete', old.doc_id, old.title, old.body, old.facets);
+    INSERT INTO documents_fts (rowid, title, body, facets) VALUES (new.doc_id, new.title, new.body, new.facets);
+END;
+"""
+
+DOCUMENT_COLUMNS = ('kind', 'id', 'public_id', 'post_id', 'community_name', 'username', 'created_at', 'title',
+                    'body')
+
+# documents already indexed with the same values are left alone, so re-feeding pages costs no index writes
+_UPSERT = (f"INSERT INTO documents ({', '.join(DOCUMENT_COLUMNS)}) VALUES ({', '.join('?' * len(DOCUMENT_COLUMNS))}) "
+           f"ON CONFLICT (kind, id) DO UPDATE SET "
+           + ', '.join(f"{column} = excluded.{column}" for column in DOCUMENT_COLUMNS[2:])
+           + " WHERE " + ' OR '.join(f"{column} IS NOT excluded.{column}" for column in DOCUMENT_COLUMNS[2:]))
+
+ORDERS = {
+    'rank' : 'score',                               # bm25
+    'newest' : 'd.created_at DESC',
+    'oldest' : 'd.created_at ASC'
+}
+
+def _epoch(value) -> Optional[float]:
+    """Seconds since the epoch of a datetime, RFC 3339 string or number; None if it isn't one."""
+    value = _to_datetime(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value) if isinstance(value, (int, float)) else None
+
+def _post_document(post: Post) -> tuple:
+    return ('post', post.id, post.public_id, post.id, post.community_name, post.username,
+            _epoch(post.created_at), post.title, post.body)
+
+def _comment_document(comment: Comment) -> tuple:
+    return ('comment', comment.id, comment.post_public_id, comment.post_id, comment.community_name,
+            comment.username, _epoch(comment.created_at), None, comment.body)
+
+def _documents(items: Iterable[Any]) -> Iterator[tuple]:
+    for item in items:
+        if isinstance(item, Posts):
+            yield from (_post_document(post) for post in item.posts)
+        elif isinstance(item, Comments):
+            yield from (_comment_document(comment) for comment in item.comments)
+        elif isinstance(item, Post):
+            yield _post_document(item)
+        elif isinstance(item, Comment):
+            yield _comment_document(item)
+        else:
+            raise ValueError(f"Can't index a {type(item).__name__}, expected Post, Comment, Posts or Comments")
+
+
+class SearchHit:
+    POST = 'post'
+    COMMENT = 'comment'
+
+    __slots__ = ('kind', 'id', 'public_id', 'post_id', 'community_name', 'username', 'created_at', 'title',
+                 'body', 'score')
+
+    def __init__(self, kind: str, id: str, public_id: str, post_id: str, community_name: str, username: str,
+                 created_at: Optional[float], title: Optional[str], body: Optional[str], score: Optional[float]):
+        self.kind = kind                            # 'post' or 'comment'
+        self.id = id                                # ID of the post or comment
+        self.public_id = public_id                  # public ID of the post (the one a comment is on)
+        self.post_id = post_id                      # ID of the post (the one a comment is on)
+        self.community_name = community_name
+        self.username = username
+        self.created_at = (datetime.fromtimestamp(created_at, timezone.utc)
+                           if created_at is not None else None)
+        self.title = title                          # None for comments
+        self.body = body
+        self.score = score                          # bm25, lower is better; None unless ordered by rank
+
+    def __repr__(self):
+        return f"SearchHit({self.kind!r}, id={self.id!r}, score={self.score})"
+
+
+class SearchIndex:
+    def __init__(self, path: str = 'search.db', title_weight: float = 4.0):
+        """Full-text index of post titles and bodies and comment bodies, in SQLite FTS5,
+        ranked by bm25 and filterable by community, user, kind and time.
+
+        Feed it what the client fetches, as it is fetched, and it stays up to date:
+
+            index = SearchIndex('search.db')
+            for post in index.indexing(api.iter_posts(community_id)):
+                ...
+            hits = index.search('formula 1 crash', community_name='formula1', since=last_week)
+
+        Re-adding a post or comment replaces it if it changed (edits, deletions) and is skipped
+        if not. Words are stemmed (porter) and accents ignored, so "racing" finds "races".
+
+        Args:
+            path (str, optional): Database file. ':memory:' keeps it in memory. Defaults to 'search.db'.
+            title_weight (float, optional): How much more a match in a post's title counts than one
+                in a body. Defaults to 4.
+
+        Raises:
+            DiscuitAPIException: The sqlite3 module was built without FTS5.
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        if path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        try:
+            self._conn.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            self._conn.close()
+            raise DiscuitAPIException(f"SearchIndex needs SQLite with FTS5 ({e})") from e
+        # facets never count towards the score
+        self._score = f"bm25(documents_fts, {float(title_weight)}, 1.0, 0.0)"
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def add(self, items: Iterable[Any], batch_size: int = 1000) -> int:
+        """Indexes posts and comments: Post and Comment objects, or Posts and Comments pages.
+
+        Args:
+            items (Iterable[Any]): What to index, e.g. api.iter_comments(post_id).
+            batch_size (int, optional): Documents written per transaction. Defaults to 1000.
+
+        Raises:
+            ValueError: An item isn't a post, comment or page of them.
+
+        Returns:
+            int: Number of documents added or changed.
+        """
+        return self._write(_documents(items), batch_size)
+
+    def indexing(self, items: Iterable[Any], batch_size: int = 1000) -> Iterator[Any]:
+        """Yields items unchanged while indexing them, a batch at a time, e.g.
+        for post in index.indexing(api.iter_posts()). The last batch is written when items run out.
+        """
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                self.add(batch, batch_size)
+                batch = []
+            yield item
+        if batch:
+            self.add(batch, batch_size)
+
+    def add_rows(self, table: str, rows: Iterable[Dict], batch_size: int = 1000) -> int:
+        """Indexes rows of a SyncStore (or a crawl), e.g. index.add_rows('posts', store.iter_rows('posts')).
+
+        Args:
+            table (str): 'posts' or 'comments'.
+            rows (Iterable[Dict]): Rows as SyncStore.iter_rows yields them.
+            batch_size (int, optional): Documents written per transaction. Defaults to 1000.
+
+        Raises:
+            ValueError: Unknown table.
+
+        Returns:
+            int: Number of documents added or changed.
+        """
+        if table == 'posts':
+            documents = (('post', row['id'], row['public_id'], row['id'], row['community_name'], row['username'],
+                          _epoch(row['created_at']), row['title'], row['body']) for row in rows)
+        elif table == 'comments':
+            documents = (('comment', row['id'], row['post_public_id'], row['post_id'], row['community_name'],
+                          row['username'], _epoch(row['created_at']), None, row['body']) for row in rows)
+        else:
+            raise ValueError(f"Unknown table '{table}', expected 'posts' or 'comments'")
+        return self._write(documents, batch_size)
+
+    def _write(self, documents: Iterator[tuple], batch_size: int) -> int:
+        changed = 0
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                changed += self._write_batch(batch)
+                batch = []
+        if batch:
+            changed += self._write_batch(batch)
+        return changed
+
+    def _write_batch(self, batch: List[tuple]) -> int:
+        with self._conn:
+            # rows written, not counting the triggers' writes or skipped unchanged documents
+            return self._conn.executemany(_UPSERT, batch).rowcount
+
+    def remove(self, kind: str, object_id: str) -> bool:
+        """Drops a post or comment from the index. Returns False if it wasn't indexed."""
+        with self._conn:
+            return self._conn.execute("DELETE FROM documents WHERE kind = ? AND id = ?",
+                                      (kind, object_id)).rowcount > 0
+
+    def search(self, query: str, community_name: str = None, username: str = None, kind: str = None,
+               since: Union[datetime, float] = None, until: Union[datetime, float] = None,
+               order: str = 'rank', limit: int = 20, offset: int = 0, raw: bool = False) -> List[SearchHit]:
+        """Finds posts and comments matching query, best match first (or by time, unscored).
+
+        Args:
+            query (str): Words that must all appear, in title or body. With raw=True, an FTS5 query
+                instead, e.g. '"formula 1" AND (crash OR collision) NOT title:qualifying'.
+            community_name (str, optional): Only this community. Defaults to None.
+            username (str, optional): Only by this user. Defaults to None.
+            kind (str, optional): Only 'post' or only 'comment'. Defaults to None (both).
+            since (Union[datetime, float], optional): Only created at or after this. Defaults to None.
+            until (Union[datetime, float], optional): Only created before this. Defaults to None.
+            order (str, optional): 'rank' (bm25), 'newest' or 'oldest'. Defaults to 'rank'.
+            limit (int, optional): Most hits returned. Defaults to 20.
+            offset (int, optional): Hits skipped, for paging. Defaults to 0.
+            raw (bool, optional): Pass query to FTS5 as is. Defaults to False.
+
+        Raises:
+            ValueError: Unknown order or kind, or a raw query FTS5 can't parse.
+
+        Returns:
+            List[SearchHit]: The hits.
+        """
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {list(ORDERS)}")
+        where, params, facets = self._filters(query, raw, community_name, username, kind, since, until)
+        if where is None:
+            return []
+        columns = "d.kind, d.id, d.public_id, d.post_id, d.community_name, d.username, d.created_at, d.title, d.body"
+        if order == 'rank' and len(params) == 1:
+            # nothing but the words to match: rank in FTS5 alone, and only look up the documents returned
+            sql = (f"SELECT {columns}, f.score FROM (SELECT rowid, {self._score} AS score FROM documents_fts "
+                   f"WHERE {where} ORDER BY score LIMIT ? OFFSET ?) f "
+                   f"JOIN documents d ON d.doc_id = f.rowid ORDER BY f.score")
+        elif order == 'rank':
+            # CROSS JOIN keeps FTS5 as the outer loop, rather than the planner probing it once per
+            # document of a community or user
+            sql = (f"SELECT {columns}, {self._score} AS score FROM documents_fts "
+                   f"CROSS JOIN documents d ON d.doc_id = documents_fts.rowid WHERE {where} "
+                   f"ORDER BY score LIMIT ? OFFSET ?")
+        elif self._walk_is_cheaper(params[0], facets, limit + offset):
+            # most candidates match: walk them in created_at order, stopping once enough are found
+            sql = (f"SELECT {columns}, NULL FROM documents d "
+                   f"CROSS JOIN documents_fts ON documents_fts.rowid = d.doc_id WHERE {where} "
+                   f"ORDER BY {ORDERS[order]} LIMIT ? OFFSET ?")
+        else:
+            sql = (f"SELECT {columns}, NULL FROM documents_fts "
+                   f"CROSS JOIN documents d ON d.doc_id = documents_fts.rowid WHERE {where} "
+                   f"ORDER BY {ORDERS[order]} LIMIT ? OFFSET ?")
+        return [SearchHit(*row) for row in self._execute(sql, params + [limit, offset])]
+
+    def count(self, query: str, community_name: str = None, username: str = None, kind: str = None,
+              since: Union[datetime, float] = None, until: Union[datetime, float] = None, raw: bool = False) -> int:
+        """Number of posts and comments matching, with the same arguments as search."""
+        where, params, _ = self._filters(query, raw, community_name, username, kind, since, until)
+        if where is None:
+            return 0
+        sql = (f"SELECT COUNT(*) FROM documents_fts CROSS JOIN documents d ON d.doc_id = documents_fts.rowid "
+               f"WHERE {where}")
+        return self._execute(sql, params).fetchone()[0]
+
+    def _filters(self, query: str, raw: bool, community_name: Optional[str], username: Optional[str],
+                 kind: Optional[str], since, until) -> Tuple[Optional[str], List, Optional[str]]:
+        """(WHERE clause, its parameters, the MATCH expression of the facets alone or None)."""
+        if kind not in (None, SearchHit.POST, SearchHit.COMMENT):
+            raise ValueError(f"Unknown kind '{kind}', expected 'post' or 'comment'")
+        match = query if raw else _quote(query)
+        if not match:
+            return None, [], None
+        # the facet tokens let FTS5 skip other communities' and users' matches without scoring them,
+        # the columns are compared too so the result is exact whatever the tokenizer does
+        facets = []
+        clauses, params = ['documents_fts MATCH ?'], []
+        for column, prefix, value in (('community_name', 'c', community_name), ('username', 'u', username),
+                                      ('kind', 'k', kind)):
+            if value is not None:
+                facets.append(f'facets : "{prefix}{_facet(value, prefix)}"')
+                clauses.append(f"d.{column} = ?")
+                params.append(value)
+        # the words only ever match titles and bodies, never the facet tokens
+        params.insert(0, ' AND '.join([f"{{title body}} : ({match})"] + facets))
+        if since is not None:
+            clauses.append("d.created_at >= ?")
+            params.append(_epoch(since))
+        if until is not None:
+            clauses.append("d.created_at < ?")
+            params.append(_epoch(until))
+        return ' AND '.join(clauses), params, ' AND '.join(facets) or None
+
+    def _walk_is_cheaper(self, match: str, facets: Optional[str], wanted: int) -> bool:
+        """Whether to walk the candidates (every document, or those with the facets) in created_at
+        order rather than sort every match. Probing a document costs about four times sorting a
+        match, and the walk probes about wanted * candidates / matches documents.
+        """
+        count = "SELECT COUNT(*) FROM documents_fts WHERE documents_fts MATCH ?"
+        matches = self._execute(count, [match]).fetchone()[0]
+        if facets:
+            candidates = self._execute(count, [facets]).fetchone()[0]
+        else:
+            candidates = self._conn.execute("SELECT MAX(doc_id) FROM documents").fetchone()[0] or 0
+        return 4 * wanted * candidates < matches * matches
+
+    def _execute(self, sql: str, params: List) -> sqlite3.Cursor:
+        try:
+            return self._conn.execute(sql, params)
+        except sqlite3.OperationalError as e:
+            # only a malformed MATCH expression gets here
+            raise ValueError(f"Invalid search query: {e}") from e
+
+    def optimize(self):
+        """Merges the index's segments into one, e.g. after a large crawl, for faster queries."""
+        with self._conn:
+            self._conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+
+def _facet(value: str, prefix: str) -> str:
+    # as the facets column spells it: kinds as is, names as SQLite's hex() of their UTF-8
+    return value if prefix == 'k' else value.encode('utf-8').hex().upper()
+
+def _quote(text: str) -> str:
+    """Each word of text as a quoted FTS5 string, so all must match and none is read as syntax."""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
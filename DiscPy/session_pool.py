@@ -0,0 +1,63 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from ._lazy import lazy_import
+
+requests = lazy_import('requests')
+
+class SessionPool:
+    def __init__(self, size: int = 10):
+        """A bounded pool of requests.Sessions, so threads never share one mid-request.
+
+        Sessions are created on demand up to size; after that, a thread wanting one waits for
+        another to give one back. Each session keeps its own keep-alive connections, so size
+        it to the number of worker threads. Session cookie jars are disabled: authentication
+        is sent explicitly from the adapter's shared AuthState, so every session behaves the same.
+
+        Args:
+            size (int, optional): Most sessions (and so concurrent requests) at once. Defaults to 10.
+        """
+        if size < 1:
+            raise ValueError("SessionPool size must be at least 1")
+        self.size = size
+        self._idle = queue.LifoQueue()              # most recently used first, its connections are warmest
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> 'requests.Session':
+        from http.cookiejar import DefaultCookiePolicy  # pulls in http.client, so not at import
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def _checkout(self) -> 'requests.Session':
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                # under the lock, so the first sessions don't race to run the lazily imported requests
+                return self._new_session()
+        return self._idle.get()
+
+    @contextmanager
+    def session(self) -> Iterator['requests.Session']:
+        """Borrows a session for the duration of the with block."""
+        session = self._checkout()
+        try:
+            yield session
+        finally:
+            self._idle.put(session)
+
+    def close(self):
+        """Closes the idle sessions. Ones in use are kept and go back in the pool when returned."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
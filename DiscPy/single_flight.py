@@ -0,0 +1,100 @@
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+from ._lazy import lazy_import
+
+asyncio = lazy_import('asyncio')                 # only AsyncSingleFlight needs it
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()               # set once the leader has a value or an error
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """Collapses concurrent calls with the same key into one, for threads.
+
+        The first caller for a key (the leader) runs the function; callers arriving while it
+        is in flight wait and get the same value, or the same exception raised. Once the call
+        finishes the key is forgotten, so later callers start a new one (this is not a cache).
+        """
+        self._lock = threading.Lock()
+        self._calls = {}                            # key -> _Call in flight
+        self.calls = 0                              # calls actually made
+        self.shared = 0                             # callers served by another caller's call
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Runs function, unless a call with key is already in flight, then waits for that one.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        """The asyncio version of SingleFlight, for coroutines on one event loop.
+
+        The shared call runs as its own task, so a waiter (even the one that started it)
+        being cancelled doesn't cancel it for the others.
+        """
+        self._calls = {}                            # key -> Task in flight
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaits function(), unless a call with key is already in flight, then awaits that one.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(function())
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: 'asyncio.Future'):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # every waiter may have been cancelled, don't leave "exception never retrieved" behind
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,340 @@
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from .models import Comment, Community, Post, Posts
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    public_id TEXT,
+    type TEXT,
+    community_id TEXT,
+    community_name TEXT,
+    user_id TEXT,
+    username TEXT,
+    title TEXT,
+    body TEXT,
+    link_url TEXT,
+    upvotes INTEGER,
+    downvotes INTEGER,
+    hotness INTEGER,
+    no_comments INTEGER,
+    deleted INTEGER,
+    created_at TEXT,
+    edited_at TEXT,
+    last_activity_at TEXT
+);
+CREATE INDEX IF NOT EXISTS posts_community ON posts (community_id, created_at);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_id TEXT,
+    post_public_id TEXT,
+    community_id TEXT,
+    community_name TEXT,
+    user_id TEXT,
+    username TEXT,
+    parent_id TEXT,
+    depth INTEGER,
+    body TEXT,
+    upvotes INTEGER,
+    downvotes INTEGER,
+    created_at TEXT,
+    edited_at TEXT,
+    deleted_at TEXT
+);
+CREATE INDEX IF NOT EXISTS comments_post ON comments (post_id);
+
+CREATE TABLE IF NOT EXISTS communities (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    about TEXT,
+    nsfw INTEGER,
+    no_members INTEGER,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    community_id TEXT PRIMARY KEY,
+    backfill_cursor TEXT,
+    backfill_done INTEGER NOT NULL DEFAULT 0,
+    newest_created_at TEXT,
+    last_activity_at TEXT,
+    synced_at REAL
+);
+"""
+
+POST_COLUMNS = ('id', 'public_id', 'type', 'community_id', 'community_name', 'user_id', 'username', 'title',
+                'body', 'link_url', 'upvotes', 'downvotes', 'hotness', 'no_comments', 'deleted', 'created_at',
+                'edited_at', 'last_activity_at')
+COMMENT_COLUMNS = ('id', 'post_id', 'post_public_id', 'community_id', 'community_name', 'user_id', 'username',
+                   'parent_id', 'depth', 'body', 'upvotes', 'downvotes', 'created_at', 'edited_at', 'deleted_at')
+COMMUNITY_COLUMNS = ('id', 'name', 'about', 'nsfw', 'no_members', 'created_at')
+STATE_COLUMNS = ('community_id', 'backfill_cursor', 'backfill_done', 'newest_created_at', 'last_activity_at',
+                 'synced_at')
+
+# positions in a post row of the columns sync state is worked out from
+_ID, _PUBLIC_ID, _NO_COMMENTS, _CREATED_AT, _LAST_ACTIVITY_AT = (
+    POST_COLUMNS.index(column) for column in ('id', 'public_id', 'no_comments', 'created_at', 'last_activity_at'))
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _upsert_sql(table: str, columns: Iterable[str], key: str) -> str:
+    columns = tuple(columns)
+    updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column != key)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {updates}")
+
+
+def post_row(post: Post) -> tuple:
+    """A post as a row of the posts table, in POST_COLUMNS order."""
+    return (post.id, post.public_id, post.type, post.community_id, post.community_name, post.user_id,
+            post.username, post.title, post.body, getattr(post.link, 'url', None), post.upvotes,
+            post.downvotes, post.hotness, post.no_comments, int(bool(post.deleted)), _iso(post.created_at),
+            _iso(post.edited_at), _iso(post.last_activity_at))
+
+def comment_row(comment: Comment) -> tuple:
+    """A comment as a row of the comments table, in COMMENT_COLUMNS order."""
+    return (comment.id, comment.post_id, comment.post_public_id, comment.community_id, comment.community_name,
+            comment.user_id, comment.username, comment.parent_id, comment.depth, comment.body, comment.upvotes,
+            comment.downvotes, _iso(comment.created_at), _iso(comment.edited_at), _iso(comment.deleted_at))
+
+
+class SyncStore:
+    def __init__(self, path: str = 'discuit.db'):
+        """Local SQLite copy of posts, comments and communities, plus per-community sync state.
+
+        Args:
+            path (str, optional): Database file. ':memory:' keeps it in memory. Defaults to 'discuit.db'.
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def upsert_posts(self, posts: Iterable[Post]) -> int:
+        return self.upsert_post_rows([post_row(post) for post in posts])
+
+    def upsert_post_rows(self, rows: List[tuple]) -> int:
+        with self._conn:
+            self._conn.executemany(_upsert_sql('posts', POST_COLUMNS, 'id'), rows)
+        return len(rows)
+
+    def upsert_comments(self, comments: Iterable[Comment]) -> int:
+        rows = [comment_row(comment) for comment in comments]
+        with self._conn:
+            self._conn.executemany(_upsert_sql('comments', COMMENT_COLUMNS, 'id'), rows)
+        return len(rows)
+
+    def upsert_post_comments(self, row: tuple, comments: Iterable[Comment]) -> int:
+        """Stores a post's comments, then its row, in one transaction. The post's comment count is
+        only recorded once its comments are, so a fetch that fails is retried by the next sync.
+
+        Args:
+            row (tuple): The post's row, see post_row.
+            comments (Iterable[Comment]): Every comment of the post. Read before anything is written.
+
+        Returns:
+            int: Number of comments stored.
+        """
+        rows = [comment_row(comment) for comment in comments]
+        with self._conn:
+            self._conn.executemany(_upsert_sql('comments', COMMENT_COLUMNS, 'id'), rows)
+            self._conn.execute(_upsert_sql('posts', POST_COLUMNS, 'id'), row)
+        return len(rows)
+
+    def upsert_communities(self, communities: Iterable[Community]) -> int:
+        rows = [(community.id, community.name, community.about, int(bool(community.nsfw)), community.no_members,
+                 _iso(community.created_at)) for community in communities]
+        with self._conn:
+            self._conn.executemany(_upsert_sql('communities', COMMUNITY_COLUMNS, 'id'), rows)
+        return len(rows)
+
+    def comment_counts(self, post_ids: List[str]) -> Dict[str, int]:
+        """no_comments of the stored posts among post_ids, by post id."""
+        counts = {}
+        # stay well under SQLite's bound-parameter limit
+        for start in range(0, len(post_ids), 500):
+            chunk = post_ids[start:start + 500]
+            rows = self._conn.execute(f"SELECT id, no_comments FROM posts WHERE id IN ({', '.join('?' * len(chunk))})",
+                                      chunk)
+            counts.update((row['id'], row['no_comments']) for row in rows)
+        return counts
+
+    def track_posts(self, state: Dict, rows: List[tuple], check_comments: bool = True) -> List[tuple]:
+        """Moves a community's sync state past a batch of post rows. Call it before storing them.
+
+        Raises the state's newest_created_at and last_activity_at marks to the newest in rows,
+        and picks out the posts whose comments the store doesn't have yet (their comment count
+        changed). SyncEngine and the crawler both go through here.
+
+        Args:
+            state (Dict): The community's sync state, see get_state. Updated in place.
+            rows (List[tuple]): Post rows, see post_row.
+            check_comments (bool, optional): Look for posts needing comments. Defaults to True.
+
+        Returns:
+            List[tuple]: The rows of the posts whose comments need fetching.
+        """
+        for row in rows:
+            created, active = row[_CREATED_AT], row[_LAST_ACTIVITY_AT]
+            if created and (state['newest_created_at'] is None or created > state['newest_created_at']):
+                state['newest_created_at'] = created
+            if active and (state['last_activity_at'] is None or active > state['last_activity_at']):
+                state['last_activity_at'] = active
+
+        if not check_comments:
+            return []
+        known = self.comment_counts([row[_ID] for row in rows])
+        return [row for row in rows if row[_NO_COMMENTS] and known.get(row[_ID]) != row[_NO_COMMENTS]]
+
+    def get_state(self, community_id: str) -> Dict:
+        row = self._conn.execute("SELECT * FROM sync_state WHERE community_id = ?", (community_id,)).fetchone()
+        if row is None:
+            return {'community_id': community_id, 'backfill_cursor': None, 'backfill_done': 0,
+                    'newest_created_at': None, 'last_activity_at': None, 'synced_at': None}
+        return dict(row)
+
+    def save_state(self, state: Dict):
+        with self._conn:
+            self._conn.execute(_upsert_sql('sync_state', STATE_COLUMNS, 'community_id'),
+                               tuple(state[column] for column in STATE_COLUMNS))
+
+    def iter_rows(self, table: str, where: str = '', params: Iterable = ()) -> Iterator[Dict]:
+        """Yields stored rows of posts, comments or communities as dicts, e.g.
+        store.iter_rows('posts', 'community_id = ?', (community_id,)).
+        """
+        if table not in ('posts', 'comments', 'communities'):
+            raise ValueError(f"Unknown table '{table}'")
+        sql = f"SELECT * FROM {table}" + (f" WHERE {where}" if where else '')
+        for row in self._conn.execute(sql, tuple(params)):
+            yield dict(row)
+
+    def count(self, table: str) -> int:
+        if table not in ('posts', 'comments', 'communities'):
+            raise ValueError(f"Unknown table '{table}'")
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class SyncReport:
+    def __init__(self, community_id: str):
+        self.community_id = community_id
+        self.posts = 0                              # posts written (new or changed)
+        self.comments = 0                           # comments written
+        self.pages = 0                              # post pages requested
+
+    def __repr__(self):
+        return f"SyncReport(community_id={self.community_id!r}, posts={self.posts}, comments={self.comments}, pages={self.pages})"
+
+
+class SyncEngine:
+    def __init__(self, api, store: SyncStore, page_limit: int = None, sync_comments: bool = True,
+                 logger: logging.Logger = None):
+        """Keeps a SyncStore up to date with a DiscuitAPI, downloading only what changed.
+
+        The first sync of a community walks its posts newest first (sort=latest), saving the
+        Posts.next cursor after every page so an interrupted backfill picks up where it stopped.
+        Later syncs walk the activity feed (sort=activity, which new posts and new comments
+        both bump) and stop at the first post at or before the stored lastActivityAt mark.
+        The mark only moves once a catch-up reaches it, so one cut short by max_pages starts
+        from the top of the feed again next time instead of skipping what it didn't fetch.
+        Comments are only re-fetched for posts whose comment count changed.
+
+        Args:
+            api (DiscuitAPI): Client to fetch with.
+            store (SyncStore): Where to keep the data and sync state.
+            page_limit (int, optional): Posts requested per page. Defaults to None (server default).
+            sync_comments (bool, optional): Also fetch comments of new/changed posts. Defaults to True.
+            logger (logging.Logger, optional): Defaults to this module's logger.
+        """
+        self._api = api
+        self.store = store
+        self.page_limit = page_limit
+        self.sync_comments = sync_comments
+        self._logger = logger or logging.getLogger(__name__)
+
+    def sync_communities(self) -> int:
+        """Stores every community, returning how many there are."""
+        return self.store.upsert_communities(self._api.get_communites())
+
+    def sync_community(self, community_id: str, max_pages: int = None) -> SyncReport:
+        """Brings one community's posts (and their comments) up to date.
+
+        Args:
+            community_id (str): The community ID.
+            max_pages (int, optional): Stop after this many post pages; a backfill carries on from
+                there next time. Defaults to None (no limit).
+
+        Returns:
+            SyncReport: What was written.
+        """
+        state = self.store.get_state(community_id)
+        report = SyncReport(community_id)
+        if not state['backfill_done']:
+            self._backfill(state, report, max_pages)
+        else:
+            self._catch_up(state, report, max_pages)
+        state['synced_at'] = time.time()
+        self.store.save_state(state)
+        self._logger.debug("%r", report)
+        return report
+
+    def sync(self, community_ids: Iterable[str], max_pages: int = None) -> List[SyncReport]:
+        return [self.sync_community(community_id, max_pages) for community_id in community_ids]
+
+    def _fetch_page(self, community_id: str, sort: str, cursor: Optional[str]) -> Posts:
+        params = {
+            "communityId" : community_id,
+            "sort" : sort,
+            "limit" : self.page_limit,
+            "next" : cursor
+        }
+        params = {key: value for key, value in params.items() if value is not None}
+        return self._api._get_model('posts', Posts, ep_params=params)
+
+    def _backfill(self, state: Dict, report: SyncReport, max_pages: Optional[int]):
+        cursor = state['backfill_cursor']
+        while max_pages is None or report.pages < max_pages:
+            page = self._fetch_page(state['community_id'], 'latest', cursor)
+            report.pages += 1
+            self._store_posts(page.posts, state, report)
+            cursor = page.next
+            state['backfill_cursor'] = cursor
+            if not cursor or not page.posts:
+                state['backfill_done'] = 1
+                state['backfill_cursor'] = None
+                break
+            # persist after every page so a killed run resumes from here
+            self.store.save_state(state)
+
+    def _catch_up(self, state: Dict, report: SyncReport, max_pages: Optional[int]):
+        mark = state['last_activity_at']
+        cursor = None
+        while max_pages is None or report.pages < max_pages:
+            page = self._fetch_page(state['community_id'], 'activity', cursor)
+            report.pages += 1
+            fresh = [post for post in page.posts if mark is None or _iso(post.last_activity_at) > mark]
+            self._store_posts(fresh, state, report)
+            cursor = page.next
+            if len(fresh) < len(page.posts) or not cursor or not page.posts:
+                return
+        # stopped by max_pages: posts between here and the old mark weren't fetched, keep the mark
+        state['last_activity_at'] = mark
+
+    def _store_posts(self, posts: List[Post], state: Dict, report: SyncReport):
+        if not posts:
+            return
+        rows = [post_row(post) for post in posts]
+        stale = self.store.track_posts(state, rows, self.sync_comments)
+        # posts whose comments changed are stored with their comments, not before them
+        stale_ids = {row[_ID] for row in stale}
+        report.posts += self.store.upsert_post_rows([row for row in rows if row[_ID] not in stale_ids])
+        for row in stale:
+            report.comments += self.store.upsert_post_comments(row, self._api.iter_comments(row[_PUBLIC_ID]))
+            report.posts += 1
@@ -0,0 +1,291 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+from ._lazy import lazy_import
+from .exceptions import DiscuitAPIException
+from .session_pool import SessionPool
+
+requests = lazy_import('requests')
+httpx = lazy_import('httpx')                     # None unless installed, see HTTPXTransport
+
+def query_params(params: Optional[Dict]) -> Optional[Dict]:
+    """Query parameters the way requests sends them: None values left out, bools as "True"/"False".
+    Every client goes through this, so the same call builds the same URL (and recording) whichever
+    transport or client sends it.
+    """
+    if not params:
+        return params
+    return {key: str(value) if isinstance(value, bool) else value
+            for key, value in params.items() if value is not None}
+
+
+class TransportError(Exception):
+    def __init__(self, message: str, retryable: bool = False):
+        """A request that got no response. The backend's own exception is the __cause__.
+
+        Args:
+            message (str): What went wrong.
+            retryable (bool, optional): Whether another attempt may succeed (connection errors,
+                timeouts, dropped responses), as opposed to e.g. an invalid URL. Defaults to False.
+        """
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class Headers(Mapping[str, str]):
+    """Case-insensitive, read-only response headers, for transports without their own."""
+
+    def __init__(self, headers: Mapping[str, str] = None):
+        self._headers = {key.lower(): (key, value) for key, value in (headers or {}).items()}
+
+    def __getitem__(self, key: str) -> str:
+        return self._headers[key.lower()][1]
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self._headers.values())
+
+    def __len__(self) -> int:
+        return len(self._headers)
+
+    def __repr__(self):
+        return f"Headers({dict(self)!r})"
+
+
+class TransportResponse:
+    __slots__ = ('status_code', 'reason', 'headers', 'content', 'request_bytes')
+
+    def __init__(self, status_code: int, reason: str, headers: Mapping[str, str], content: bytes,
+                 request_bytes: int = 0):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers                      # case-insensitive mapping
+        self.content = content
+        self.request_bytes = request_bytes          # size of the request body sent
+
+
+class Transport:
+    """What RestAdapter sends its requests through. Subclasses implement request (and close).
+
+    Implementations must be safe to call from many threads at once, as one adapter is.
+    """
+    name = 'transport'
+
+    def request(self, method: str, url: str, params: Dict = None, json: Any = None,
+                headers: Dict[str, str] = None) -> TransportResponse:
+        """Sends one request and reads the whole response.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Full URL, without the query string.
+            params (Dict, optional): Query parameters; None values are left out. Defaults to None.
+            json (Any, optional): Body, sent as JSON. Defaults to None.
+            headers (Dict[str, str], optional): Request headers. Defaults to None.
+
+        Raises:
+            TransportError: No response was received.
+
+        Returns:
+            TransportResponse: The response, whatever its status code.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RequestsTransport(Transport):
+    name = 'requests'
+
+    def __init__(self, sessions: SessionPool = None, ssl_verify: bool = True, timeout: float = None):
+        """HTTP/1.1 through a pool of requests.Sessions. The default transport.
+
+        Args:
+            sessions (SessionPool, optional): Pool to borrow sessions from. Defaults to a SessionPool().
+            ssl_verify (bool, optional): Verify TLS certificates. Defaults to True.
+            timeout (float, optional): Seconds to wait for the server. Defaults to None (no timeout).
+        """
+        self.sessions = sessions or SessionPool()
+        self._ssl_verify = ssl_verify
+        self._timeout = timeout
+
+    def request(self, method: str, url: str, params: Dict = None, json: Any = None,
+                headers: Dict[str, str] = None) -> TransportResponse:
+        try:
+            with self.sessions.session() as session:
+                response = session.request(method=method, url=url, params=query_params(params), json=json,
+                                           headers=headers, verify=self._ssl_verify, timeout=self._timeout)
+        except requests.exceptions.RequestException as e:
+            raise self.transport_error(e) from e
+        return TransportResponse(response.status_code, response.reason, response.headers, response.content,
+                                 len(response.request.body or b''))
+
+    @staticmethod
+    def transport_error(error: Exception) -> TransportError:
+        """A requests exception as a TransportError, marked retryable for connection errors,
+        timeouts and dropped responses. Also used for RestAdapter's streamed downloads.
+        """
+        retryable = isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                                       requests.exceptions.ChunkedEncodingError))
+        return TransportError(str(error), retryable)
+
+    def close(self):
+        self.sessions.close()
+
+
+class HTTPXTransport(Transport):
+    name = 'httpx'
+
+    def __init__(self, http2: bool = True, ssl_verify: bool = True, timeout: float = 30.0,
+                 max_connections: int = 100):
+        """HTTP/2 through one httpx.Client, so concurrent requests from every thread are multiplexed
+        over a single TLS connection per host instead of one connection each.
+
+        Needs httpx with its http2 extra (pip install DiscPy[http2]). Servers that don't offer
+        HTTP/2 are spoken to over HTTP/1.1.
+
+        Args:
+            http2 (bool, optional): Offer HTTP/2. Defaults to True.
+            ssl_verify (bool, optional): Verify TLS certificates. Defaults to True.
+            timeout (float, optional): Seconds to wait for the server. Defaults to 30.
+            max_connections (int, optional): Most open connections. Defaults to 100.
+
+        Raises:
+            DiscuitAPIException: httpx (or h2, for http2) isn't installed.
+        """
+        if httpx is None:
+            raise DiscuitAPIException("HTTPXTransport requires httpx (pip install DiscPy[http2])")
+        try:
+            self._client = httpx.Client(http2=http2, verify=ssl_verify, timeout=timeout,
+                                        limits=httpx.Limits(max_connections=max_connections))
+        except ImportError as e:
+            raise DiscuitAPIException("HTTP/2 requires h2 (pip install DiscPy[http2])") from e
+
+    def request(self, method: str, url: str, params: Dict = None, json: Any = None,
+                headers: Dict[str, str] = None) -> TransportResponse:
+        try:
+            response = self._client.request(method, url, params=query_params(params), json=json, headers=headers)
+        except httpx.HTTPError as e:
+            raise TransportError(str(e), isinstance(e, httpx.TransportError)) from e
+        return TransportResponse(response.status_code, response.reason_phrase, response.headers,
+                                 response.content, len(response.request.content))
+
+    def close(self):
+        self._client.close()
+
+
+def recording_key(method: str, url: str, params: Dict = None, json_body: Any = None) -> str:
+    """The name a request's recording is saved under. Headers (auth, validators) aren't part of it."""
+    query = urlencode(sorted((key, str(value)) for key, value in (params or {}).items() if value is not None))
+    body = json.dumps(json_body, sort_keys=True) if json_body is not None else ''
+    return hashlib.sha1(f"{method.upper()} {url}?{query}\n{body}".encode()).hexdigest()
+
+
+class RecordingTransport(Transport):
+    name = 'recording'
+
+    def __init__(self, directory: str, transport: Transport = None):
+        """Sends requests through transport and saves every response to directory, for ReplayTransport.
+
+        One JSON file is kept per distinct request (method, URL, params and body), holding its
+        latest response. Request headers, including the login cookie, are never saved;
+        response headers are, so record with an account you don't mind on disk.
+
+        Args:
+            directory (str): Where to save the recordings. Created if missing.
+            transport (Transport, optional): The transport that does the real work. Defaults to
+                a RequestsTransport().
+        """
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.transport = transport or RequestsTransport()
+        self.recorded = 0
+
+    def request(self, method: str, url: str, params: Dict = None, json: Any = None,
+                headers: Dict[str, str] = None) -> TransportResponse:
+        response = self.transport.request(method, url, params=params, json=json, headers=headers)
+        # a 304 only means "use your cached copy", keep the full response recorded before it
+        if response.status_code != 304:
+            self._save(recording_key(method, url, params, json), method, url, params, response)
+        return response
+
+    def _save(self, key: str, method: str, url: str, params: Optional[Dict], response: TransportResponse):
+        try:
+            body = {'body': response.content.decode('utf-8')}
+        except UnicodeDecodeError:
+            body = {'body_b64': base64.b64encode(response.content).decode('ascii')}
+        record = dict({'method': method, 'url': url, 'params': params, 'status_code': response.status_code,
+                       'reason': response.reason, 'headers': dict(response.headers),
+                       'request_bytes': response.request_bytes}, **body)
+        # written to a temp file and renamed, so a replay never reads half a recording
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(temp_path, os.path.join(self.directory, key + '.json'))
+        self.recorded += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    name = 'replay'
+
+    def __init__(self, directory: str, latency: float = 0.0):
+        """Serves responses saved by RecordingTransport, with no network at all.
+
+        Recordings are read once and kept in memory, so replaying measures the client alone,
+        e.g. for profiling its hot paths or running load tests offline.
+
+        Args:
+            directory (str): Directory a RecordingTransport wrote to.
+            latency (float, optional): Seconds to wait before each response, to stand in for the
+                network. Defaults to 0.
+        """
+        self.directory = os.path.expanduser(directory)
+        self.latency = latency
+        self.replayed = 0
+        self.missed = 0
+        self._responses = {}                        # key -> (status, reason, Headers, content, request bytes)
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[Tuple]:
+        response = self._responses.get(key)
+        if response is not None:
+            return response
+        try:
+            with open(os.path.join(self.directory, key + '.json'), encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        content = record['body'].encode('utf-8') if 'body' in record else base64.b64decode(record['body_b64'])
+        response = (record['status_code'], record['reason'], Headers(record['headers']), content,
+                    record.get('request_bytes', 0))
+        with self._lock:
+            self._responses[key] = response
+        return response
+
+    def request(self, method: str, url: str, params: Dict = None, json: Any = None,
+                headers: Dict[str, str] = None) -> TransportResponse:
+        response = self._load(recording_key(method, url, params, json))
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if response is None:
+                self.missed += 1
+            else:
+                self.replayed += 1
+        if response is None:
+            raise TransportError(f"No recording of {method} {url} params={params} in {self.directory}")
+        return TransportResponse(*response)
@@ -0,0 +1,274 @@
+import asyncio
+import inspect
+import logging
+import random
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Union
+from .models import Comment, Comments, Post, Posts, _to_datetime
+
+class WatchEvent:
+    NEW = 'new'                                     # first time the item has been seen
+    CHANGED = 'changed'                             # seen before, and votes/activity/edits differ now
+
+    __slots__ = ('kind', 'item', 'community_id')
+
+    def __init__(self, kind: str, item: Union[Post, Comment], community_id: str):
+        self.kind = kind
+        self.item = item                            # the Post or Comment, as just fetched
+        self.community_id = community_id
+
+    @property
+    def is_post(self) -> bool:
+        return isinstance(self.item, Post)
+
+    def __repr__(self):
+        return f"WatchEvent({self.kind!r}, {type(self.item).__name__}(id={self.item.id!r}))"
+
+
+class SeenSet:
+    def __init__(self, maxsize: int = 100_000):
+        """Fingerprints of the items seen so far, forgetting the least recently seen past maxsize.
+
+        An item forgotten and then seen again counts as new, so size it well above the number
+        of items a poll round returns.
+        """
+        if maxsize < 1:
+            raise ValueError("SeenSet maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._items = OrderedDict()                 # key -> fingerprint, least recently seen first
+
+    def get(self, key: Hashable):
+        return self._items.get(key)
+
+    def check(self, key: Hashable, fingerprint) -> Optional[str]:
+        """Records fingerprint for key, returning WatchEvent.NEW, WatchEvent.CHANGED or None (unchanged)."""
+        previous = self._items.get(key)
+        self._items[key] = fingerprint
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        if previous is None:
+            return WatchEvent.NEW
+        return WatchEvent.CHANGED if previous != fingerprint else None
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key: Hashable):
+        return key in self._items
+
+
+def _post_fingerprint(post: Post) -> tuple:
+    # raw timestamp strings, compared as sent, so nothing is parsed for unchanged posts
+    return (post.upvotes, post.downvotes, post.no_comments, post._last_activity_at, post._edited_at,
+            post.deleted, post.locked)
+
+def _comment_fingerprint(comment: Comment) -> tuple:
+    return (comment.upvotes, comment.downvotes, comment._edited_at, comment._deleted_at)
+
+
+class Watcher:
+    def __init__(self, api, community_ids: Iterable[str], interval: float = 30.0, min_interval: float = 5.0,
+                 max_interval: float = 300.0, comments: bool = False, page_limit: int = None,
+                 max_concurrency: int = 8, seen_size: int = 100_000, emit_existing: bool = False,
+                 callback: Callable[[WatchEvent], None] = None, logger: logging.Logger = None):
+        """Polls communities for new and changed posts (and optionally comments).
+
+        Each community is polled on its own schedule, fetching the first page of its activity
+        feed (sort=activity, which new posts, new comments and edits bump). A poll that finds
+        something halves that community's interval, down to min_interval; a quiet one (or a
+        failed one) stretches it by half, up to max_interval. Items are deduplicated by id in a
+        bounded SeenSet, and only new items, or ones whose votes, comment count, activity time
+        or edit time changed, are emitted.
+
+        With comments, a post whose comment count changed has its first comment page fetched,
+        and its new or changed comments are emitted too.
+
+        Events go to callback if given (a function or a coroutine function), otherwise they are
+        read with async for:
+
+            async for event in Watcher(api, community_ids):
+                print(event.kind, event.item.title if event.is_post else event.item.body)
+
+        Works with a DiscuitAPI (its calls run in worker threads) or an AsyncDiscuitAPI.
+
+        Args:
+            api (DiscuitAPI | AsyncDiscuitAPI): Client to poll with.
+            community_ids (Iterable[str]): The community IDs to watch.
+            interval (float, optional): Starting seconds between polls of a community. Defaults to 30.
+            min_interval (float, optional): Shortest interval for a busy community. Defaults to 5.
+            max_interval (float, optional): Longest interval for a quiet one. Defaults to 300.
+            comments (bool, optional): Also watch comments of active posts. Defaults to False.
+            page_limit (int, optional): Posts requested per poll. Defaults to None (server default).
+            max_concurrency (int, optional): Most requests in flight at once. Defaults to 8.
+            seen_size (int, optional): Items remembered for deduplication. Defaults to 100,000.
+            emit_existing (bool, optional): Emit what the first poll finds, instead of only taking it
+                as the starting point. Defaults to False.
+            callback (Callable[[WatchEvent], None], optional): Called with every event. Defaults to None.
+            logger (logging.Logger, optional): Defaults to this module's logger.
+
+        Raises:
+            ValueError: The intervals are out of order.
+        """
+        if not 0 < min_interval <= interval <= max_interval:
+            raise ValueError("Watcher intervals must satisfy 0 < min_interval <= interval <= max_interval")
+        self._api = api
+        self._is_async = inspect.iscoroutinefunction(api._get_model)
+        self.community_ids = list(dict.fromkeys(community_ids))
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.comments = comments
+        self.page_limit = page_limit
+        self.max_concurrency = max_concurrency
+        self.emit_existing = emit_existing
+        self.callback = callback
+        self.seen = SeenSet(seen_size)
+        self.intervals = {community_id: interval for community_id in self.community_ids}
+        self.polls = 0                              # polls made, over every community
+        self.errors = 0                             # polls that failed
+        self._logger = logger or logging.getLogger(__name__)
+        self._loop = None
+        self._stop = None
+        self._queue = None
+        self._stopped = threading.Event()           # stop() can be called from any thread
+
+    async def run(self):
+        """Polls every community until stop() is called (or the task is cancelled)."""
+        self._stop = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        if self._stopped.is_set():
+            return
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._queue is None and self.callback is None:
+            self._queue = asyncio.Queue(maxsize=1000)   # a slow reader slows the polling down
+        await asyncio.gather(*(self._watch(community_id) for community_id in self.community_ids))
+
+    def run_forever(self):
+        """Blocking version of run, for callback users outside an event loop."""
+        asyncio.run(self.run())
+
+    def stop(self):
+        """Stops polling after the requests in flight. Safe to call from any thread or a callback."""
+        self._stopped.set()
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    async def __aiter__(self) -> AsyncIterator[WatchEvent]:
+        if self.callback is not None:
+            raise ValueError("Watcher with a callback can't also be iterated")
+        self._queue = asyncio.Queue(maxsize=1000)
+        runner = asyncio.ensure_future(self.run())
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(self._queue.get())
+                await asyncio.wait((getter, runner), return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    runner.result()                 # raises if polling broke
+                    while not self._queue.empty():
+                        yield self._queue.get_nowait()
+                    return
+                yield getter.result()
+        finally:
+            if getter is not None:
+                getter.cancel()
+            runner.cancel()
+
+    async def _watch(self, community_id: str):
+        # spread the first polls out a little, so communities don't stay in lockstep
+        first = True
+        await self._sleep(random.uniform(0, min(1.0, self.intervals[community_id] / 10)))
+        while not self._stop.is_set():
+            try:
+                found = await self._poll(community_id, emit=self.emit_existing or not first)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                self._logger.warning("watch poll failed, community=%s, error=%s", community_id, e)
+                found = None
+            else:
+                first = False
+
+            interval = self.intervals[community_id]
+            if found:
+                interval = max(self.min_interval, interval / 2)
+            else:
+                interval = min(self.max_interval, interval * 1.5)
+            self.intervals[community_id] = interval
+            await self._sleep(interval)
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stop.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _get(self, endpoint: str, model: type, params: Dict = None):
+        async with self._semaphore:
+            if self._is_async:
+                return await self._api._get_model(endpoint, model, params)
+            # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+            return await asyncio.get_running_loop().run_in_executor(None, self._api._get_model, endpoint, model,
+                                                                    params)
+
+    async def _poll(self, community_id: str, emit: bool) -> int:
+        """Fetches one community's activity page, emitting what's new. Returns how many events."""
+        params = {"communityId" : community_id, "sort" : "activity", "limit" : self.page_limit}
+        page = await self._get('posts', Posts, {key: value for key, value in params.items() if value is not None})
+        self.polls += 1
+
+        events = []
+        active = []                                 # (post, previous fingerprint) with new comments
+        for post in page.posts:
+            key = ('post', post.id)
+            previous = self.seen.get(key)
+            fingerprint = _post_fingerprint(post)
+            kind = self.seen.check(key, fingerprint)
+            if kind is not None and emit:
+                events.append(WatchEvent(kind, post, community_id))
+            if emit and self.comments and post.no_comments and (previous is None or previous[2] != post.no_comments):
+                active.append((post, previous))
+
+        for post, previous in active:
+            events.extend(await self._poll_comments(post, previous, community_id))
+
+        for event in events:
+            await self._emit(event)
+        return len(events)
+
+    async def _poll_comments(self, post: Post, previous: Optional[tuple], community_id: str) -> List[WatchEvent]:
+        page = await self._get(f'posts/{post.public_id}/comments', Comments)
+        baseline = ('comments', post.id)
+        # without a baseline for this post, only comments made since its last known activity are new
+        since = _to_datetime(previous[3]) if previous is not None and baseline not in self.seen else None
+        self.seen.check(baseline, True)
+
+        events = []
+        for comment in page.comments:
+            kind = self.seen.check(('comment', comment.id), _comment_fingerprint(comment))
+            if kind == WatchEvent.NEW and since is not None and comment.created_at and comment.created_at <= since:
+                continue
+            if kind is not None:
+                events.append(WatchEvent(kind, comment, community_id))
+        return events
+
+    async def _emit(self, event: WatchEvent):
+        if self.callback is None:
+            await self._queue.put(event)
+            return
+        result = self.callback(event)
+        if inspect.isawaitable(result):
+            await result
+
+
+def watch(api, community_ids: Iterable[str], interval: float = 30.0,
+          callback: Callable[[WatchEvent], None] = None, **kwargs) -> Watcher:
+    """Shorthand for Watcher(api, community_ids, interval, callback=callback, **kwargs).
+
+    Either run it with a callback (await watcher.run(), or watcher.run_forever() from sync code)
+    or iterate it with async for.
+    """
+    return Watcher(api, community_ids, interval, callback=callback, **kwargs)
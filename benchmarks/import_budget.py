@@ -0,0 +1,67 @@
+"""Checks that importing DiscPy stays cheap, for short-lived CLI and cron jobs.
+
+    python benchmarks/import_budget.py            # exits 1 if any import is over budget
+
+Each import runs in a fresh interpreter, a few times, keeping the best time (so a slow disk or
+a busy machine only ever makes it look worse, never better). Only the import itself is timed,
+not the interpreter's startup. It also fails if an import loads a module on FORBIDDEN, the
+dependencies that are meant to stay unloaded until a request is actually made.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# statement -> budget in milliseconds
+BUDGETS = {
+    'import DiscPy' : 5,
+    'import DiscPy.cli' : 10,
+    'import DiscPy.export' : 20,
+    'from DiscPy import DiscuitAPI' : 80,
+}
+
+# modules none of the statements should load
+FORBIDDEN = ('requests', 'urllib3', 'aiohttp', 'asyncio', 'msgspec', 'orjson', 'pyarrow', 'numpy')
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - started
+loaded = [name for name in sys.argv[2:] if type(sys.modules.get(name)).__name__ == 'module']
+print(elapsed, ' '.join(loaded))
+"""
+
+def _measure(statement: str, repeats: int) -> tuple:
+    best, loaded = float('inf'), []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', _PROBE, statement, *FORBIDDEN], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.split(maxsplit=1)
+        best = min(best, float(output[0]))
+        loaded = output[1].split() if len(output) > 1 else []
+    return best * 1000, loaded
+
+def measure(repeats: int = 5) -> dict:
+    """{statement: {'ms', 'budget_ms', 'loaded', 'ok'}} for every statement in BUDGETS.
+
+    Modules left lazily imported (see DiscPy._lazy) don't count as loaded.
+    """
+    results = {}
+    for statement, budget in BUDGETS.items():
+        elapsed, loaded = _measure(statement, repeats)
+        results[statement] = {'ms': elapsed, 'budget_ms': budget, 'loaded': loaded,
+                              'ok': elapsed <= budget and not loaded}
+    return results
+
+def main() -> int:
+    results = measure()
+    for statement, result in results.items():
+        verdict = 'ok' if result['ok'] else 'OVER BUDGET'
+        extra = f", loaded {', '.join(result['loaded'])}" if result['loaded'] else ''
+        print(f"{statement:<36}{result['ms']:>8.1f} ms  (budget {result['budget_ms']} ms{extra})  {verdict}")
+    return 0 if all(result['ok'] for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""Stand-in Discuit API server for the benchmarks.
+
+Serves generated but realistically shaped payloads for posts, posts/{id}, posts/{id}/comments,
+communities and _user, with optional latency, jitter and error injection. Payloads are encoded
+once up front so the server spends as little time per request as possible.
+
+    python benchmarks/mock_server.py --port 8080 --latency 0.05 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ('the quick brown fox jumps over lazy dog discuit community post comment reply thread link image '
+         'python rust chess formula racing music film book science history news vote hot latest').split()
+
+
+def _text(rng: random.Random, low: int, high: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+def _timestamp(moment: datetime) -> str:
+    # the API sends RFC 3339 with nanoseconds
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond:06d}{moment.second * 7 % 1000:03d}Z"
+
+def _id(rng: random.Random) -> str:
+    return uuid.UUID(int=rng.getrandbits(128)).hex[:24]
+
+
+def make_post(rng: random.Random, moment: datetime, community: dict) -> dict:
+    is_link = rng.random() < 0.4
+    return {
+        'id': _id(rng), 'type': 'link' if is_link else 'text', 'publicId': _id(rng)[:10],
+        'userId': _id(rng), 'username': rng.choice(WORDS) + str(rng.randint(1, 999)), 'userGroup': 'normal',
+        'userDeleted': False, 'isPinned': rng.random() < 0.01, 'communityId': community['id'],
+        'communityName': community['name'], 'title': _text(rng, 4, 14).capitalize(),
+        'body': None if is_link else _text(rng, 10, 200), 'locked': False, 'lockedBy': None, 'lockedAt': None,
+        'upvotes': rng.randint(0, 500), 'downvotes': rng.randint(0, 50), 'hotness': rng.randint(0, 10 ** 9),
+        'createdAt': _timestamp(moment), 'editedAt': None, 'lastActivityAt': _timestamp(moment + timedelta(hours=2)),
+        'deleted': False, 'deletedContent': False, 'noComments': rng.randint(0, 300), 'comments': None,
+        'commentsNext': None,
+        'link': {'url': f"https://example.com/{_id(rng)}.jpg", 'hostname': 'example.com'} if is_link else None
+    }
+
+def make_comment(rng: random.Random, moment: datetime, post: dict, parent: dict = None) -> dict:
+    return {
+        'id': _id(rng), 'postId': post['id'], 'postPublicId': post['publicId'],
+        'communityId': post['communityId'], 'communityName': post['communityName'], 'userId': _id(rng),
+        'username': rng.choice(WORDS) + str(rng.randint(1, 999)), 'userGroup': 'normal', 'userDeleted': False,
+        'parentId': parent['id'] if parent else None, 'depth': parent['depth'] + 1 if parent else 0,
+        'noReplies': 0, 'noRepliesDirect': 0,
+        'ancestors': (parent['ancestors'] or []) + [parent['id']] if parent else None,
+        'body': _text(rng, 3, 80), 'upvotes': rng.randint(0, 100), 'downvotes': rng.randint(0, 10),
+        'createdAt': _timestamp(moment), 'editedAt': None, 'deletedAt': None, 'userVoted': None,
+        'userVotedUp': None, 'postDeleted': False
+    }
+
+def make_community(rng: random.Random, name: str, moment: datetime) -> dict:
+    image = {'mimetype': 'image/jpeg', 'width': 512, 'height': 512, 'size': rng.randint(10 ** 4, 10 ** 6),
+             'averageColor': 'rgb(40,40,40)', 'url': f"/images/{_id(rng)}.jpeg"}
+    community_id = _id(rng)
+    return {
+        'id': community_id, 'userId': _id(rng), 'name': name, 'nsfw': False, 'about': _text(rng, 10, 40),
+        'noMembers': rng.randint(10, 50000), 'proPic': image, 'bannerImage': dict(image, width=1920, height=480),
+        'createdAt': _timestamp(moment), 'deletedAt': None, 'userJoined': None, 'userMod': None, 'mods': [],
+        'rules': [{'id': i, 'rule': _text(rng, 3, 8), 'description': None, 'communityId': community_id,
+                   'zIndex': i, 'createdBy': _id(rng), 'createdAt': _timestamp(moment)} for i in range(3)],
+        'ReportsDetails': None
+    }
+
+def make_user(rng: random.Random, moment: datetime) -> dict:
+    return {
+        'id': _id(rng), 'username': 'benchmark', 'email': None, 'emailConfirmedAt': None,
+        'aboutMe': _text(rng, 5, 20), 'points': rng.randint(0, 10000), 'isAdmin': False, 'noPosts': 12,
+        'noComments': 340, 'createdAt': _timestamp(moment), 'deletedAt': None, 'bannedAt': None,
+        'isBanned': False, 'notificationsNewCount': 0, 'moddingList': None
+    }
+
+
+class MockDiscuit:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 pages: int = 20, page_size: int = 25, comments_per_post: int = 200,
+                 comment_page_size: int = 100, communities: int = 50, seed: int = 0):
+        """A local Discuit API on a free port, run on a background thread.
+
+            with MockDiscuit(latency=0.02) as server:
+                api._rest_adapter.url = server.url
+
+        Args:
+            latency (float, optional): Seconds added to every response. Defaults to 0.
+            jitter (float, optional): Up to this many extra seconds, uniformly random. Defaults to 0.
+            error_rate (float, optional): Fraction of requests answered with 503 (Retry-After: 0). Defaults to 0.
+            pages (int, optional): Pages in the posts listing. Defaults to 20.
+            page_size (int, optional): Posts per page. Defaults to 25.
+            comments_per_post (int, optional): Comments every post has. Defaults to 200.
+            comment_page_size (int, optional): Comments per page. Defaults to 100.
+            communities (int, optional): Communities in the listing. Defaults to 50.
+            seed (int, optional): Seed for the generated data and injected errors. Defaults to 0.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0                           # requests served, including injected errors
+        self.errors = 0                             # injected errors served
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+        rng = random.Random(seed)
+        now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        community_list = [make_community(rng, f"{rng.choice(WORDS)}{i}", now - timedelta(days=400))
+                          for i in range(communities)]
+        posts = [make_post(rng, now - timedelta(minutes=i), rng.choice(community_list))
+                 for i in range(pages * page_size)]
+        self.post = posts[0]
+
+        # every payload is encoded once, keyed by what the handler looks up
+        self._post_pages = [self._encode({'posts': posts[i * page_size:(i + 1) * page_size],
+                                          'next': str(i + 1) if i + 1 < pages else None}) for i in range(pages)]
+        self._posts_by_id = {post['publicId']: self._encode(post) for post in posts}
+        comments = []
+        for i in range(comments_per_post):
+            parent = comments[rng.randrange(len(comments))] if comments and rng.random() < 0.6 else None
+            comments.append(make_comment(rng, now - timedelta(seconds=i), self.post, parent))
+        comment_pages = max(1, -(-comments_per_post // comment_page_size))
+        self._comment_pages = [self._encode({
+            'comments': comments[i * comment_page_size:(i + 1) * comment_page_size],
+            'next': str(i + 1) if i + 1 < comment_pages else None}) for i in range(comment_pages)]
+        self._communities = self._encode(community_list)
+        self._user = self._encode(make_user(rng, now - timedelta(days=100)))
+        self.comment_page = self._comment_pages[0]
+
+    @staticmethod
+    def _encode(payload) -> bytes:
+        return json.dumps(payload).encode()
+
+    @property
+    def url(self) -> str:
+        """Base URL to give a RestAdapter, ending in /api/."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def start(self, port: int = 0) -> 'MockDiscuit':
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _respond(self, path: str, query: dict):
+        """(status, body) for a GET."""
+        with self._lock:
+            self.requests += 1
+            fail = self.error_rate and self._rng.random() < self.error_rate
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return 503, b'{"status": 503, "message": "injected"}'
+
+        segments = path.strip('/').split('/')[1:]      # drop "api"
+        page = int(query.get('next', ['0'])[0] or 0)
+        if segments == ['posts']:
+            return (200, self._post_pages[page]) if page < len(self._post_pages) else (404, b'{}')
+        if len(segments) == 3 and segments[0] == 'posts' and segments[2] == 'comments':
+            return (200, self._comment_pages[page]) if page < len(self._comment_pages) else (404, b'{}')
+        if len(segments) == 2 and segments[0] == 'posts':
+            return 200, self._posts_by_id.get(segments[1], self._posts_by_id[self.post['publicId']])
+        if segments == ['communities']:
+            return 200, self._communities
+        if segments == ['_user']:
+            return 200, self._user
+        return 404, b'{"status": 404}'
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True          # headers and body go out in separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, headers: dict = None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = server._respond(url.path, parse_qs(url.query))
+                self._send(status, body, {'Retry-After': '0'} if status == 503 else None)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self._send(200, b'{}')
+
+            do_PUT = do_POST
+            do_DELETE = do_POST
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='up to this many extra seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 503 responses')
+    args = parser.parse_args()
+    mock = MockDiscuit(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate).start(args.port)
+    print(f"Serving on {mock.url}, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,248 @@
+"""DiscPy benchmarks, run against the local stand-in server in mock_server.py.
+
+    python benchmarks/run.py                          # everything, results to stdout as JSON
+    python benchmarks/run.py -o after.json --compare before.json
+    python benchmarks/run.py --only decode,memory --quick
+
+Benchmarks aren't tests: nothing here passes or fails. Each one writes its numbers to a JSON
+document (with the Python version, platform and git commit) so runs can be diffed with --compare.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from DiscPy.decoders import available_decoders, get_decoder
+from DiscPy.disc_api import DiscuitAPI
+from DiscPy.models import Comments
+from DiscPy.rate_limiter import RateLimiter
+from DiscPy.retry import RetryPolicy
+from DiscPy.transport import RecordingTransport, ReplayTransport
+import import_budget
+from mock_server import MockDiscuit
+
+logging.getLogger().setLevel(logging.CRITICAL)
+
+
+def _client(server: MockDiscuit, **kwargs) -> DiscuitAPI:
+    """A DiscuitAPI pointed at server, with client-side rate limiting out of the way."""
+    limiter = RateLimiter(read_rate=1e9, write_rate=1e9, endpoint_rates={})
+    api = DiscuitAPI(ssl_verify=False, rate_limiter=limiter, **kwargs)
+    api._rest_adapter.url = server.url
+    return api
+
+def _percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {'p50_ms': pick(0.50), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'mean_ms': statistics.mean(ordered) * 1000}
+
+def _build_comments(decoder, content: bytes) -> Comments:
+    # the same path DiscuitAPI._get_model takes
+    page = decoder.decode_typed(content, Comments) if decoder.typed else None
+    return page if page is not None else Comments(**decoder.decode(content))
+
+
+def bench_client_latency(quick: bool) -> dict:
+    """Sequential GET posts/{id}: round trip through RestAdapter, decoding and model building."""
+    requests = 200 if quick else 1000
+    with MockDiscuit() as server:
+        api = _client(server)
+        post_id = server.post['publicId']
+        api.get_post_by_id(post_id)                 # warm the connection
+        samples = []
+        started = time.perf_counter()
+        for _ in range(requests):
+            begin = time.perf_counter()
+            api.get_post_by_id(post_id)
+            samples.append(time.perf_counter() - begin)
+        elapsed = time.perf_counter() - started
+    return dict(requests=requests, requests_per_s=requests / elapsed, **_percentiles(samples))
+
+def bench_client_replay(quick: bool) -> dict:
+    """Sequential GET posts/{id} replayed from a recording: the client's own cost, with no network."""
+    requests = 1000 if quick else 10000
+    with tempfile.TemporaryDirectory() as directory:
+        with MockDiscuit() as server:
+            api = _client(server, transport=RecordingTransport(directory))
+            post_id = server.post['publicId']
+            api.get_post_by_id(post_id)
+            url = server.url
+        api = DiscuitAPI(rate_limiter=RateLimiter(read_rate=1e9, write_rate=1e9, endpoint_rates={}),
+                         transport=ReplayTransport(directory))
+        api._rest_adapter.url = url
+        api.get_post_by_id(post_id)                 # load the recording
+        started = time.perf_counter()
+        for _ in range(requests):
+            api.get_post_by_id(post_id)
+        elapsed = time.perf_counter() - started
+    return dict(requests=requests, requests_per_s=requests / elapsed, us_per_request=elapsed / requests * 1e6)
+
+def bench_client_concurrent(quick: bool) -> dict:
+    """GET posts/{id} from 8 threads sharing one client, with 5 ms of server latency."""
+    requests, workers = (200, 8) if quick else (1000, 8)
+    with MockDiscuit(latency=0.005) as server:
+        api = _client(server)
+        post_id = server.post['publicId']
+
+        def timed(_):
+            begin = time.perf_counter()
+            api.get_post_by_id(post_id)
+            return time.perf_counter() - begin
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            samples = list(executor.map(timed, range(requests)))
+        elapsed = time.perf_counter() - started
+    return dict(requests=requests, workers=workers, requests_per_s=requests / elapsed, **_percentiles(samples))
+
+def bench_client_errors(quick: bool) -> dict:
+    """Sequential GETs while 10% of responses are 503s, so the retry path is exercised."""
+    requests = 200 if quick else 1000
+    with MockDiscuit(error_rate=0.1, seed=1) as server:
+        policy = RetryPolicy(max_attempts=5, backoff_base=0.001, backoff_cap=0.01)
+        api = _client(server, retry_policy=policy)
+        post_id = server.post['publicId']
+        failures = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            try:
+                api.get_post_by_id(post_id)
+            except Exception:
+                failures += 1
+        elapsed = time.perf_counter() - started
+        served = server.requests
+    return dict(requests=requests, requests_per_s=requests / elapsed, failures=failures,
+                retries=policy.metrics.retries, server_requests=served)
+
+def bench_pagination(quick: bool) -> dict:
+    """iter_posts over every page of the listing, and iter_comments over a post's comments."""
+    pages = 10 if quick else 40
+    with MockDiscuit(pages=pages, page_size=25, comments_per_post=2000, comment_page_size=100) as server:
+        api = _client(server)
+        started = time.perf_counter()
+        posts = sum(1 for _ in api.iter_posts())
+        posts_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        comments = sum(1 for _ in api.iter_comments(server.post['publicId']))
+        comments_elapsed = time.perf_counter() - started
+    return dict(posts=posts, pages=pages, posts_per_s=posts / posts_elapsed, post_pages_per_s=pages / posts_elapsed,
+                comments=comments, comments_per_s=comments / comments_elapsed)
+
+def bench_decode(quick: bool) -> dict:
+    """Decoding a 1000 comment page and building the Comment objects, per installed decoder."""
+    content = MockDiscuit(comments_per_post=1000, comment_page_size=1000).comment_page
+    repeats = 5 if quick else 20
+    results = {'page_bytes': len(content)}
+    for name in available_decoders():
+        decoder = get_decoder(name)
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            page = _build_comments(decoder, content)
+            best = min(best, time.perf_counter() - started)
+        results[f"{name}_us_per_comment"] = best / len(page.comments) * 1e6
+    return results
+
+def bench_memory(quick: bool) -> dict:
+    """Memory held by 100k Comment objects built with the default decoder."""
+    count = 20_000 if quick else 100_000
+    content = MockDiscuit(comments_per_post=1000, comment_page_size=1000).comment_page
+    decoder = get_decoder()
+    gc.collect()
+    tracemalloc.start()
+    pages = [_build_comments(decoder, content) for _ in range(count // 1000)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    comments = sum(len(page.comments) for page in pages)
+    return dict(decoder=decoder.name, comments=comments, bytes_per_comment=current / comments,
+                mb_per_100k=current / comments * 100_000 / 2 ** 20, peak_mb=peak / 2 ** 20)
+
+def bench_startup(quick: bool) -> dict:
+    """Import time of the package, the CLI and DiscuitAPI, each in a fresh interpreter."""
+    results = {}
+    for statement, result in import_budget.measure(repeats=3 if quick else 10).items():
+        results[statement.replace(' ', '_') + '_ms'] = result['ms']
+        results[statement.replace(' ', '_') + '_ok'] = result['ok']
+    return results
+
+
+BENCHMARKS = {
+    'client_latency' : bench_client_latency,
+    'client_replay' : bench_client_replay,
+    'client_concurrent' : bench_client_concurrent,
+    'client_errors' : bench_client_errors,
+    'pagination' : bench_pagination,
+    'decode' : bench_decode,
+    'memory' : bench_memory,
+    'startup' : bench_startup
+}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(before: dict, after: dict) -> str:
+    """Side by side of the numeric results two runs share, with the relative change."""
+    lines = [f"{'benchmark.metric':<48}{'before':>14}{'after':>14}{'change':>10}"]
+    for name, metrics in after['results'].items():
+        for metric, value in metrics.items():
+            old = before.get('results', {}).get(name, {}).get(metric)
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)) and not isinstance(value, bool):
+                change = f"{(value - old) / old * 100:+.1f}%" if old else ''
+                lines.append(f"{name + '.' + metric:<48}{old:>14.4g}{value:>14.4g}{change:>10}")
+    return '\n'.join(lines)
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--output', help='write the results JSON here instead of stdout')
+    parser.add_argument('--compare', metavar='BASELINE', help='print changes against an earlier results file')
+    parser.add_argument('--only', help=f"comma separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--quick', action='store_true', help='fewer iterations, for a smoke run')
+    args = parser.parse_args(argv)
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    report = {
+        'meta': {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+                 'platform': platform.platform(), 'commit': _commit(), 'quick': args.quick,
+                 'decoders': available_decoders(), 'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())},
+        'results': {}
+    }
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        report['results'][name] = BENCHMARKS[name](args.quick)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@ from setuptools import setup
 
 setup(
     name='DiscPy',
-    version='0.1.1',    
+    version='0.2.0',    
     description='A Python wrapper for the Discuit API.',
     long_description='This is a wrapper for discuit.net/api',
     url='https://github.com/Chaaronn/DiscPy',
@@ -12,6 +12,16 @@ setup(
     packages=['DiscPy'],
     install_requires=['requests'                    
                       ],
+    entry_points={
+        'console_scripts': ['discpy=DiscPy.cli:main'],
+    },
+    extras_require={
+        'async': ['aiohttp'],
+        'fast': ['msgspec'],
+        'orjson': ['orjson'],
+        'arrow': ['pyarrow', 'numpy'],
+        'http2': ['httpx[http2]'],
+    },
 
     classifiers=[
         'Development Status :: 1 - Planning',
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# run against the checkout, without installing it first
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
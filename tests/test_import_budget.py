@@ -0,0 +1,15 @@
+import pytest
+from benchmarks import import_budget
+
+
+@pytest.fixture(scope='module')
+def results():
+    return import_budget.measure()
+
+
+@pytest.mark.parametrize('statement', list(import_budget.BUDGETS))
+def test_import_stays_within_budget(results, statement):
+    result = results[statement]
+    assert not result['loaded'], f"{statement} loaded {', '.join(result['loaded'])}"
+    assert result['ms'] <= result['budget_ms'], \
+        f"{statement} took {result['ms']:.1f} ms, budget {result['budget_ms']} ms"
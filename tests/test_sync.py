@@ -0,0 +1,141 @@
+import pytest
+from DiscPy.models import Comments, Posts
+from DiscPy.sync import SyncEngine, SyncStore
+
+
+def make_post(i: int, activity: str, upvotes: int = 0, no_comments: int = 0) -> dict:
+    return dict(id=f'p{i}', type='text', publicId=f'pub{i}', userId='u1', username='bob', userGroup='normal',
+                userDeleted=False, isPinned=False, communityId='c1', communityName='general', title=f'title {i}',
+                body=f'body {i}', locked=False, lockedBy=None, lockedAt=None, upvotes=upvotes, downvotes=0,
+                hotness=0, createdAt='2023-01-01T00:00:%02dZ' % i, editedAt=None, lastActivityAt=activity,
+                deleted=False, deletedContent=False, noComments=no_comments, comments=None, commentsNext=None)
+
+def make_comment(post: dict, i: int) -> dict:
+    return dict(id=f"{post['id']}c{i}", postId=post['id'], postPublicId=post['publicId'], communityId='c1',
+                communityName='general', userId='u1', username='bob', userGroup='normal', userDeleted=False,
+                parentId=None, depth=0, noReplies=0, noRepliesDirect=0, ancestors=None, body=f'comment {i}',
+                upvotes=0, downvotes=0, createdAt='2023-01-01T00:00:00Z', editedAt=None, deletedAt=None,
+                userVoted=None, userVotedUp=None, postDeleted=False)
+
+
+class FakeAPI:
+    """Serves one community's posts one per page, sorted like the real feeds."""
+
+    def __init__(self, posts: int = 4):
+        self.posts = [make_post(i, '2023-01-02T00:00:00Z') for i in range(posts)]
+        self.page_calls = []                        # (sort, cursor) of every page request
+        self.comment_calls = []                     # public ID of every comment fetch
+        self.fail_pages = set()                     # cursors whose page request raises
+        self.fail_comments = set()                  # public IDs whose comment fetch raises
+
+    def _get_model(self, endpoint, model, ep_params):
+        sort, cursor = ep_params['sort'], ep_params.get('next')
+        self.page_calls.append((sort, cursor))
+        if cursor in self.fail_pages:
+            raise ConnectionError(f"page {cursor}")
+        key = 'lastActivityAt' if sort == 'activity' else 'createdAt'
+        feed = sorted(self.posts, key=lambda post: post[key], reverse=True)
+        start = int(cursor or 0)
+        next_cursor = str(start + 1) if start + 1 < len(feed) else None
+        return Posts(posts=[dict(post) for post in feed[start:start + 1]], next=next_cursor)
+
+    def iter_comments(self, public_id):
+        self.comment_calls.append(public_id)
+        if public_id in self.fail_comments:
+            raise ConnectionError(f"comments of {public_id}")
+        post = next(post for post in self.posts if post['publicId'] == public_id)
+        return Comments([make_comment(post, i) for i in range(post['noComments'])], None).comments
+
+
+@pytest.fixture
+def store():
+    store = SyncStore(':memory:')
+    yield store
+    store.close()
+
+
+def stored(store: SyncStore, column: str) -> dict:
+    return {row['id']: row[column] for row in store.iter_rows('posts')}
+
+
+def test_backfill_resumes_from_the_last_page_stored(store):
+    api = FakeAPI()
+    api.fail_pages.add('2')
+    engine = SyncEngine(api, store)
+    with pytest.raises(ConnectionError):
+        engine.sync_community('c1')
+    assert store.count('posts') == 2
+    assert store.get_state('c1')['backfill_cursor'] == '2'
+
+    api.fail_pages.clear()
+    api.page_calls.clear()
+    engine.sync_community('c1')
+    assert api.page_calls == [('latest', '2'), ('latest', '3')]
+    assert store.count('posts') == 4
+    assert store.get_state('c1')['backfill_done'] == 1
+
+
+def test_catch_up_only_fetches_what_changed(store):
+    api = FakeAPI()
+    engine = SyncEngine(api, store)
+    engine.sync_community('c1')
+
+    api.posts[1].update(lastActivityAt='2023-01-03T00:00:00Z', upvotes=5)
+    api.page_calls.clear()
+    report = engine.sync_community('c1')
+    assert report.posts == 1
+    # the changed post, then the first post at the mark ends the walk
+    assert api.page_calls == [('activity', None), ('activity', '1')]
+    assert stored(store, 'upvotes')['p1'] == 5
+
+
+def test_capped_catch_up_does_not_skip_unfetched_pages(store):
+    api = FakeAPI()
+    engine = SyncEngine(api, store)
+    engine.sync_community('c1')
+    mark = store.get_state('c1')['last_activity_at']
+
+    for i, post in enumerate(api.posts):
+        post.update(lastActivityAt='2023-01-03T00:00:0%dZ' % i, upvotes=9)
+    engine.sync_community('c1', max_pages=1)
+    assert store.get_state('c1')['last_activity_at'] == mark
+
+    engine.sync_community('c1')
+    assert set(stored(store, 'upvotes').values()) == {9}
+    assert store.get_state('c1')['last_activity_at'] == '2023-01-03T00:00:03+00:00'
+
+
+def test_failed_comment_fetch_is_retried(store):
+    api = FakeAPI(posts=3)
+    for post in api.posts:
+        post['noComments'] = 2
+    api.fail_comments.add('pub1')
+    engine = SyncEngine(api, store)
+    with pytest.raises(ConnectionError):
+        engine.sync_community('c1')
+
+    api.fail_comments.clear()
+    api.comment_calls.clear()
+    engine.sync_community('c1')
+    assert 'pub1' in api.comment_calls
+    assert store.count('comments') == 6
+    assert stored(store, 'no_comments') == {'p0': 2, 'p1': 2, 'p2': 2}
+
+
+def test_comments_are_only_fetched_when_the_count_changes(store):
+    api = FakeAPI(posts=2)
+    api.posts[0]['noComments'] = 2
+    engine = SyncEngine(api, store)
+    engine.sync_community('c1')
+    assert api.comment_calls == ['pub0']
+
+    # activity without new comments, e.g. a vote
+    api.posts[0].update(lastActivityAt='2023-01-03T00:00:00Z', upvotes=3)
+    api.comment_calls.clear()
+    engine.sync_community('c1')
+    assert api.comment_calls == []
+
+    api.posts[0].update(lastActivityAt='2023-01-04T00:00:00Z', noComments=3)
+    engine.sync_community('c1')
+    assert api.comment_calls == ['pub0']
+    assert store.count('comments') == 3